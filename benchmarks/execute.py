@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+'''
+Execution benchmark: compiles a program looping --rounds times over integer
+and float arithmetic, comparisons and an if, and runs it on the virtual
+machine of cmm.vm and as Python, compiled by cmm.transpile. Compiling is
+timed from the source and from the result cache, running with the output
+discarded. A second program runs a --depth-th of the rounds, each inside
+--depth whiles nested in one another, more than compile() takes, so
+cmm.transpile runs it on the virtual machine as well.
+
+    python3 benchmarks/execute.py [--rounds N] [--repeat N] [--depth N]
+'''
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cmm import vm, transpile
+from cmm.cache import ResultCache
+
+def program(rounds):
+    return '\n'.join([
+        '{', 'int i;', 'int total;', 'int odd;', 'float x;', '}',
+        '{',
+        'i = 0;', 'total = 0;', 'odd = 0;', 'x = 0.0;',
+        'while i < %d do' % rounds,
+        'total = total + i % 7 * 3 - i / 5;',
+        'x = x + 0.5 * 2.0;',
+        'if i % 2 == 1:', 'odd = odd + 1;', 'end if;',
+        'i = i + 1;',
+        'end while;',
+        'print(total);', 'print(x);', 'print(odd);',
+        '}'])
+
+# the same rounds, each inside depth whiles going around once
+def nested(rounds, depth):
+    # names are letters only
+    names = ['w' + ''.join(chr(97 + int(digit)) for digit in str(level))
+             for level in range(depth)]
+    lines = ['{', 'int total;'] + ['int %s;' % name for name in names] + ['}', '{', 'total = 0;']
+    for level, name in enumerate(names):
+        lines += ['%s = 0;' % name, 'while %s < %d do' % (name, rounds if level == 0 else 1)]
+    lines.append('total = total + %s %% 7 * 3;' % names[0])
+    for name in reversed(names):
+        lines += ['%s = %s + 1;' % (name, name), 'end while;']
+    lines += ['print(total);', '}']
+    return '\n'.join(lines)
+
+# the best time of repeat calls of function
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200000, help="rounds of the loop")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best counts")
+    parser.add_argument("--depth", type=int, default=25, help="whiles nested in the second program")
+    args = parser.parse_args()
+    deep = max(1, args.rounds // args.depth)
+    programs = (('flat', program(args.rounds), args.rounds),
+                ('depth %d' % args.depth, nested(deep, args.depth), deep))
+    for shape, text, rounds in programs:
+        for name, backend in (('vm', vm), ('python', transpile)):
+            with tempfile.TemporaryDirectory() as directory:
+                cache = ResultCache(directory)
+                backend.load(text, cache)
+                compiled = best(lambda: backend.load(text), args.repeat)
+                cached = best(lambda: backend.load(text, cache), args.repeat)
+            code = backend.load(text)
+            ran = best(lambda: backend.execute(code, io.StringIO(), io.StringIO()), args.repeat)
+            print("%-8s %-6s compile   %9.2f ms" % (shape, name, compiled * 1e3))
+            print("%-8s %-6s cached    %9.2f ms" % (shape, name, cached * 1e3))
+            print("%-8s %-6s run       %9.2f ms  %6.2f M rounds/s" % (
+                shape, name, ran * 1e3, rounds / ran / 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+'''
+Synthetic C-- programs following the grammar in the README: a var block of
+declarations and a statement block of assignments, read, print, and if and
+while statements nested up to a given depth, with a share of statements
+carrying a type error and a share of if and while conditions that are
+constant false, for cmm.optimize to drop.
+
+    python3 benchmarks/generate.py [--declarations N] [--statements N]
+        [--depth N] [--expression N] [--errors F] [--dead F] [--seed N] [FILE]
+'''
+
+import sys
+import random
+import argparse
+
+_letters = 'abcdefghijklmnopqrstuvwxyz'
+
+# the n-th symbol name: letters only, as symbols may not hold digits
+def symbolName(prefix, n):
+    name = ''
+    while True:
+        name = _letters[n % 26] + name
+        n //= 26
+        if not n:
+            return prefix + name
+
+class Generator:
+
+    # declarations symbols, about statements statements nested up to depth,
+    # expressions of up to expression operands, a share errors of the
+    # statements with a type error in them and a share dead of the conditions
+    # constant false
+    def __init__(self, declarations=30, statements=100, depth=2, expression=3, errors=0.0,
+                 seed=0, dead=0.0):
+        self.rnd = random.Random(seed)
+        self.statements = statements
+        self.depth = depth
+        self.expression = max(1, expression)
+        self.errors = errors
+        self.dead = dead
+        self.names = {'int': [], 'float': [], 'boolean': []}
+        self.declarations = []
+        for n in range(max(3, declarations)):
+            kind = ('int', 'float', 'boolean')[n % 3]
+            name = symbolName('v' + kind[0], n // 3)
+            self.names[kind].append(name)
+            self.declarations.append((kind, name))
+        self.lines = []
+        self.count = 0
+
+    def program(self):
+        lines = self.lines = ['{']
+        lines.extend(['\t%s %s;' % declaration for declaration in self.declarations])
+        lines.extend(['}', '{'])
+        self.count = 0
+        while self.count < self.statements:
+            self._statement(1, self.depth)
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def _faulty(self):
+        return self.errors and self.rnd.random() < self.errors
+
+    def _statement(self, indent, depth):
+        self.count += 1
+        roll = self.rnd.random()
+        if depth and roll < 0.1:
+            self._if(indent, depth - 1)
+        elif depth and roll < 0.18:
+            self._while(indent, depth - 1)
+        elif roll < 0.24:
+            self._line(indent, 'print(%s);' % self._expr(self.rnd.choice(('int', 'float'))))
+        elif roll < 0.28:
+            kind = self.rnd.choice(('int', 'float', 'boolean'))
+            self._line(indent, 'read(%s);' % self._name(kind))
+        else:
+            self._assign(indent)
+
+    def _line(self, indent, text):
+        self.lines.append('\t' * indent + text)
+
+    def _block(self, indent, depth):
+        self._line(indent, '{')
+        for _ in range(self.rnd.randint(1, 4)):
+            self._statement(indent + 1, depth)
+        self._line(indent, '}')
+
+    def _if(self, indent, depth):
+        self._line(indent, 'if %s:' % self._condition())
+        self._block(indent, depth)
+        if self.rnd.random() < 0.3:
+            self._line(indent, 'else')
+            self._block(indent, depth)
+        self._line(indent, 'end if;')
+
+    def _while(self, indent, depth):
+        self._line(indent, 'while %s do' % self._condition())
+        self._block(indent, depth)
+        self._line(indent, 'end while;')
+
+    def _assign(self, indent):
+        kind = self.rnd.choice(('int', 'float', 'boolean'))
+        target = self._name(kind)
+        if kind == 'boolean':
+            value = self.rnd.choice(('0', '1'))
+            if self._faulty():
+                value = self._expr('int')
+        else:
+            value = self._expr(kind)
+            if self._faulty():
+                value = self._expr('float' if kind == 'int' else 'int')
+        self._line(indent, '%s = %s;' % (target, value))
+
+    def _name(self, kind):
+        if self._faulty():
+            # not declared
+            return symbolName('zz', self.rnd.randrange(26))
+        return self.rnd.choice(self.names[kind])
+
+    def _operand(self, kind):
+        roll = self.rnd.random()
+        if roll < 0.25:
+            return str(self.rnd.randint(1, 99)) if kind == 'int' else '%d.%d' % (
+                self.rnd.randint(0, 99), self.rnd.randint(0, 9))
+        return self.rnd.choice(self.names[kind])
+
+    def _expr(self, kind):
+        operators = '+-*/%' if kind == 'int' else '+-*/'
+        parts = [self._operand(kind)]
+        for _ in range(self.rnd.randint(1, self.expression) - 1):
+            parts.append(self.rnd.choice(operators))
+            parts.append(self._operand(kind))
+        return ' '.join(parts)
+
+    def _condition(self):
+        if self.dead and self.rnd.random() < self.dead:
+            return self.rnd.choice(('0', '1 > 2', '2 < 1 and 1', '0 or 1 == 2'))
+        if self._faulty():
+            # an int where a boolean is needed
+            return self.rnd.choice(self.names['int'])
+        kind = self.rnd.choice(('int', 'float'))
+        condition = '(%s) %s (%s)' % (self._expr(kind), self.rnd.choice(('>', '<', '==', '!=')),
+                                      self._expr(kind))
+        if self.rnd.random() < 0.2:
+            condition += ' and %s' % self.rnd.choice(self.names['boolean'])
+        return condition
+
+def generate(declarations=30, statements=100, depth=2, expression=3, errors=0.0, seed=0,
+             dead=0.0):
+    return Generator(declarations, statements, depth, expression, errors, seed, dead).program()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("FILE", nargs="?", help="where to write the program (default: stdout)")
+    parser.add_argument("--declarations", type=int, default=30, help="declared symbols")
+    parser.add_argument("--statements", type=int, default=100, help="statements")
+    parser.add_argument("--depth", type=int, default=2, help="deepest if/while nesting")
+    parser.add_argument("--expression", type=int, default=3, help="most operands per expression")
+    parser.add_argument("--errors", type=float, default=0.0,
+                        help="share of statements with a type error (0 to 1)")
+    parser.add_argument("--dead", type=float, default=0.0,
+                        help="share of if and while conditions that are constant false (0 to 1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    program = generate(args.declarations, args.statements, args.depth, args.expression,
+                       args.errors, args.seed, args.dead)
+    if args.FILE:
+        with open(args.FILE, 'w') as f:
+            f.write(program)
+    else:
+        sys.stdout.write(program)
+
+if __name__ == '__main__':
+    main()
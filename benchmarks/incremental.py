@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+'''
+Incremental checking benchmark: how long re-checking a large program takes
+after a one line edit, next to checking it from scratch with the tree
+engine. Every edit's messages are compared with a full check.
+
+    python3 benchmarks/incremental.py [--lines N] [--edits N]
+'''
+
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cmm.incremental import IncrementalChecker
+from cmm.lexer import generateTokens, stripComments
+from cmm.parser import parse
+from cmm.typecheck import TreeChecker
+
+# a program with a var block of symbols and about lines statements, type
+# correct apart from the odd statement
+def generate(lines, symbols=300, seed=0):
+    rnd = random.Random(seed)
+    types = ('int', 'float', 'boolean')
+    # symbols are letters only
+    letters = [a + b for a in 'abcdefghijklmnopqrstuvwxyz' for b in 'abcdefghijklmnopqrstuvwxyz']
+    names = {kind: [kind[0] + letters[i] for i in range(symbols // 3)] for kind in types}
+    source = ['{'] + ['%s %s;' % (kind, name) for kind in types for name in names[kind]] + ['}', '{']
+    while len(source) < lines:
+        kind = rnd.choice(types[:2])
+        a, b, c = [rnd.choice(names[kind]) for _ in range(3)]
+        flag = rnd.choice(names['boolean'])
+        roll = rnd.random()
+        if roll < 0.1:
+            source += ['if %s > %s:' % (a, b), '%s = %s + 1;' % (c, b) if kind == 'int' else
+                       '%s = %s;' % (c, b), 'end if;']
+        elif roll < 0.15:
+            source += ['while %s do' % flag, 'print(%s);' % a, 'end while;']
+        elif roll < 0.2:
+            source.append('%s = %s == %s;' % (flag, a, b))
+        elif roll < 0.201:
+            source.append('%s = %s * %s;' % (flag, a, b))
+        else:
+            source.append('%s = %s * %s;' % (a, b, c))
+    return '\n'.join(source + ['}'])
+
+def fullCheck(text):
+    checker = TreeChecker().check(parse(stripComments(generateTokens(text.lower()))))
+    checker.messages.sort(key=lambda message: message[0])
+    return checker.messages
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100000, help="lines in the program")
+    parser.add_argument("--edits", type=int, default=50, help="edits to time")
+    args = parser.parse_args()
+    text = generate(args.lines)
+    rnd = random.Random(1)
+
+    start = time.perf_counter()
+    full = fullCheck(text)
+    print("%-28s %9.1f ms" % ("full check", (time.perf_counter() - start) * 1e3))
+    start = time.perf_counter()
+    checker = IncrementalChecker(text)
+    print("%-28s %9.1f ms" % ("incremental, first check", (time.perf_counter() - start) * 1e3))
+    assert checker.messages() == full
+
+    statements = len(checker.blocks[0].entries) + 3
+    edits = [
+        ("replace a statement", lambda i: (i, i + 1, ['iab = iac + iad;'])),
+        ("insert a line", lambda i: (i, i, ['print(fae);'])),
+        ("delete a line", lambda i: (i, i + 1, [])),
+        ("change a declaration", lambda i: (1, 2, [rnd.choice(('int', 'float')) + ' iaa;'])),
+    ]
+    for name, edit in edits:
+        times = []
+        for _ in range(args.edits):
+            start, end, lines = edit(rnd.randrange(statements, len(checker.source) - 1))
+            begin = time.perf_counter()
+            checker.edit(start, end, lines)
+            messages = checker.messages()
+            times.append(time.perf_counter() - begin)
+            assert messages == fullCheck('\n'.join(checker.source)), name
+        times.sort()
+        print("%-28s %9.1f ms  (median of %d)" % (name, times[len(times) // 2] * 1e3, len(times)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+'''
+Nesting benchmark: checks programs whose if and while blocks, and
+parenthesized expressions, are nested --depth deep, and a program with a
+long run of empty and comment lines, with both engines of the checker: the
+legacy one and the tree one (cmm.parser and cmm.typecheck). Each program
+is checked with the interpreter's recursion limit left as it is, which a
+checker recursing once per level could not get through.
+
+    python3 benchmarks/nesting.py [--depth N] [--repeat N] [--engine E]
+'''
+
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cmm.lexer import lexProgram, stripComments
+from cmm.checker import _check
+
+_head = ['{', 'int a;', 'float b;', 'boolean c;', '}', '{']
+
+# if and while statements alternately nested depth deep, with an assignment
+# in the innermost block
+def blocks(depth):
+    lines = list(_head)
+    for level in range(depth):
+        lines += ['if c:' if level % 2 else 'while c do', '{']
+    lines.append('a = a + 1;')
+    for level in reversed(range(depth)):
+        lines += ['}', 'end if;' if level % 2 else 'end while;']
+    return '\n'.join(lines + ['}'])
+
+# an assignment and a print whose expressions are nested depth parentheses
+# deep, one of them with a type error
+def parens(depth):
+    expr = '(' * depth + 'a + 1' + ')' * depth
+    lines = _head + ['a = %s;' % expr, 'print(%s * 2);' % expr, 'a = %s;' % expr.replace('1', '1.5')]
+    return '\n'.join(lines + ['}'])
+
+# depth empty and comment lines between two statements
+def gaps(depth):
+    lines = _head + ['a = 1;']
+    lines += ['' if n % 2 else '// nothing to see here' for n in range(depth)]
+    return '\n'.join(lines + ['b = 1.5;', '}'])
+
+PROGRAMS = (('blocks', blocks), ('parens', parens), ('gaps', gaps))
+
+def run(name, source, repeat, engine):
+    lines = stripComments(lexProgram(source.lower()))
+    best = None
+    for _ in range(repeat):
+        out = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            _check(lines, engine, 0)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    messages = sum(1 for line in out.getvalue().split('\n') if line[:1].isdigit())
+    print("%-8s %-8s %8d lines %9.2f ms %6d lines with messages" % (
+        engine, name, len(lines), best * 1e3, messages))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=10000, help="nesting depth (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per program, the best counts")
+    parser.add_argument("--engine", choices=["legacy", "tree"], action="append",
+                        help="the engine to check with, given again for more (default: both)")
+    args = parser.parse_args()
+    print("depth %d, recursion limit %d" % (args.depth, sys.getrecursionlimit()))
+    for engine in args.engine or ["legacy", "tree"]:
+        for name, program in PROGRAMS:
+            run(name, program(args.depth), args.repeat, engine)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+'''
+Startup benchmark: how long one run of the tools takes on a small file,
+next to a bare interpreter start and to just importing the modules.
+
+    python3 benchmarks/startup.py [--runs N] [FILE]
+'''
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def timeRuns(cmd, runs, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # measure with bytecode caching on, as it is for an installed package
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    # the first run also writes the bytecode caches
+    subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("FILE", nargs="?", default=os.path.join(ROOT, "test1.cmm"),
+                        help="the program to check (default: test1.cmm)")
+    parser.add_argument("--runs", type=int, default=50, help="runs per command")
+    args = parser.parse_args()
+    path = os.path.abspath(args.FILE)
+    python = sys.executable
+    cases = [
+        ("interpreter", [python, "-c", "pass"], ROOT),
+        ("import cmm.checker", [python, "-c", "import cmm.checker"], ROOT),
+        ("import re + argparse", [python, "-c", "import re, argparse"], ROOT),
+        ("python -m cmm.checker", [python, "-m", "cmm.checker", path], ROOT),
+        ("static-type-checker.py", [python, os.path.join(ROOT, "static-type-checker.py"), path], ROOT),
+        ("python -m cmm.analyzer", [python, "-m", "cmm.analyzer"], os.path.dirname(path)),
+    ]
+    base = None
+    for name, cmd, cwd in cases:
+        median = timeRuns(cmd, args.runs, cwd)
+        if base is None:
+            base = median
+        print("%-24s %7.1f ms  (+%.1f ms over the interpreter)" % (name, median * 1e3, (median - base) * 1e3))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+'''
+Scaling benchmark: times every phase of the tools separately on generated
+programs of growing size, and reports throughput and peak memory.
+
+    python3 benchmarks/suite.py [--sizes N,N,...] [--repeat N] [--output FILE]
+        [--compare FILE] [generator options, see generate.py]
+
+The phases are the checker's generateTokens, stripComments and
+TypeChecker.begin(), and the analyzer's storeStatements and its TokenClass
+loop. Times are the best of --repeat runs; peak memory is measured in a
+separate run under tracemalloc, which slows code down too much to time it.
+--output saves the results as JSON, and --compare shows how the times
+changed against results saved before, so versions can be compared.
+'''
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cmm.lexer import generateTokens, stripComments, storeStatements
+from cmm.checker import TypeChecker
+from cmm.analyzer import TokenClass
+from generate import generate
+
+def _check(lines):
+    TypeChecker(lines).begin()
+
+def _analyze(statements):
+    tokens = TokenClass(statements)
+    while tokens.Next():
+        tokens.checkCurr()
+        tokens.checkLine()
+
+# (name, function of the state): a phase works on what an earlier one made,
+# found in the state under that phase's name
+PHASES = (
+    ('generateTokens', lambda state: generateTokens(state['source'])),
+    ('stripComments', lambda state: stripComments(state['generateTokens'])),
+    ('TypeChecker.begin', lambda state: _check(state['stripComments'])),
+    ('storeStatements', lambda state: storeStatements(state['source'])),
+    ('TokenClass loop', lambda state: _analyze(state['storeStatements'])),
+)
+
+# time and peak memory of function(state), the result stored under name
+def measure(name, function, state, repeat):
+    best = None
+    # both tools print their messages, which is not what is timed
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(state)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        tracemalloc.start()
+        function(state)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    state[name] = result
+    return best, peak
+
+def run(sizes, repeat, options):
+    results = []
+    for size in sizes:
+        source = generate(statements=size, **options).lower()
+        lines = source.count('\n') + 1
+        state = {'source': source}
+        phases = {}
+        for name, function in PHASES:
+            seconds, peak = measure(name, function, state, repeat)
+            phases[name] = {
+                'seconds': seconds,
+                'linesPerSecond': lines / seconds if seconds else None,
+                'bytesPerSecond': len(source) / seconds if seconds else None,
+                'peakBytes': peak,
+            }
+        results.append({'statements': size, 'lines': lines, 'bytes': len(source),
+                        'phases': phases})
+    return results
+
+def _commit():
+    import subprocess
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def report(results, baseline=None):
+    old = {}
+    if baseline is not None:
+        for entry in baseline['results']:
+            old[entry['statements']] = entry['phases']
+    for entry in results:
+        print("%d statements, %d lines, %.1f KiB" % (entry['statements'], entry['lines'],
+                                                     entry['bytes'] / 1024))
+        for name, phase in entry['phases'].items():
+            line = "  %-18s %9.2f ms %9.0f klines/s %9.1f MiB/s %9.1f MiB peak" % (
+                name, phase['seconds'] * 1e3, (phase['linesPerSecond'] or 0) / 1e3,
+                (phase['bytesPerSecond'] or 0) / (1 << 20), phase['peakBytes'] / (1 << 20))
+            before = old.get(entry['statements'], {}).get(name)
+            if before and before['seconds']:
+                line += "  %+6.1f%%" % ((phase['seconds'] / before['seconds'] - 1) * 100)
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="statement counts to run, comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per phase, the best counts")
+    parser.add_argument("--output", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="JSON results to compare against")
+    parser.add_argument("--declarations", type=int, default=300)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--expression", type=int, default=4)
+    parser.add_argument("--errors", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    options = {'declarations': args.declarations, 'depth': args.depth,
+               'expression': args.expression, 'errors': args.errors, 'seed': args.seed}
+    results = run(sizes, args.repeat, options)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.output:
+        data = {'python': platform.python_version(), 'platform': platform.platform(),
+                'commit': _commit(), 'generator': options, 'repeat': args.repeat,
+                'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+'''
+C-- static type checker and lexical analyzer.
+
+The modules are kept independent of each other's heavy imports so that the
+command line tools start quickly: cmm.checker and cmm.analyzer only pull in
+the lexer, and numpy and argparse are only imported when asked for.
+'''
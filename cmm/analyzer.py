@@ -0,0 +1,512 @@
+'''
+Basil Huffman
+ bahuffma@gwmail.gwu.edu
+
+ The following assumptions were made after reading the grammar and sample data,
+ and speaking after with Dr. Bellaachia regarding clarification:
+
+ - Comments are single line only, prefaced by //, all comments ignored i.e. stripped out
+ - Only one statement allowed per line, except comments succeeding a statement
+ - as corollary, multiple statements present in one line will be split into two lines:
+
+ 	int a; boolean b;
+
+ 	becomes
+
+ 	int a;
+ 	boolean b;
+
+ 	and line numbers will change accordingly
+
+ - C-- is like Pascal in that the opening block contains nothing but declarations,
+   while the second block acts as the programmatic code, in which variable declarations
+   are not allowed
+ - All blank lines are igored, line numbers are based on lines containing symbols
+ - Syntax checking for tokens not residing inside of a block is limited to messages
+   indicating as such, more in-depth syntax checking done within blocks
+ - Statements do not span multiple lines i.e. all lines must terminate with a semicolon ( ; ),
+   unless the line is one of the following special cases:
+   + a comment
+   + an open block ( { )
+   + a close block ( } )
+   + the EOL of an if expression, which ends in ( : ). From what I gather, the syntax of an if
+     statement is:
+
+     	if bool_stmt :
+     	{
+     					// statement block
+     	}
+     	else: 			//optional
+     	{
+     					// optional statement block
+     	}
+     	end if;
+
+   + the EOL of a while expression, which ends in ( do ). From what I gather, the syntax of a
+     while statement is:
+
+        while bool_stmt do
+        {
+    					// statement block
+        }
+        end while;
+ - as a corollary, a semicolon ( ; ) alone on a line in permitted, acts as a no-op and is
+   allowed in both blocks
+ - the first open bracket ( { ) triggers the var declaration block,
+   all subsequent open braces are ignored. the first open brace after the var declaration
+   block triggers the statement block
+ - the first close bracket ( } ) triggers the end of the var declaration block. the
+   final close bracket triggers the end of the statement block. if there is no terminating
+   close bracket, a syntax error occurs
+ - only two blocks exist: var declaration and statement. any blocks outside of these two
+   will be considered syntax errors
+ - sub-blocks can only be defined through if and while statements. a consequence of this is
+   that no sub-blocks can exist within the var declaration block
+ - subsequently, symbols will be undefined when encountered in an invalid statement
+'''
+
+import sys
+
+from .lexer import reserved, isType, isNumber, Literals, storeStatements
+from .tokenstore import TokenStore, CATEGORIES, KINDS, NAME
+from .cursor import TokenCursor
+from .symbols import SymbolTable, TYPE_CODES, UNTYPED
+from .diagnostics import (Diagnostics, DEFINED, NESTING, ARITHMETIC, PERMITTED, UNDEFINED,
+                          REDEFINED, NO_SEMI, ENTER_VAR, ENTER_STMT, LEAVE_VAR, LEAVE_STMT,
+                          BAD_NESTING, NON_ARITHMETIC, NOT_PERMITTED, UNDEFINED_SYMBOL)
+
+"""
+Syntax errors to check for:
+
+- Proper nesting: check
+- Proper characters in symbols: check
+- No logic in var dec block:
+- No var defn in prog block: check
+- Proper if-then-else:
+	+ no parenthesis (according to grammar)?:
+	+ bool statement:
+	+ must have colon and braces:
+	+ "else:" :
+ 	+ end if:
+- second block of code after var declaration:
+- print/read parens: check.5
+
+"""
+
+class FlagTypes:
+
+    def __init__(self):
+        self.inVarDecl = False
+        self.inStmtBlk = False
+        self.doneVarDecl = False
+        self.doneStmtBlk = False
+        self.leavingBlock = False
+        self.newline = False
+        self.symbolToAdd = ""
+        self.rp = False
+        self.isAssign = False
+        self.isIf = False
+        self.isWhile = False
+        self.braceStack=[]
+        self.parenStack=[]
+
+
+def _kind(token):
+    return KINDS.get(reserved.get(token), NAME)
+
+def commentedLine(token):
+    if token == '//':
+        return True
+    return False
+
+class TokenClass:
+
+    def __init__(self,tokens):
+        self.tokens = self._stripComments(tokens)
+        # literal classes from the lexer, when it kept them
+        self.literals = getattr(self.tokens, 'literals', None)
+        if self.literals is None:
+            self.literals = Literals()
+        self.symbols = SymbolTable()
+        # the tokens as one flat array, k the position of next, and the kind
+        # code of every token: 0 for anything not in reserved
+        self.cursor = TokenCursor(self.tokens)
+        self.k = 0
+        self.kinds = self.cursor.table(_kind)
+        # type of the declaration on the current line
+        self.declType = UNTYPED
+        self.i = self.j = -1
+        self.curr = self.next = ""
+        # kind codes of curr and next
+        self.currKind = self.nextKind = NAME
+        self.diag = Diagnostics(style='analyzer')
+        # where the tokens and messages go in an output format, see
+        # cmm.output; they are printed as text without one
+        self.output = None
+        # where the text the tokens came from starts in the source
+        self.base = 0
+        self.flags = FlagTypes()
+        self.firstcomment = False
+        self.nextToken = ""
+        self.prevToken = ""
+        self.syms = []
+        self.isInt = False
+        self.isBool = False
+        self.isFloat = False
+
+
+    def _stripComments(self,tokens):
+        if isinstance(tokens, TokenStore):
+            return tokens.withoutComments(dropEmpty=True)
+        temp1 = []
+        for i in tokens:
+            temp2 = []
+            for j in i:
+                if j != '//':
+                    temp2.append(j)
+                else:
+                    break
+            if len(temp2) != 0:
+                temp1.append(temp2)
+
+        return temp1
+
+    def _findNextToken(self):
+        if self.nextKind:
+            self.nextToken = CATEGORIES[self.nextKind]
+        elif self.nextToken in self.symbols or isType(self.curr):
+            self.nextToken = "var_code"
+        else:
+            self.nextToken = "undefined"
+
+    def Next(self):
+
+        if len(self.tokens) == 0:
+            return False
+        cursor = self.cursor
+        if self.i == -1 and self.j == -1:
+            self.i = self.j = 0
+            self.next = cursor.text(0)
+            self.nextKind = self.kinds[cursor.syms[0]]
+
+        if self.next == "":
+            return False
+
+        self.curr = self.next
+        self.currKind = self.nextKind
+        k = self.k
+        if cursor.gap[k]:
+            self.j = 0
+            self.i += 1
+            self.flags.newline = True
+            self.next = ""
+            self.nextKind = NAME
+        else:
+            k = self.k = k + 1
+            i = cursor.lineOf[k]
+            if i == self.i:
+                self.j += 1
+            else:
+                self.j = 0
+                self.i = i
+                self.flags.newline = True
+            sym = cursor.syms[k]
+            self.next = cursor.names[sym]
+            self.nextKind = self.kinds[sym]
+        self._findNextToken()
+        return True
+
+    def _checkBlock(self):
+        if self.curr not in ['{','}']:
+            return True
+        if self.curr == '{':
+            self.flags.braceStack.append('{')
+            if not self.flags.doneVarDecl:
+                self.flags.doneVarDecl = self.flags.inVarDecl = True
+                self.diag.report(ENTER_VAR)
+                return True
+            elif not self.flags.doneStmtBlk and not self.flags.inVarDecl:
+                self.flags.doneStmtBlk = self.flags.inStmtBlk = True
+                self.diag.report(ENTER_STMT)
+                return True
+        elif self.curr == '}':
+            if self.flags.inVarDecl:
+                self.flags.inVarDecl = False
+                self.flags.leavingBlock = True
+                self.diag.report(LEAVE_VAR)
+                return True
+            elif self.flags.inStmtBlk:
+                self.flags.inStmtBlk = False
+                self.flags.leavingBlock = True
+                self.diag.report(LEAVE_STMT)
+                return True
+        return False
+
+    def _checkSymbol(self):
+        if not self.currKind:
+            if self.curr in self.symbols and not self.diag.seen(DEFINED):
+                self.diag.report(REDEFINED)
+            else:
+                self.syms.append(self.curr)
+        elif isType(self.curr):
+            self.declType = TYPE_CODES[self.curr]
+
+    def _checkPrintRead(self):
+        if self.curr == ')':
+            try:
+                self.flags.parenStack.pop()
+            except IndexError:
+                if not self.diag.seen(NESTING):
+                    self.diag.report(BAD_NESTING)
+        elif self.curr == '(':
+            self.flags.parenStack.append('(')
+        elif self.curr in ['read','print']:
+            self.flags.rp = True
+        elif self.curr != ';':
+            if len(self.flags.parenStack) == 0 and not self.diag.seen(NESTING):
+                self.diag.report(BAD_NESTING)
+
+    def _checkAssign(self):
+        if self.curr == '=':
+            self.flags.isAssign = True
+        elif self.currKind:
+            if self.curr not in ['+','-','*','/','%','(',')',';'] and not self.diag.seen(ARITHMETIC):
+                self.diag.report(NON_ARITHMETIC)
+
+
+    def _varErrors(self):
+        self._checkSymbol()
+        if self.currKind and not isType(self.curr) and (self.i !=0 and self.j != 0):
+            if not self.diag.seen(PERMITTED):
+                self.diag.report(NOT_PERMITTED)
+
+    def _stmtErrors(self):
+        if isType(self.curr) and not self.diag.seen(PERMITTED):
+                self.diag.report(NOT_PERMITTED)
+
+    def checkCurr(self):
+        #first, check block
+        if not self._checkBlock():
+            if not self.diag.seen(PERMITTED):
+                self.diag.report(NOT_PERMITTED)
+        if self.flags.inVarDecl:
+            self._varErrors()
+        elif self.flags.inStmtBlk:
+            self._stmtErrors()
+            if self.curr in ['read', 'print'] or self.flags.rp:
+                self._checkPrintRead()
+            if self.curr == '=' or self.flags.isAssign:
+                self._checkAssign()
+        #elif not isEndBlock:
+        #   if "permitted" not in self.message:
+        #       self.message += "\n- statement not permitted"
+
+    def _printLine(self):
+        if self.curr in ['end_while','end_if']:
+            print('\n'+self.curr[:3]+'\tif_stmt')
+            sys.stdout.write(self.curr[4:]+'\t'+reserved[self.curr[4:]])
+            return
+        sys.stdout.write('\n'+self.curr+'\t'+self._category()+'\t')#+self.nextToken)
+
+    # the token, for an output format rather than as text
+    def _recordLine(self):
+        line = self.i + (0 if self.flags.newline else 1)
+        offset = self._offset()
+        if self.curr in ['end_while','end_if']:
+            self.output.token(line, self.curr[:3], 'if_stmt', offset)
+            if offset is not None:
+                offset += 4
+            self.output.token(line, self.curr[4:], reserved[self.curr[4:]], offset)
+            return
+        self.output.token(line, self.curr, self._category(), offset)
+
+    # where curr starts in the source, None when the lexer did not keep it;
+    # curr is the token before next, which is at i, j
+    def _offset(self):
+        tokens = self.tokens
+        if not isinstance(tokens, TokenStore):
+            return None
+        if self.j:
+            k = tokens.lineStarts[self.i] + self.j - 1
+        else:
+            k = tokens.lineEnds[self.i - 1] - 1
+        return self.base + tokens.offsets[k]
+
+    def _category(self):
+        if self.currKind:
+            return CATEGORIES[self.currKind]
+        elif isNumber(self.literals[self.curr]):
+            return "digit_code"
+        elif (self.curr in self.symbols or self.flags.inVarDecl) \
+                and not (self.flags.inVarDecl and self.j == 1):
+            return "var_code"
+        if not self.diag.seen(UNDEFINED):
+            self.diag.report(UNDEFINED_SYMBOL)
+        return "undefined"
+
+    def _checkAddSymbol(self):
+        type = self.declType
+        self.declType = UNTYPED
+        if len(self.syms) == 0:
+            return
+        #if len(self.syms) > 1 and "many" not in self.message:
+        #   self.message += "\n- too many symbols"
+        #elif self.syms[0] in self.symbols and "already" not in self.message:
+        #   self.message += "\n- symbol already defined"
+        #elif isType(self.syms[0]) or not checkSymbolName(self.syms[0]) \
+        #   and "characters" not in self.message:
+        #   self.message += "\n- symbol contains disallowed characters or reserved words"
+        #elif "permitted" not in self.message:
+        if not self.diag.pending() and len(self.syms) == 1:
+            self.symbols.declare(self.syms[0], type, self.i)
+        del self.syms[:]
+
+    def _checkLastTokenVar(self):
+        if self.curr not in [';','{']:
+            self.diag.report(NO_SEMI)
+
+    def _checkLastTokenStmt(self):
+        if not self.flags.isIf and not self.flags.isWhile:
+            if self.curr not in [';','{']:
+                self.diag.report(NO_SEMI)
+
+    def _stmtBlockLineCheck(self):
+        if self.flags.rp:
+            if len(self.flags.parenStack) > 0 and not self.diag.seen(NESTING):
+                self.diag.report(BAD_NESTING)
+            self.flags.rp = False
+            del self.flags.parenStack[:]
+        if self.flags.isAssign:
+            self.flags.isAssign = False
+
+    def checkLine(self):
+        if self.output is None:
+            self._printLine()
+        else:
+            self._recordLine()
+        if self.flags.newline:
+            if self.flags.inVarDecl:
+                self._checkLastTokenVar()
+                self._checkAddSymbol()
+            elif self.flags.inStmtBlk:
+                self._stmtBlockLineCheck()
+                self._checkLastTokenStmt()
+            elif not self.diag.seen(PERMITTED) and not self.flags.leavingBlock:
+                self.diag.report(NOT_PERMITTED)
+            self.flags.newline = False
+            self.flags.leavingBlock = False
+            if self.output is None:
+                print("\nLine "+repr(self.i)+": "+self.diag.take())
+            else:
+                self.output.extend(self.diag.entries(self.i))
+
+def _argumentParser():
+    import argparse
+    from .stats import addArguments
+    parser = argparse.ArgumentParser(description="C-- lexical analyzer")
+    parser.add_argument("FILE", nargs="*",
+                        help="files to analyze, directories of .cmm files, zip or tar archives "
+                             "of them (gzip, bzip2 and xz compressed ones too), or - for stdin "
+                             "(default: test1.cmm)")
+    parser.add_argument("--format", choices=["text", "tsv", "jsonl", "bin"], default="text",
+                        help="print the tokens and messages as text (default), as tab "
+                             "separated values, as JSON Lines or as a binary token dump "
+                             "(see cmm/tokendump.py)")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write the output to FILE rather than to stdout")
+    addArguments(parser)
+    return parser
+
+# runs the analysis, with the tokens and messages going to tokens.output, or
+# printed when there is none
+def _analyze(tokens):
+    while tokens.Next():
+        tokens.checkCurr()
+        tokens.checkLine()
+
+# the analyzer of a program's text; offsets count from the start of the text
+def _tokens(text):
+    tokens = TokenClass(storeStatements(text.strip().lower()))
+    tokens.base = len(text) - len(text.lstrip())
+    return tokens
+
+# Analyzes every program paths name, one at a time, all output going through
+# one writer or sink. A single file is analyzed as it always was; otherwise
+# the text of every program comes after its name, as in the checker's batch
+# mode, and a program that can not be read or analyzed is reported on stderr
+# while the rest still are, the exit status being 2.
+def _analyzeSources(paths, output, write):
+    import os
+    from .sources import iterSources
+    failed = []
+    def report(name, e):
+        sys.stdout.flush()
+        sys.stderr.write("%s: %s: %s\n" % (name, type(e).__name__, e))
+        failed.append(name)
+    single = len(paths) == 1 and paths[0] != '-' and not os.path.isdir(paths[0])
+    for name, text in iterSources(paths, None if single else report):
+        if output is not None:
+            output.begin(name)
+        elif not single or name != paths[0]:
+            write(name + "\n")
+        tokens = _tokens(text)
+        tokens.output = output
+        if single:
+            _analyze(tokens)
+            continue
+        try:
+            _analyze(tokens)
+        except Exception as e:
+            report(name, e)
+    if output is not None:
+        output.close()
+    return 2 if failed else 0
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    paths = ["test1.cmm"]
+    outputFormat = "text"
+    target = None
+    if argv:
+        parser = _argumentParser()
+        args = parser.parse_args(argv)
+        paths = args.FILE or paths
+        outputFormat = args.format
+        target = args.output
+        from .stats import Stats, analyzeFile, reportForm, run
+        form = reportForm(args)
+        if form or args.profile:
+            if outputFormat != "text" or target is not None:
+                parser.error("--stats and --profile need --format text and no --output")
+            import os
+            if len(paths) != 1 or paths[0] == "-" or os.path.isdir(paths[0]):
+                parser.error("--stats and --profile take a single file")
+            path = paths[0]
+            run(Stats('analyzer', path, form is not None, args.stats_memory),
+                lambda stats: analyzeFile(stats, path), form, args.profile)
+            return
+        if outputFormat == "bin" and target is None and sys.stdout.isatty():
+            parser.error("--format bin needs --output FILE, or stdout redirected")
+    from .output import BufferedWriter, Redirect, ANALYZER_FORMATS
+    if target is not None:
+        stream = open(target, "wb" if outputFormat == "bin" else "w")
+    else:
+        stream = sys.stdout.buffer if outputFormat == "bin" else sys.stdout
+    if outputFormat == "bin":
+        from .tokendump import TokenDump
+        status = _analyzeSources(paths, TokenDump(stream), None)
+    else:
+        out = BufferedWriter(stream)
+        with Redirect(out):
+            output = None
+            if outputFormat != "text":
+                output = ANALYZER_FORMATS[outputFormat](out)
+            status = _analyzeSources(paths, output, out.write)
+    if target is not None:
+        stream.close()
+    if status:
+        sys.exit(status)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+'''
+Batch mode of the checker: many files, directories and globs in one run.
+
+The files are spread over a process pool. Its workers are forked once the
+checker is imported, so they do not pay for starting an interpreter or for
+the imports, and every worker checks many files. The largest files are
+handed out first, so one big file does not end up alone at the end of the
+run. Results come back as the text the checker would have printed, and are
+shown in the order the files were given, followed by a summary.
+
+Exit status: 0 when every program is type error free, 1 when some have type
+errors (or stopped at the error limit), 2 when some could not be checked.
+'''
+
+import io
+import os
+import sys
+import glob
+import contextlib
+
+from .lexer import lexProgram, stripComments
+from .checker import _check
+
+# the files named by paths: files as they are, directories searched for
+# .cmm files, anything else taken as a glob pattern
+def expandPaths(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, name) for name in names if name.endswith('.cmm'))
+            files.extend(sorted(found))
+        elif os.path.exists(path) or not glob.has_magic(path):
+            files.append(path)
+        else:
+            files.extend(sorted(glob.glob(path, recursive=True)))
+    return files
+
+# checks one file, giving back (output, status) with the status as the
+# exit status of checking it on its own. With a ResultCache (see cmm.cache)
+# a program checked before is not lexed again. With structured set, the
+# output is (entries, error) rather than text, for the formats of
+# cmm.output: the (line, code, detail) of the messages, and the error that
+# stopped the check when the status is 2, else None.
+def checkFile(path, engine='legacy', limit=0, cache=None, structured=False):
+    if structured:
+        return _checkEntries(path, engine, limit)
+    out = io.StringIO()
+    try:
+        if cache is not None:
+            key = cache.key(path, engine, limit, False)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit[:2]
+        with open(path, 'r') as f:
+            tokens = lexProgram(f.read().lower())
+        with contextlib.redirect_stdout(out):
+            diag = _check(stripComments(tokens), engine, limit)
+    except Exception as e:
+        return out.getvalue() + "error: %s: %s" % (type(e).__name__, e), 2
+    status = 1 if diag.failed() else 0
+    if cache is not None:
+        cache.put(key, out.getvalue(), status, diag.typeErrors)
+    return out.getvalue(), status
+
+def _checkEntries(path, engine, limit):
+    entries = []
+    try:
+        with open(path, 'r') as f:
+            tokens = lexProgram(f.read().lower())
+        with contextlib.redirect_stdout(io.StringIO()):
+            diag = _check(stripComments(tokens), engine, limit, entries)
+    except Exception as e:
+        return (entries, "%s: %s" % (type(e).__name__, e)), 2
+    return (entries, None), 1 if diag.failed() else 0
+
+def _checkJob(job):
+    return checkFile(*job)
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+# checks every file, giving back their (output, status) in order
+def checkFiles(files, engine='legacy', limit=0, jobs=None, cache=None, structured=False):
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(files))
+    if jobs <= 1:
+        return [checkFile(path, engine, limit, cache, structured) for path in files]
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # workers forked from here already have the checker imported
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    order = sorted(range(len(files)), key=lambda k: _size(files[k]), reverse=True)
+    # enough chunks to keep every worker busy to the end, few enough that
+    # handing them out costs little next to checking the files
+    chunksize = max(1, min(64, len(files) // (jobs * 8)))
+    results = [None] * len(files)
+    with ProcessPoolExecutor(jobs, mp_context=context) as pool:
+        jobs = [(files[k], engine, limit, cache, structured) for k in order]
+        done = pool.map(_checkJob, jobs, chunksize=chunksize)
+        for k, result in zip(order, done):
+            results[k] = result
+    return results
+
+# prints the result of every file and a summary, giving back the exit status;
+# in an output format of cmm.output there is no summary, and no result cache
+def run(paths, engine='legacy', limit=0, jobs=None, cache=None, outputFormat='text'):
+    files = expandPaths(paths)
+    if outputFormat != 'text':
+        return _runFormat(files, engine, limit, jobs, outputFormat)
+    results = checkFiles(files, engine, limit, jobs, cache)
+    counts = [0, 0, 0]
+    write = sys.stdout.write
+    for path, (output, status) in zip(files, results):
+        counts[status] += 1
+        write(path + "\n")
+        if output:
+            write(output if output.endswith("\n") else output + "\n")
+    print("%d files checked: %d type error free, %d with type errors, %d could not be checked"
+          % (len(files), counts[0], counts[1], counts[2]))
+    if counts[2]:
+        return 2
+    return 1 if counts[1] else 0
+
+def _runFormat(files, engine, limit, jobs, outputFormat):
+    from .output import CHECKER_FORMATS
+    sink = CHECKER_FORMATS[outputFormat](sys.stdout)
+    status = 0
+    results = checkFiles(files, engine, limit, jobs, structured=True)
+    for path, ((entries, error), fileStatus) in zip(files, results):
+        sink.begin(path)
+        sink.extend(entries)
+        if error is not None:
+            sink.failure(path, error)
+        status = max(status, fileStatus)
+    sink.close()
+    return status
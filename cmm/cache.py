@@ -0,0 +1,173 @@
+'''
+On-disk cache of check results, so programs that did not change since the
+last run are not lexed or checked again, and of compiled programs (see
+cmm.vm).
+
+An entry holds what the checker printed for a program, its exit status and
+its number of type errors. It is found by a hash of the program's source
+together with a fingerprint of the checker itself (the source of the cmm
+modules) and the options that change the result, so editing the checker
+makes all old entries miss. Entries are files under the cache directory;
+reading one marks it as used, and entries not used for longer than the
+maximum age go first when the cache is pruned, followed by the least
+recently used ones until it fits in its maximum size. Pruning looks at the
+whole directory, so it only happens on about one write in PRUNE_EVERY: the
+ones whose key, a hash, falls in the right bucket.
+'''
+
+import os
+import hashlib
+
+PRUNE_EVERY = 64
+
+_fingerprint = None
+
+# a hash of the source of the cmm modules
+def fingerprint():
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        package = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package)):
+            if name.endswith('.py'):
+                digest.update(name.encode('utf-8'))
+                with open(os.path.join(package, name), 'rb') as f:
+                    digest.update(f.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+# $CMM_CACHE_DIR when set, else cmm under the user's cache directory
+def defaultDirectory():
+    directory = os.environ.get('CMM_CACHE_DIR')
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'cmm')
+
+class ResultCache:
+
+    # maxSize in bytes, maxAge in seconds
+    def __init__(self, directory, maxSize=256 << 20, maxAge=30 * 86400):
+        self.directory = directory
+        self.maxSize = maxSize
+        self.maxAge = maxAge
+
+    def _digest(self, options):
+        digest = hashlib.sha256(fingerprint().encode('ascii'))
+        digest.update(repr(options).encode('utf-8'))
+        return digest
+
+    # the key of the file at path checked with options, read in chunks so
+    # that the file is never held in memory as a whole
+    def key(self, path, *options):
+        digest = self._digest(options)
+        with open(path, 'rb') as f:
+            chunk = f.read(1 << 16)
+            while chunk:
+                digest.update(chunk)
+                chunk = f.read(1 << 16)
+        return digest.hexdigest()
+
+    # the key of a program's source text with options
+    def sourceKey(self, text, *options):
+        digest = self._digest(options)
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    # the bytes stored under key, None on a miss
+    def getData(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    # (output, status, typeErrors) stored under key, None on a miss
+    def get(self, key):
+        data = self.getData(key)
+        if data is None:
+            return None
+        header, _, output = data.partition(b'\n')
+        try:
+            status, typeErrors = map(int, header.split())
+        except ValueError:
+            return None
+        return output.decode('utf-8'), status, typeErrors
+
+    def put(self, key, output, status, typeErrors):
+        self.putData(key, b'%d %d\n' % (status, typeErrors) + output.encode('utf-8'))
+
+    def putData(self, key, data):
+        path = self._path(key)
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, 'wb') as f:
+                f.write(data)
+            # readers never see a partly written entry
+            os.replace(temp, path)
+        except OSError:
+            return
+        if int(key[:8], 16) % PRUNE_EVERY == 0:
+            self.prune()
+
+    # drops entries older than the maximum age, then the least recently used
+    # ones until the cache fits in its maximum size
+    def prune(self, now=None):
+        import time
+        if now is None:
+            now = time.time()
+        entries = []
+        total = 0
+        for root, dirs, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.maxAge:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.maxSize:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+# the options choosing the cache, for the tools' argument parsers; what
+# says what the cache is used for
+def addArguments(parser, what):
+    group = parser.add_argument_group("result cache")
+    group.add_argument("--cache", action="store_true",
+                       help=what + ", from $CMM_CACHE_DIR or ~/.cache/cmm (on when "
+                                   "$CMM_CACHE_DIR is set)")
+    group.add_argument("--cache-dir", metavar="DIR", help="the cache directory, implies --cache")
+    group.add_argument("--cache-size", type=int, default=256, metavar="MB",
+                       help="size the cache is pruned to (default: 256)")
+    group.add_argument("--cache-age", type=int, default=30, metavar="DAYS",
+                       help="entries unused for longer are pruned (default: 30)")
+
+# the ResultCache the options of addArguments ask for, None without one
+def fromArguments(args):
+    directory = args.cache_dir
+    if directory is None and (args.cache or os.environ.get('CMM_CACHE_DIR')):
+        directory = defaultDirectory()
+    if not directory:
+        return None
+    return ResultCache(directory, args.cache_size << 20, args.cache_age * 86400)
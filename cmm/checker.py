@@ -0,0 +1,903 @@
+'''
+Basil Huffman
+ bahuffma@gwmail.gwu.edu
+
+ Changes to grammar:
+
+ 1. In the given grammar, the following is given:
+
+    read_expr --> "(" expr ")" ";"
+
+    This makes no sense, as the following statement is allowed:
+
+    read_expr(1.2+4);
+
+    Hence, I am changing the grammar to:
+
+    read_expr --> "(" var ")" ";"
+
+    Since this is a simple language, it will only allow one statement
+    (or, in the case of loops and conditionals, one sub-statement) per
+    line. e.g. 'if X: {' must be split, the '{' must occupy a line to itself,
+    the same goes for 'while X do {' statements, where 'while X do' is on
+    one line, '{' is on the next.
+
+    So, in practice, this language is a hybrid of Pascal (var
+    declaration block occurring before the pprogrammatic block), C
+    (syntax and typing), and Python.
+
+ 2. strings (e.g. "a", 'a', "1.1", '1.1') within assignment statements (i.e. a = "1.1")
+    are treated as both a type and a symbol
+
+ 3. only assignments are allowed for booleans
+
+ 4. Comments are preceded by '//' and may only occur at the beginning of a line
+
+ 5. for logic statements, a symbol not in the symbol table will generate an "incompatible
+    types" type error as well as a "symbol not in table" error
+
+ 6. boolean assignments can only take the form of <bool> = (0|1), as the grammar disallows
+    anything else. a better option would be to modify the grammar such that <bool> = <bool_stmt>,
+    but there isn't enough time to add this rule and implement it
+
+ Caveats:
+
+ 1. If there are any syntax/semantic errors e.g. no semicolon, improper variable name, the variable
+    is *NOT* added to the symbol table
+
+ 2. Although semantic errors are sorta checked for in certain cases, due to time restrictions *** AS
+    WELL AS A LACK OF RESPONSE VIS A VIS CLARIFICATION IN THIS REGARD FROM DR BELLAACHIA***, it is
+    assumed that there will be **NO SYNTAX ERRORS*** and this will purely focus on type checking.
+    At a later date, full syntax checking will be implemented (mainly in if and while)
+
+'''
+
+import sys
+
+from .lexer import (reserved, isType, checkSymbolName, lexProgram, iterTokens,
+                    stripComments, iterStripComments, Literals, classify, DIGITS, NUMERIC,
+                    QUOTED, BINARY)
+from .cursor import TokenCursor
+from .symbols import SymbolTable, INT, FLOAT, BOOLEAN as BOOL
+from .diagnostics import (Diagnostics, ErrorLimit, SYMBOL, INCOMPATIBLE, BOOLEAN,
+                          ASSIGNMENT, SYMBOL_NOT_IN_TABLE, NOT_IN_TABLE, ASSIGN_NOT_IN_TABLE,
+                          INCOMPATIBLE_TYPES, READ_LOGIC, NOT_BOOLEAN, BOOL_ARITHMETIC,
+                          REDEFINITION, DECL_ASSIGN)
+
+types={0:"var_code_int", 1:"var_code_float", 2:"var_code_boolean"}
+
+def is_bool(n,tbl,literals=None):
+    literal = literals[n] if literals is not None else classify(n)
+    if literal & BINARY:
+        return True
+    if tbl.typeOf(n) == BOOL:
+        return True
+    return False
+
+# literals are the literal classes of the program's tokens (see cmm.lexer)
+def check(n,tbl,literals=None):
+        literal = literals[n] if literals is not None else classify(n)
+        type = tbl.typeOf(n)
+        if literal & DIGITS or type == INT:
+            return 'int'
+        elif literal & NUMERIC:
+            return 'float'
+        else:
+            if type is None:
+                return 'string'
+            return types[type]
+
+def returnType(type):
+    if type == "int":
+        return 0
+    elif type == "float":
+        return 1
+    return 2
+
+class Flags:
+
+    def __init__(self):
+        self.inVarBlock = False
+        self.inProgBlock = False
+        self.doneVarBlock = False
+        self.doneProgBlock = False
+        self.int = False
+        self.bool = False
+        self.float = False
+        self.string = False
+        self.undef = True
+
+    def resetType(self):
+        self.int = False
+        self.float = False
+        self.bool = False
+        self.string = False
+
+    def checkTypes(self,token):
+        if self.string:
+            return False
+        if self.int and not self.float and not self.bool:
+            return True
+        if self.float and not self.int and not self.bool:
+            return True
+        if self.bool and not self.int and not self.float:
+            return True
+        if not self.bool and not self.int and not self.float:
+            return True
+        if not self.float and self.int and self.bool and token in ['0','1']:
+            return True
+        return False
+
+# whether tok could have been declared as a symbol
+def _symbolic(tok):
+    return tok not in reserved and checkSymbolName(tok)
+
+class TypeChecker:
+
+    # with a sink, messages go to it rather than being printed, see Diagnostics
+    def __init__(self, tokens, limit=0, sink=None):
+        self.prog = tokens
+        self.token = ""
+        self.flags = Flags()
+        self.braceStack=[]
+        self.parenStack=[]
+        # the if, else and while statements whose blocks are being checked
+        self.blocks=[]
+        self.symbols=SymbolTable()
+        self.i = self.j = 0
+        self.width = len(str(len(self.prog)))
+        self.diag = Diagnostics(self.width, limit=limit, sink=sink)
+        stream = isinstance(tokens, LineWindow)
+        # literal classes from the lexer, when it kept them; a stream's are
+        # worked out every time, as a memo of them would grow with the input
+        self.literals = getattr(tokens, 'literals', None)
+        if self.literals is None and not stream:
+            self.literals = Literals()
+        # the tokens as one flat array, k the position of the current one
+        self.cursor = TokenCursor(tokens, stream=stream)
+        self.k = 0
+        # the code of every token that is not a declared symbol, and whether
+        # it could be one
+        self.codes = self.cursor.table(self._tokenCode)
+        self.symbolic = self.cursor.table(_symbolic)
+        self.conditions = {}
+        self.val = ''
+
+    # checks braces to determine which block you're in
+    def _checkBrace(self):
+        if self.token not in ['{','}']:
+            return
+
+        if self.token == '{':
+            self.braceStack.append(self.token)
+            if len(self.braceStack) == 1:
+                if not self.flags.doneVarBlock:
+                    #sys.stdout.write(" in var ")
+                    self.flags.inVarBlock = True
+                    self.flags.doneVarBlock = True
+                elif not self.flags.doneProgBlock:
+                    #sys.stdout.write(" in prog ")
+                    self.flags.inProgBlock = True
+                    self.flags.doneProgBlock = True
+        else:
+            if len(self.braceStack) == 0:
+                return
+            self.braceStack.pop()
+            if len(self.braceStack) == 0:
+                if self.flags.inVarBlock:
+                    #sys.stdout.write(" leave var ")
+                    self.flags.inVarBlock = False
+                elif self.flags.inProgBlock:
+                    self.flags.inProgBlock = False
+                    #sys.stdout.write(" leave prog ")
+
+    def _getNextToken(self):
+        cursor = self.cursor
+        if cursor.gap[self.k]:
+            return ""
+        return cursor.names[cursor.syms[self.k + 1]]
+
+    def _getNextTokenCode(self):
+        cursor = self.cursor
+        sym = cursor.empty if cursor.gap[self.k] else cursor.syms[self.k + 1]
+        if self.symbolic[sym]:
+            tok = cursor.names[sym]
+            if tok in self.symbols:
+                # a declared symbol stands for itself
+                return tok
+        return self.codes[sym]
+
+    # what _getNextTokenCode gives for tok when it is not a declared symbol
+    def _tokenCode(self, tok):
+        if tok in reserved:
+            return reserved[tok]
+        literal = self.literals[tok] if self.literals is not None else classify(tok)
+        if literal & DIGITS:
+            return "int"
+        elif literal & NUMERIC:
+            return "float"
+        elif literal & QUOTED:
+            return "string"
+        return "UNDEF"
+
+    # moves on to the next token; empty lines have none, so they are gone over
+    def _increment(self):
+        cursor = self.cursor
+        k = self.k + 1
+        if k >= cursor.ready:
+            k = cursor.load(k)
+        self.k = k
+        i = cursor.lineOf[k]
+        if i == self.i:
+            self.j += 1
+        else:
+            self.i = i
+            self.j = 0
+        self.token = cursor.names[cursor.syms[k]]
+
+    # bool_stmt --> and_stmt | rel_stmt | boolean
+    def _bool_stmt(self):
+        if is_bool(self.token,self.symbols,self.literals):
+            self._increment()
+            return
+
+    def _check_and_stmts(self):
+        line = self.prog[self.i]
+        prev = 1
+        stmts=[]
+        temp=[]
+        for i in range(1,len(line)):
+            tok = line[i]
+            if tok in ['and','or',':'] or i == (len(line)-1):
+                stmts.append(temp)
+                temp = []
+                continue
+            temp.append(line[i])
+        i=1
+        return stmts
+
+    def _check_rel_stmts(self,and_stmt):
+        stmts = []
+        temp = []
+        for i in range(len(and_stmt)):
+            tok = and_stmt[i]
+            if tok not in ['>','<','==','>=','!=','(',')']:
+                temp.append(and_stmt[i])
+            if tok in ['>','<','==','>=','!='] or i == (len(and_stmt)-1):
+                stmts.append(temp)
+                temp=[]
+                continue
+        return stmts
+
+    def _checkSide(self,side):
+        j=1
+        float=0
+        int = 0
+        bool = 0
+        bool_ = 0
+        if isinstance(side,str):
+            type = check(side,self.symbols,self.literals)
+            if type == 'int':
+                int = 1
+            elif type == 'float':
+                float = 1
+            if type == 'int' and side in ['0','1']:
+                bool_ = 1
+        else:
+            for i in side:
+                type = check(i,self.symbols,self.literals)
+                if type == 'string' and i not in ['+','-','*','/','%'] \
+                and not self.diag.seen(SYMBOL):
+                    self.diag.report(SYMBOL_NOT_IN_TABLE)
+                    float = int = bool_ = 1
+                    # error if not arithmetic
+                    continue
+                if type in ['int','var_code_int']:
+                    int = 1
+                elif type in ['float','var_code_float']:
+                    float = 1
+                if type == 'var_code_boolean':
+                    bool_ = 1
+            if (int + float + bool_) > 1 and not self.diag.seen(INCOMPATIBLE):
+                self.diag.report(INCOMPATIBLE_TYPES)
+
+        return float,int,bool_
+
+    # The checks of the condition of an if or while. They only depend on the
+    # tokens of the line and on the symbol table, so the messages of a
+    # condition are remembered and replayed when the same line comes up again
+    # with the same symbols.
+    def _condition(self):
+        key = None
+        if not self.diag.pending():
+            key = (tuple(self.prog[self.i]), self.symbols.version)
+            codes = self.conditions.get(key)
+            if codes is not None:
+                for code in codes:
+                    self.diag.report(code)
+                return
+        self._checkCondition()
+        if key is not None:
+            if len(self.conditions) >= 4096:
+                self.conditions.clear()
+            self.conditions[key] = self.diag.reported()
+
+    def _checkCondition(self):
+        and_stmts = self._check_and_stmts()
+
+        for i in and_stmts:
+            rel_stmt = self._check_rel_stmts(i)
+            l = len(rel_stmt)
+            if l == 1:# and not is_bool(rel_stmt[0],self.symbols):
+                if not isinstance(rel_stmt[0],str):
+                    temp = check(rel_stmt[0][0],self.symbols,self.literals)
+                else:
+                    temp = check(rel_stmt[0],self.symbols,self.literals)
+                if temp == 'int' and i[0] not in ['0','1'] \
+                or temp in ['float','string'] \
+                and not self.diag.seen(BOOLEAN):
+                    self.diag.report(NOT_BOOLEAN)
+            else:
+                rhs = rel_stmt[1]
+                lhs = rel_stmt[0]
+                floatr,intr,boolr = self._checkSide(rhs)
+                r = floatr+intr
+                floatl,intl,booll = self._checkSide(lhs)
+                l=floatl+intl
+                if self.diag.seen(BOOLEAN) and self.diag.seen(SYMBOL) and \
+                   self.diag.seen(INCOMPATIBLE):
+                    break
+                ll = len(lhs)
+                lr = len(rhs)
+                if len(lhs) == len(rhs) and len(lhs) == 1:
+                    if is_bool(lhs[0],self.symbols,self.literals) and rhs[0] not in ['0','1'] or \
+                       is_bool(rhs[0],self.symbols,self.literals) and lhs[0] not in ['0','1'] and \
+                        not self.diag.seen(INCOMPATIBLE):
+                        if check(lhs[0],self.symbols,self.literals) == 'int' and check(rhs[0],self.symbols,self.literals) == 'int':
+                            break
+                        self.diag.report(INCOMPATIBLE_TYPES)
+                if (floatr == 1 and floatl != 1) or (intr == 1 and intl != 1) \
+                        or (boolr == 1 and booll == 1) and not self.diag.seen(BOOLEAN):
+                    self.diag.report(NOT_BOOLEAN)
+                    continue
+
+    # similar to _if_stat but delimiters are while ... do ... end while
+    def _while_stmt(self):
+        if not self.flags.inProgBlock:
+            no=1 #self.errors += "non-type error: statement only allowed in program block"
+
+        self._condition()
+
+        self._skipToEndOfLine()
+        self.diag.emit(self.i+1)
+        if self.token != 'do':
+            no=1 #self.errors += " non-type error: mising EOL token."
+        self._increment()
+        self.blocks.append('while')
+        self._openBlock()
+
+    # checks the condition; the block is checked by _program, which comes
+    # back to _closeBlock at its '}'
+    def _if_stmt(self):
+        if not self.flags.inProgBlock:
+            no=1#self.errors += "non-type error: statement only allowed in program block"
+
+        self._condition()
+
+        self._skipToEndOfLine()
+        self.diag.emit(self.i+1)
+        if self.token != ':':
+            no=1 #self.errors += " non-type error: mising EOL token."
+        self._increment()
+        self.blocks.append('if')
+        self._openBlock()
+
+    # the rest of the statement whose block ended at the current '}': the
+    # else block of an if, or the end of the statement, in which case it
+    # gives back True
+    def _closeBlock(self):
+        if self.blocks.pop() == 'if' and self._getNextToken() == 'else':
+            self._increment()
+            self._skipToEndOfLine()
+            self._increment()
+            self.blocks.append('else')
+            self._openBlock()
+            return False
+        # end_if or end_while
+        self._increment()
+        return True
+
+    def _write_stat(self):
+        self.flags.resetType()
+        if not self.flags.inProgBlock:
+            no=1#self.errors += "non-type error: statement only allowed in program block"
+        self._expr()
+        if not self.flags.checkTypes(self.token):
+            self.diag.report(INCOMPATIBLE_TYPES)
+        self.flags.resetType()
+
+
+    # read --> "(" var ")"
+    # var --> [A-Za-z]+
+    def _read_stat(self):
+        #sys.stdout.write("read_stat")
+        if '==' in self.prog[self.i] or '!=' in self.prog[self.i] or '>' in self.prog[self.i] \
+            or '<' in self.prog[self.i] or \
+            '+' in self.prog[self.i] or '-' in self.prog[self.i] or \
+            '*' in self.prog[self.i] or '%' in self.prog[self.i] or '/' in self.prog[self.i]:
+            self.diag.report(READ_LOGIC)
+        next = self._getNextTokenCode()
+        if next != "open_paren":
+            no=1#self.errors += " non-type error: missing '('."
+        else:
+            self._increment()
+        next = self._getNextToken()
+        if next not in self.symbols and next != ';':
+            self.diag.report(NOT_IN_TABLE)
+        temp = self.prog[self.i]
+        l = len(temp)
+        prev = self.token
+        while self.token != ')' and self.j < (l-2):
+            if next == ')' and prev == '(':
+                no=1#self.errors += ' non-type error: missing variable. '
+                self._increment()
+                break
+            self._increment()
+            if self.token in ['=','-','+','*','/','%'] and not self.diag.seen(ASSIGNMENT):
+                no=1#self.errors += " non-type error: assignment/arithmetic not allowed. "
+            elif self.token in ['>','<','>=','!=','==']:
+                no=1#self.errors += " non-type error: relational statements not allowed."
+            elif not self.diag.seen(SYMBOL) and \
+                    self.token not in self.symbols and self.token != ')':
+                self.diag.report(NOT_IN_TABLE)
+
+        if self.token != ';' and self.token != ')':
+            no=1#self.errors += " non-type error: missing ')'"
+        if not self.flags.inProgBlock:
+            no=1#self.errors += " non-type error: statement only allowed in program block"
+
+    # var_dec --> type var
+    def _var_dec(self):
+        #sys.stdout.write("var_dec")
+        type = returnType(self.token)
+        next = self._getNextToken()
+        if next not in self.symbols and next not in reserved and checkSymbolName(next) \
+                and self.flags.inVarBlock:
+            self.symbols.declare(next, type, self.i+1)
+        else:
+            if next in self.symbols:
+                self.diag.report(REDEFINITION)
+            else:
+                no=1#self.errors += " non-type error: disallowed variable name."
+        l = len(self.prog[self.i])
+        while (self.j < (l-2)):
+            self._increment()
+            next = self._getNextTokenCode()
+            if (next == "assign_op"):
+                self.diag.report(DECL_ASSIGN)
+        if not self.flags.inVarBlock:
+            no=1#self.errors += " non-type error: variable declarations only allowed" + \
+            #               " in var declarations block"
+
+    def _checkType(self):
+        type = self.symbols.typeOf(self.token)
+        if type is not None:
+            toktype = check(self.token,self.symbols,self.literals)
+            if type == INT or toktype == "int":
+                self.flags.int = True
+            elif type == FLOAT or toktype == "float":
+                self.flags.float = True
+            elif type == BOOL:
+                self.flags.bool = True
+            return
+        next = self._getNextToken()
+        type = self.symbols.typeOf(next)
+        if type is not None:
+            toktype = check(next,self.symbols,self.literals)
+            if toktype == "string" and next not in ["'",'"'] \
+                    and self.token not in self.symbols:
+                self.flags.string = True
+            elif type == INT or toktype == "int":
+                self.flags.int = True
+            elif type == FLOAT or toktype == "float":
+                self.flags.float = True
+            elif type == BOOL:
+                self.flags.bool = True
+    # assign -> var "=" expr
+    def _assign(self):
+        self.flags.resetType()
+        #sys.stdout.write("assign")
+        type = ""
+        l = len(self.prog[self.i])
+
+        if self.token not in self.symbols:
+            self.diag.report(ASSIGN_NOT_IN_TABLE)
+
+        self._checkType()
+
+        next = self._getNextTokenCode()
+        if self.flags.bool and "+" in self.prog[self.i] or '-' in self.prog[self.i] \
+           or '*' in self.prog[self.i] or '/' in self.prog[self.i] or '%' in self.prog[self.i]:
+            self.diag.report(BOOL_ARITHMETIC)
+
+        if next != "assign_op":
+            #self.errors += " non-type error: assignment statement missing '='"
+            if not self.flags.inProgBlock:
+            #    self.errors += "non-type error: statement only allowed in program block"
+                no=1
+            return
+        if self.j >= (l-2):
+            no=1#self.errors += " non-type error: missing rvalue"
+        else:
+            self._increment()
+            self._expr()
+        self.val = self.token
+        self._skipToEndOfLine()
+
+        if not self.flags.checkTypes(self.val):
+            self.diag.report(INCOMPATIBLE_TYPES)
+        self.flags.resetType()
+        if not self.flags.inProgBlock:
+            no=1#self.errors += "non-type error: statement only allowed in program block"
+        self.val = ''
+
+    def _openBlock(self):
+        if self.token == "{":
+            self._checkBrace()
+            #print(repr(self.i+1).zfill(self.width)+" open_paren")
+            self._increment()
+
+    # checks a block up to its '}'. The blocks of if and while statements
+    # are checked in the same loop, with the statements they belong to on
+    # self.blocks, so nesting is only limited by memory.
+    def _program(self):
+        self._openBlock()
+        while(True):
+            if self.token == "}":
+                self._checkBrace()
+                #print("close_paren")
+                if not self.blocks:
+                    break
+                if not self._closeBlock():
+                    continue
+            elif self.token == "if":
+                self._if_stmt()
+                continue
+            elif self.token == "while":
+                self._while_stmt()
+                continue
+            elif self.token == "print":
+                self._write_stat()
+            elif self.token == "read":
+                self._read_stat()
+            elif isType(self.token):
+                self._var_dec()
+            elif self.token not in [' ',"end_while","end_if"] and self.token != "COM":
+                self._assign()
+            elif self.token != "COM":
+                print("Unknown statement: "+repr(self.prog[self.i]))
+            self._skipToEndOfLine()
+            self.diag.emit(self.i+1)
+            self._increment()
+
+    def _skipToEndOfLine(self):
+        l = len(self.prog[self.i]) - 1
+        toktype = check(self.token,self.symbols,self.literals)
+        while self.j < l:
+            if isType(self.token):
+                self._checkType()
+            elif toktype == "float":
+                self.flags.float = True
+            elif toktype == "int":#self.token.isdigit():
+                self.flags.int = True
+            self._increment()
+        if self.token not in [';','COM']:
+            no=1#self.errors += " non-type error: missing EOL token."
+
+    # expr --> add_expr
+    # add_expr --> mul_expr {("+"|"-" mul_expr}
+    # mul_expr --> simple_expr {("\"|"%"|"*") simple_expr}
+    # simple_expr --> id | var | "(" expr ")"
+    #
+    # Checked in one loop over the simple_exprs rather than by recursion:
+    # parens holds, for each "(" being checked, whether the add_expr it is
+    # part of was still in its first mul_expr, so parentheses can be nested
+    # as deep as memory allows.
+    def _expr(self):
+        parens = []
+        first = True
+        while True:
+            # simple_expr
+            next = self._getNextTokenCode()
+            if next in ["int","float","string"]:
+                if next == "int":
+                    self.flags.int = True
+                elif next == "string":
+                    self.flags.string = True
+                else:
+                    self.flags.float = True
+            elif next == "open_paren":
+                self.parenStack.append(1)
+                self._increment()
+                parens.append(first)
+                first = True
+                continue
+            elif self._getNextToken() in self.symbols:
+                self._checkType()
+            if next not in ["add_op","multiply_op",'semicolon','','UNDEF']:
+                self._increment()
+            # the rest of the expressions ending with the simple_expr
+            while True:
+                next = self._getNextTokenCode()
+                if next == "multiply_op":
+                    break
+                if first:
+                    if next == "UNDEF" and not self.diag.seen(SYMBOL):
+                        self.diag.report(NOT_IN_TABLE)
+                    first = False
+                if next == "add_op":
+                    break
+                if not parens:
+                    return
+                # within "(": another expr up to the ")"
+                if next != "close_paren":
+                    if next == 'semicolon' and len(self.parenStack)>0:
+                        no=1#self.errors += " non-type error: missing ')'"
+                        self.parenStack[:]=[]
+                        first = parens.pop()
+                        continue
+                    first = True
+                    break
+                self.parenStack.pop()
+                first = parens.pop()
+                self._increment()
+            self._increment()
+
+    def begin(self):
+        cursor = self.cursor
+        self.k = cursor.load(0)
+        self.i = cursor.lineOf[self.k]
+        if self.i >= cursor.count:
+            raise IndexError("no tokens in the program")
+        self.token = cursor.text(self.k)
+        while(self.token != '{'):
+            self._increment()
+        self._program()
+        while (self.token != '{'):
+            self._increment()
+        self._program()
+
+
+    def end(self):
+        if self.diag.typeErrors == 0:
+            sys.stdout.write("Your program is type error free")
+#        else:
+#            sys.stdout.write("Your program contains "+repr(self.flags.errors)+" type error(s)")
+
+# counts the lines generateTokens would return for the file, reading it in
+# chunks so it is never held in memory as a whole
+def countLines(f, size=1 << 16):
+    count = 1
+    chunk = f.read(size)
+    while chunk:
+        count += chunk.count('\n')
+        chunk = f.read(size)
+    return count
+
+# A read-only, forward-only view of the token lines coming out of a
+# generator. It can be indexed like the list generateTokens returns, but
+# only holds the line last read and the one before it, so memory does not
+# grow with the program. Lines already read are plain dict hits; only a miss
+# pulls more lines from the generator.
+class LineWindow(dict):
+
+    def __init__(self, lines, count):
+        dict.__init__(self)
+        self.lines = iter(lines)
+        self.count = count
+        self.first = 0
+        self.last = -1
+
+    def __len__(self):
+        return self.count
+
+    def __missing__(self, i):
+        if i <= self.last:
+            raise IndexError("line %d is no longer available" % i)
+        while self.last < i:
+            try:
+                self[self.last + 1] = next(self.lines)
+            except StopIteration:
+                raise IndexError("line index out of range")
+            self.last += 1
+        # the checker only ever looks one line back
+        while self.first < i - 1:
+            del self[self.first]
+            self.first += 1
+        return self[i]
+
+def _argumentParser():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("FILE", nargs="+",
+                        help="The file to analyze; with several files, directories or "
+                             "globs, all of them are checked in a process pool")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true",
+                      help="check the file as it is read instead of loading it first")
+    mode.add_argument("--mmap", action="store_true",
+                      help="lex the memory mapped file with numpy (needs numpy)")
+    parser.add_argument("--engine", choices=["legacy", "tree"], default="legacy",
+                        help="check with the original token walking checker (default), "
+                             "or parse the program into a syntax tree and check that")
+    parser.add_argument("--max-errors", type=int, default=0, metavar="N",
+                        help="stop the check after N messages")
+    parser.add_argument("--first-error", dest="max_errors", action="store_const", const=1,
+                        help="stop at the first message, the same as --max-errors 1")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N",
+                        help="worker processes for several files (default: one per core)")
+    parser.add_argument("--format", choices=["text", "jsonl", "sarif"], default="text",
+                        help="print the messages as text (default), as JSON Lines or as a "
+                             "SARIF log; the result cache is only used for text")
+    from .stats import addArguments
+    addArguments(parser)
+    from . import cache
+    cache.addArguments(parser, "reuse the results of programs checked before")
+    return parser
+
+# the ResultCache asked for, None without one; without options it is only
+# there when $CMM_CACHE_DIR is set
+def _resultCache(args=None):
+    if args is None:
+        import os
+        directory = os.environ.get('CMM_CACHE_DIR')
+        if not directory:
+            return None
+        from .cache import ResultCache
+        return ResultCache(directory)
+    from .cache import fromArguments
+    return fromArguments(args)
+
+# whether path names more than the one file: a directory or a glob
+def _isBatch(path):
+    import os
+    if os.path.isdir(path):
+        return True
+    return not os.path.exists(path) and any(c in path for c in '*?[')
+
+# checks the token lines, giving back the Diagnostics
+def _check(lines, engine, limit, sink=None):
+    if engine == 'tree':
+        from .typecheck import checkTree
+        return checkTree(lines, limit, sink)
+    checker = TypeChecker(lines, limit, sink)
+    try:
+        checker.begin()
+    except ErrorLimit:
+        return checker.diag
+    checker.end()
+    return checker.diag
+
+# the exit status is 1 when the program has type errors, or when the check
+# stopped at the error limit; see cmm.batch for several files. Everything
+# printed goes through one buffered writer, see cmm.output.
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    from .output import BufferedWriter, Redirect
+    with Redirect(BufferedWriter(sys.stdout)):
+        _main(argv)
+
+def _main(argv):
+    # a lone file name, by far the most common call, does not need argparse
+    if len(argv) == 1 and not argv[0].startswith('-') and not _isBatch(argv[0]):
+        path, stream, mmap, engine, limit = argv[0], False, False, 'legacy', 0
+        cache = _resultCache()
+    else:
+        parser = _argumentParser()
+        args = parser.parse_args(argv)
+        stream, mmap, engine = args.stream, args.mmap, args.engine
+        limit = args.max_errors
+        if limit < 0:
+            parser.error("--max-errors can not be negative")
+        if args.jobs is not None and args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        cache = _resultCache(args)
+        from .stats import Stats, checkFile, reportForm, run
+        form = reportForm(args)
+        if (form or args.profile) and args.format != "text":
+            parser.error("--stats and --profile need --format text")
+        if len(args.FILE) > 1 or _isBatch(args.FILE[0]):
+            if stream or mmap:
+                parser.error("--stream and --mmap check a single file")
+            if form or args.profile:
+                parser.error("--stats and --profile check a single file")
+            from .batch import run as runBatch
+            sys.exit(runBatch(args.FILE, engine, limit, args.jobs, cache, args.format))
+        path = args.FILE[0]
+        if args.format != "text":
+            sys.exit(_formatPath(path, stream, mmap, engine, limit, args.format))
+        if form or args.profile:
+            if stream:
+                parser.error("--stats and --profile can not be used with --stream")
+            # the result cache is left out, it would leave nothing to measure
+            try:
+                diag = run(Stats('checker', path, form is not None, args.stats_memory),
+                           lambda stats: checkFile(stats, path, engine, limit, mmap),
+                           form, args.profile)
+            except ImportError:
+                if not mmap:
+                    raise
+                parser.error("--mmap needs numpy")
+            if diag.failed():
+                sys.exit(1)
+            return
+    if cache is None:
+        status = 1 if _checkPath(path, stream, mmap, engine, limit).failed() else 0
+    else:
+        status = _cachedCheckPath(cache, path, stream, mmap, engine, limit)
+    print()
+    if status:
+        sys.exit(status)
+
+# checks the file at path, giving back the Diagnostics
+def _checkPath(path, stream, mmap, engine, limit, sink=None):
+    if stream:
+        with open(path, 'r') as f:
+            numLines = countLines(f)
+            f.seek(0)
+            diag = _check(LineWindow(iterStripComments(iterTokens(f)), numLines), engine, limit,
+                          sink)
+    else:
+        if mmap:
+            from .mmaplexer import mapTokens
+            try:
+                tokens = mapTokens(path)
+            except ImportError:
+                _argumentParser().error("--mmap needs numpy")
+        else:
+            tokens = lexProgram(open(path,'r').read().lower())
+        diag = _check(stripComments(tokens), engine, limit, sink)
+    return diag
+
+# checks the file at path, printing its messages in an output format of
+# cmm.output; gives back the exit status, 2 when the file could not be checked
+def _formatPath(path, stream, mmap, engine, limit, outputFormat):
+    from .output import CHECKER_FORMATS, Discard, Redirect
+    sink = CHECKER_FORMATS[outputFormat](sys.stdout)
+    sink.begin(path)
+    try:
+        # the lines the checker prints itself are not messages
+        with Redirect(Discard()):
+            diag = _checkPath(path, stream, mmap, engine, limit, sink)
+        status = 1 if diag.failed() else 0
+    except Exception as e:
+        sink.failure(path, "%s: %s" % (type(e).__name__, e))
+        status = 2
+    sink.close()
+    return status
+
+# _checkPath going through the result cache, giving back the exit status: a
+# program checked before is not even lexed, its output is printed from the
+# cache
+def _cachedCheckPath(cache, path, stream, mmap, engine, limit):
+    import io
+    import contextlib
+    key = cache.key(path, engine, limit, mmap)
+    hit = cache.get(key)
+    if hit is not None:
+        output, status, typeErrors = hit
+        sys.stdout.write(output)
+        return status
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            diag = _checkPath(path, stream, mmap, engine, limit)
+    finally:
+        sys.stdout.write(out.getvalue())
+    status = 1 if diag.failed() else 0
+    cache.put(key, out.getvalue(), status, diag.typeErrors)
+    return status
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+'''
+Thin client of the checker daemon (cmm.daemon), a drop-in for
+
+    ./static-type-checker.py FILE
+
+in scripts: cmm-check-client (or python3 -m cmm.client) [--engine E]
+[--max-errors N] FILE. It imports next to nothing, not even json or the
+socket module: the daemon does the checking with everything already
+loaded. The output and exit status are those of the checker. Calls it does
+not handle (other options, several files) and calls made while no daemon is
+running are passed on to the checker itself.
+'''
+
+import os
+import sys
+
+try:
+    from _socket import socket, AF_UNIX, SOCK_STREAM
+except ImportError:
+    from socket import socket, AF_UNIX, SOCK_STREAM
+
+# where the daemon listens unless told otherwise
+def socketPath():
+    path = os.environ.get('CMM_SOCKET')
+    if path:
+        return path
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'), 'cmm-%d.sock' % os.getuid())
+
+_escapes = {'"': '\\"', '\\': '\\\\'}
+
+# message, a dict of strings and ints, as JSON
+def encode(message):
+    items = []
+    for name, value in message.items():
+        if isinstance(value, str):
+            value = '"%s"' % ''.join([_escapes.get(c) or (c if ' ' <= c else '\\u%04x' % ord(c))
+                                      for c in value])
+        items.append('"%s": %s' % (name, value))
+    return '{%s}' % ', '.join(items)
+
+# sends one request to the daemon and gives back its reply as (status,
+# error, output), None when no daemon is listening
+def request(message, path=None):
+    client = socket(AF_UNIX, SOCK_STREAM)
+    try:
+        client.connect(path or socketPath())
+    except OSError:
+        client.close()
+        return None
+    try:
+        client.sendall(encode(message).encode('utf-8') + b'\n')
+        chunks = []
+        chunk = client.recv(1 << 16)
+        while chunk:
+            chunks.append(chunk)
+            chunk = client.recv(1 << 16)
+    finally:
+        client.close()
+    status, error, output = b''.join(chunks).decode('utf-8').split('\n', 2)
+    return int(status), error, output
+
+# the request for argv, None for calls the daemon does not take
+def _parseArguments(argv):
+    message = {'engine': 'legacy', 'limit': 0}
+    files = []
+    argv = list(argv)
+    while argv:
+        arg = argv.pop(0)
+        name, eq, value = arg.partition('=')
+        if name in ('--engine', '--max-errors'):
+            if not eq:
+                if not argv:
+                    return None
+                value = argv.pop(0)
+            if name == '--engine':
+                message['engine'] = value
+            elif value.isdigit():
+                message['limit'] = int(value)
+            else:
+                return None
+        elif arg == '--first-error':
+            message['limit'] = 1
+        elif arg.startswith('-'):
+            return None
+        else:
+            files.append(arg)
+    if len(files) != 1 or message['engine'] not in ('legacy', 'tree') \
+            or not os.path.isfile(files[0]):
+        return None
+    message['path'] = os.path.abspath(files[0])
+    return message
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    message = _parseArguments(argv)
+    reply = message and request(message)
+    if reply is None:
+        from .checker import main as check
+        check(argv)
+        return
+    status, error, output = reply
+    sys.stdout.write(output)
+    if error:
+        sys.stderr.write(error + '\n')
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
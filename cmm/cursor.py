@@ -0,0 +1,165 @@
+'''
+Flat cursor over the tokens of a program, the innermost loop of both tools.
+
+The token lines are flattened into lists with one entry per token: the id
+of its interned text, its line, and a flag set when the token after it is
+out of sight, because an empty line or the end of the program comes first.
+Moving on and looking ahead are then plain index arithmetic. Whatever the
+tools work out from the text of a token, like its kind, is worked out once
+per distinct text with table() and looked up by id.
+
+A forward-only LineWindow is flattened as the cursor gets to its lines, and
+the tokens behind are dropped every so often. Once the interned texts pile
+up past a bound they are dropped along with them, all but those of the
+tokens still in sight, so the memory a streaming cursor takes stays the
+same however long the input and however many distinct tokens it has.
+'''
+
+from itertools import chain, repeat
+from operator import sub
+
+# tokens a streaming cursor lets pile up behind it before dropping them
+TRIM = 1 << 12
+# interned texts a streaming cursor keeps before dropping those out of sight
+INTERNED = 1 << 14
+
+class TokenCursor:
+
+    def __init__(self, lines, stream=False):
+        self.lines = lines
+        self.count = len(lines)
+        self.stream = stream
+        # interned texts; a TokenStore's are copied so its own stay as they are
+        self.names = list(getattr(lines, 'names', ()))
+        self.ids = dict(getattr(lines, 'ids', ()))
+        # tables made by table() and the functions filling them
+        self.tables = []
+        # token columns
+        self.syms = []
+        self.lineOf = []
+        self.gap = bytearray()
+        # lines flattened so far, and the tokens whose gap is known
+        self.loaded = 0
+        self.ready = 0
+        # stands for the token after one whose gap is set
+        self.empty = self.intern('')
+        if stream:
+            return
+        if hasattr(lines, 'lineStarts'):
+            self._loadStore()
+        else:
+            self._load(self.count)
+
+    def intern(self, text):
+        sym = self.ids.get(text)
+        if sym is None:
+            sym = self.ids[text] = len(self.names)
+            self.names.append(text)
+            for table, function in self.tables:
+                table.append(function(text))
+        return sym
+
+    # function of the text of every token, as a list indexed by id
+    def table(self, function):
+        table = [function(text) for text in self.names]
+        self.tables.append((table, function))
+        return table
+
+    def text(self, k):
+        return self.names[self.syms[k]]
+
+    # the token after k, '' when it is out of sight
+    def lookahead(self, k):
+        if self.gap[k]:
+            return ''
+        return self.names[self.syms[k + 1]]
+
+    # Flattens the lines up to last. The last token of a line is taken to
+    # have nothing in sight after it until a line with tokens comes next.
+    def _load(self, last):
+        lines = self.lines
+        syms = self.syms
+        lineOf = self.lineOf
+        gap = self.gap
+        ids = self.ids
+        for i in range(self.loaded, last):
+            line = lines[i]
+            if not line:
+                continue
+            if gap and lineOf[-1] == i - 1:
+                gap[-1] = 0
+            for text in line:
+                sym = ids.get(text)
+                if sym is None:
+                    sym = self.intern(text)
+                syms.append(sym)
+            lineOf.extend(repeat(i, len(line)))
+            gap.extend(bytes(len(line) - 1))
+            gap.append(1)
+        self.loaded = last
+        self._settle()
+
+    # The columns of a TokenStore, taken a line at a time in C: its lines
+    # may have had comments cut off, so its syms are not used as they are.
+    def _loadStore(self):
+        store = self.lines
+        starts = store.lineStarts
+        ends = store.lineEnds
+        sizes = list(map(sub, ends, starts))
+        self.syms = list(chain.from_iterable(
+            map(store.syms.__getitem__, map(slice, starts, ends))))
+        self.lineOf = list(chain.from_iterable(map(repeat, range(self.count), sizes)))
+        # a gap after the last token of every line not followed by one with tokens
+        gap = self.gap = bytearray(len(self.syms))
+        k = -1
+        for size, after in zip(sizes, chain(sizes[1:], (0,))):
+            k += size
+            if size and not after:
+                gap[k] = 1
+        self.loaded = self.count
+        self._settle()
+
+    # works out how far the gaps are known, closing the columns with an END
+    # token on the line past the last once all lines are in
+    def _settle(self):
+        if self.loaded >= self.count:
+            self.syms.append(self.intern('END'))
+            self.lineOf.append(self.count)
+            self.gap.append(1)
+            self.ready = len(self.syms)
+        elif self.lineOf and self.lineOf[-1] + 1 < self.loaded:
+            self.ready = len(self.syms)
+        else:
+            self.ready = len(self.syms) - 1
+
+    # Interns again only the texts of the tokens left, renumbering them. The
+    # tables are changed in place, as their users hold on to them.
+    def _compact(self):
+        keep = sorted(set(self.syms).union((self.empty,)))
+        renumber = dict(zip(keep, range(len(keep))))
+        self.names = [self.names[sym] for sym in keep]
+        self.ids = dict(zip(self.names, range(len(keep))))
+        self.syms = [renumber[sym] for sym in self.syms]
+        self.empty = renumber[self.empty]
+        for table, function in self.tables:
+            table[:] = [table[sym] for sym in keep]
+
+    # Makes k a token whose gap is known, flattening more lines if need be,
+    # and gives back where that token is now: a streaming cursor drops the
+    # tokens before k - 1 once enough of them piled up. Past the END token
+    # it raises IndexError, like indexing the lines past their end.
+    def load(self, k):
+        if k >= len(self.syms) and self.loaded >= self.count:
+            raise IndexError("token index out of range")
+        if self.stream and k > TRIM:
+            drop = k - 1
+            del self.syms[:drop]
+            del self.lineOf[:drop]
+            del self.gap[:drop]
+            self.ready -= drop
+            k -= drop
+            if len(self.names) > INTERNED:
+                self._compact()
+        while k >= self.ready and self.loaded < self.count:
+            self._load(self.loaded + 1)
+        return k
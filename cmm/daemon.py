@@ -0,0 +1,188 @@
+'''
+Checker daemon: a long-lived process that has the lexer and checker
+imported, and its regexes compiled, and checks programs sent to it over a
+Unix domain socket.
+
+    python3 -m cmm.daemon [--socket PATH] [--cache-size MB]
+
+A request is one line of JSON, with the program as "path" (read by the
+daemon) or as "source", and optionally "engine" and "limit" as for the
+checker. The reply is the checker's exit status on a line, the error on the
+next one (empty unless the check failed), and then the checker's output up
+to the end of the connection, so that clients need no JSON parser.
+cmm.client is the matching command line client.
+
+Recent token streams and results are kept in an LRU cache keyed by a hash
+of the source, up to a memory cap, so a program that did not change is not
+lexed or checked again.
+'''
+
+import io
+import os
+import sys
+import json
+import socket
+import signal
+import hashlib
+import contextlib
+import socketserver
+from collections import OrderedDict
+
+from .lexer import lexProgram, stripComments, _regex
+from .checker import _check
+from .client import socketPath
+
+# a least recently used cache holding up to limit bytes, by the sizes given
+# for its entries
+class LRUCache:
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        # key -> (value, size)
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.limit:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self.entries[key] = (value, size)
+        self.size += size
+        while self.size > self.limit:
+            _, (_, dropped) = self.entries.popitem(last=False)
+            self.size -= dropped
+
+# about what the token lines of a source take up: a pointer and a small
+# string object per token
+def _tokenSize(source):
+    return 200 + len(source) * 16
+
+class Checker:
+
+    def __init__(self, cacheSize=64 << 20):
+        self.cache = LRUCache(cacheSize)
+        # compiled now rather than on the first large program
+        _regex('checker')
+        _regex('checker', True)
+
+    # the reply to a request
+    def handle(self, message):
+        engine = message.get('engine', 'legacy')
+        limit = message.get('limit', 0)
+        try:
+            if 'source' in message:
+                source = message['source']
+            else:
+                with open(message['path'], 'r') as f:
+                    source = f.read()
+        except (OSError, KeyError) as e:
+            return {'output': '', 'status': 1, 'error': '%s: %s' % (type(e).__name__, e)}
+        return self.check(source, engine, limit)
+
+    def check(self, source, engine='legacy', limit=0):
+        digest = hashlib.sha256(source.encode('utf-8', 'surrogatepass')).hexdigest()
+        key = (digest, engine, limit)
+        reply = self.cache.get(key)
+        if reply is not None:
+            return reply
+        lines = self.cache.get(digest)
+        if lines is None:
+            lines = stripComments(lexProgram(source.lower()))
+            self.cache.put(digest, lines, _tokenSize(source))
+        out = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(out):
+                diag = _check(lines, engine, limit)
+                print()
+            reply = {'output': out.getvalue(), 'status': 1 if diag.failed() else 0}
+        except Exception as e:
+            reply = {'output': out.getvalue(), 'status': 1,
+                     'error': '%s: %s' % (type(e).__name__, e)}
+        self.cache.put(key, reply, 200 + len(reply['output']))
+        return reply
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # closed without a request, as by a daemon checking for this one
+            return
+        try:
+            message = json.loads(line.decode('utf-8'))
+        except ValueError:
+            reply = {'output': '', 'status': 2, 'error': 'invalid request'}
+        else:
+            reply = self.server.checker.handle(message)
+        error = reply.get('error', '').replace('\n', ' ')
+        self.wfile.write(('%d\n%s\n%s' % (reply['status'], error, reply['output'])).encode('utf-8'))
+
+# another daemon answering on the socket a daemon was to listen on
+class AlreadyRunning(Exception):
+
+    def __init__(self, path):
+        Exception.__init__(self, "a daemon is already running on %s" % path)
+        self.path = path
+
+# whether anything accepts connections on the socket at path
+def _listening(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    finally:
+        client.close()
+    return True
+
+class Daemon(socketserver.UnixStreamServer):
+
+    # raises AlreadyRunning when a daemon still listens on path
+    def __init__(self, path, cacheSize=64 << 20):
+        if os.path.exists(path):
+            if _listening(path):
+                raise AlreadyRunning(path)
+            # left behind by a daemon that did not shut down cleanly
+            os.unlink(path)
+        socketserver.UnixStreamServer.__init__(self, path, _Handler)
+        self.path = path
+        self.checker = Checker(cacheSize)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="C-- checker daemon")
+    parser.add_argument("--socket", default=socketPath(),
+                        help="the socket to listen on (default: $CMM_SOCKET or "
+                             "$TMPDIR/cmm-UID.sock)")
+    parser.add_argument("--cache-size", type=int, default=64, metavar="MB",
+                        help="memory for cached token streams and results (default: 64)")
+    args = parser.parse_args(argv)
+    # a plain kill also removes the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        daemon = Daemon(args.socket, args.cache_size << 20)
+    except AlreadyRunning as e:
+        sys.stderr.write("cmm-checkd: %s\n" % e)
+        sys.exit(1)
+    with daemon:
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+'''
+Diagnostics: the messages of the checkers and of the lexical analyzer, by
+number.
+
+Every message has a code, its index in MESSAGES. The entries of the codes
+table in cmm.lexer come first, in table order, followed by the messages
+below. A message also has a kind, which is shown in front of it by the
+checkers and decides whether it counts as a type error, and the families
+it belongs to.
+
+A Diagnostics collects the messages of the line being checked as a bitset
+of their codes, so a message is only reported once per line, and as a
+bitset of their families, so "was anything said about the symbol table on
+this line" is a bit test. The text is only put together when the line is
+emitted.
+'''
+
+from .lexer import codes
+
+TYPE_ERROR = 'type error'
+NON_TYPE = 'non-type error'
+ERROR = 'error'
+
+#   Families
+SYMBOL = 1 << 0         # a symbol missing from the symbol table
+INCOMPATIBLE = 1 << 1   # incompatible types
+BOOLEAN = 1 << 2        # not a boolean where one is needed
+ASSIGNMENT = 1 << 3     # assignment where it is not allowed
+DEFINED = 1 << 4        # a symbol defined twice, or not at all
+NESTING = 1 << 5        # parentheses that do not match
+ARITHMETIC = 1 << 6     # the analyzer's non arithmetic tokens
+PERMITTED = 1 << 7      # statements out of place
+UNDEFINED = 1 << 8      # the analyzer's undefined symbols
+
+# (name, kind, text, families), text may hold a %s for a detail
+MESSAGES = []
+CODE = {}
+
+def _message(name, kind, text, families=0):
+    CODE[name] = code = len(MESSAGES)
+    MESSAGES.append((name, kind, text, families))
+    return code
+
+for _name in codes:
+    _message(_name, NON_TYPE, codes[_name].rstrip('. '))
+del _name
+
+UNRECOGNIZED = CODE['undefined']
+WRONG_BLOCK = CODE['wrong_block']
+NO_SYMBOL = CODE['no_symbol']
+NO_SEMI = CODE['no_semi']
+INVALID = CODE['invalid']
+REDEFINED = CODE['redefined']
+MESSAGES[REDEFINED] = MESSAGES[REDEFINED][:3] + (DEFINED,)
+
+#   Type checker
+SYMBOL_NOT_IN_TABLE = _message('symbol_not_in_table', TYPE_ERROR,
+                               "symbol not in symbol table", SYMBOL)
+NOT_IN_TABLE = _message('not_in_table', TYPE_ERROR,
+                        "contains variable not in symbol table", SYMBOL)
+ASSIGN_NOT_IN_TABLE = _message('assign_not_in_table', ERROR,
+                               "contains variable not in symbol table", SYMBOL)
+INCOMPATIBLE_TYPES = _message('incompatible', TYPE_ERROR, "incompatible types", INCOMPATIBLE)
+READ_LOGIC = _message('read_logic', TYPE_ERROR,
+                      "incompatible types, logic or arithmetic not allowed in read", INCOMPATIBLE)
+NOT_BOOLEAN = _message('not_boolean', TYPE_ERROR, "expression must evaluate to boolean", BOOLEAN)
+BOOL_ARITHMETIC = _message('bool_arithmetic', TYPE_ERROR,
+                           "boolean assignments cannot contain arithmetic", ASSIGNMENT)
+REDEFINITION = _message('redefinition', TYPE_ERROR, "variable redifinition")
+DECL_ASSIGN = _message('decl_assign', NON_TYPE,
+                       "assignment not allowed in declarations", ASSIGNMENT)
+
+#   Parser
+UNEXPECTED = _message('unexpected', NON_TYPE, "unexpected '%s'")
+MISSING = _message('missing', NON_TYPE, "missing '%s'")
+NO_EXPRESSION = _message('no_expression', NON_TYPE, "missing expression")
+OPEN_IF = _message('open_if', NON_TYPE, "non-terminated IF statement")
+OPEN_WHILE = _message('open_while', NON_TYPE, "non-terminated WHILE statement")
+
+#   Lexical analyzer
+ENTER_VAR = _message('enter_var', NON_TYPE, "entering variable declaration block")
+ENTER_STMT = _message('enter_stmt', NON_TYPE, "enter statement block")
+LEAVE_VAR = _message('leave_var', NON_TYPE, "leaving variable declaration block")
+LEAVE_STMT = _message('leave_stmt', NON_TYPE, "leaving statement block")
+BAD_NESTING = _message('bad_nesting', NON_TYPE, "improper parenthesis nesting", NESTING)
+NON_ARITHMETIC = _message('non_arithmetic', NON_TYPE,
+                          "statement contains non arithmetic tokens", ARITHMETIC)
+NOT_PERMITTED = _message('not_permitted', NON_TYPE, "statement not permitted", PERMITTED)
+UNDEFINED_SYMBOL = _message('undefined_symbol', NON_TYPE, "undefined symbol", UNDEFINED | DEFINED)
+
+def message(code, detail=None):
+    text = MESSAGES[code][2]
+    if detail is not None:
+        text = text % detail
+    return text
+
+# raised by Diagnostics.emit once the limit is reached
+class ErrorLimit(Exception):
+    pass
+
+class Diagnostics:
+
+    # style 'checker' shows a message as " kind: text.", 'analyzer' as
+    # "\n- text". With a limit, emit stops the check after that many
+    # messages. With a sink, a list, emit appends (line, code, detail) of
+    # every message to it rather than printing.
+    def __init__(self, width=0, style='checker', limit=0, sink=None):
+        self.width = width
+        self.checker = style == 'checker'
+        self.limit = limit
+        self.sink = sink
+        # the current line: codes in order, details, and the two bitsets
+        self.codes = []
+        self.details = {}
+        self.bits = 0
+        self.families = 0
+        self.emitted = 0
+        self.typeErrors = 0
+        self.stopped = False
+
+    def report(self, code, detail=None):
+        bit = 1 << code
+        if self.bits & bit:
+            return
+        self.bits |= bit
+        self.codes.append(code)
+        if detail is not None:
+            self.details[code] = detail
+        entry = MESSAGES[code]
+        self.families |= entry[3]
+        if entry[1] == TYPE_ERROR:
+            self.typeErrors += 1
+
+    def seen(self, families):
+        return self.families & families
+
+    def pending(self):
+        return bool(self.codes)
+
+    # the codes reported for the current line so far
+    def reported(self):
+        return tuple(self.codes)
+
+    # the codes of the current line's messages within the limit, and their
+    # details; starts a new line
+    def _take(self):
+        codes = self.codes
+        if self.limit and self.emitted + len(codes) > self.limit:
+            codes = codes[:self.limit - self.emitted]
+        self.emitted += len(codes)
+        details = self.details
+        self.codes = []
+        self.details = {}
+        self.bits = self.families = 0
+        return codes, details
+
+    # the text of the current line's messages; starts a new line
+    def take(self):
+        codes, details = self._take()
+        if self.checker:
+            text = ''.join([" %s: %s." % (MESSAGES[code][1], message(code, details.get(code)))
+                            for code in codes])
+        else:
+            text = ''.join(["\n- " + message(code, details.get(code)) for code in codes])
+        return text
+
+    # the current line's messages as (line, code, detail); starts a new line
+    def entries(self, line):
+        codes, details = self._take()
+        return [(line, code, details.get(code)) for code in codes]
+
+    # prints the current line's messages, if any, under line number line
+    def emit(self, line):
+        if not self.codes:
+            return
+        if self.sink is not None:
+            self.sink.extend(self.entries(line))
+        else:
+            print(repr(line).zfill(self.width) + self.take())
+        if self.limit and self.emitted >= self.limit:
+            self.stopped = True
+            raise ErrorLimit()
+
+    def failed(self):
+        return self.stopped or self.typeErrors > 0
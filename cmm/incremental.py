@@ -0,0 +1,338 @@
+'''
+Incremental checking for editors: after an edit only the edited lines are
+lexed again, and only the statements they touch are parsed and checked
+again, with the tree engine (cmm.parser and cmm.typecheck).
+
+The two blocks of the program are kept as entries, one for every statement
+in them: where it starts, its node, its syntax errors and its messages. An
+edit inside a block is parsed again from the last statement starting before
+the edited lines, until the parser comes to the start of an old statement
+after them. From there on the input is the same as before, and so is the
+rest of the parse, so the old entries are kept. The new statements are
+checked against the symbol table. When the var block changes, the symbols
+are declared again, and of the other statements only those using a symbol
+whose type changed are checked again.
+
+Entries that an edit moves up or down keep how far they moved rather than
+having the lines in their nodes rewritten; program() puts those right.
+Edits to anything but the inside of the two blocks, or ones that change
+where a block ends, check the whole program again.
+
+    checker = IncrementalChecker(text)
+    checker.edit(start, end, lines)     # lines start to end (0 based, end
+                                        # excluded) replaced with lines
+    checker.update(newText)             # or: the new text, diffed by line
+    checker.messages()                  # (line, code, detail), see
+                                        # cmm.diagnostics
+'''
+
+from .lexer import generateTokens, stripComments
+from .parser import Parser
+from .syntax import Program, Block, Assign, Name, Bad, walk
+from .typecheck import TreeChecker, report
+from .diagnostics import MISSING, WRONG_BLOCK
+
+# a statement at the top level or inside one of the blocks
+class _Entry:
+    __slots__ = ('node', 'line', 'j', 'moved', 'errors', 'messages', 'names')
+
+    def __init__(self, node, line, j, errors):
+        self.node = node
+        # where it starts: line (0 based) and token
+        self.line = line
+        self.j = j
+        # lines it moved since it was parsed
+        self.moved = 0
+        self.errors = errors
+        self.messages = ()
+        # the symbols it uses, for statements of the statement block
+        self.names = ()
+
+# a block at the top level
+class _Block:
+    __slots__ = ('line', 'start', 'close', 'moved', 'entries', 'errors', 'messages')
+
+    def __init__(self, line, start):
+        # line of the '{', where its first statement may start and where the
+        # '}' is (None without one)
+        self.line = line
+        self.start = start
+        self.close = None
+        self.moved = 0
+        self.entries = []
+        self.errors = ()
+        self.messages = ()
+
+def _lex(lines):
+    if not lines:
+        return []
+    return stripComments(generateTokens('\n'.join(lines).lower()))
+
+# index of the first entry starting on line or after it
+def _find(entries, line):
+    lo, hi = 0, len(entries)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if entries[mid].line < line:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def _names(node):
+    names = set()
+    for n in walk(node):
+        kind = type(n)
+        if kind is Name:
+            names.add(n.id)
+        elif kind is Assign:
+            names.add(n.name)
+    return names
+
+def _moveMessages(messages, moved):
+    return [(line + moved, code, detail) for line, code, detail in messages]
+
+class IncrementalChecker:
+
+    def __init__(self, text=''):
+        self.load(text)
+
+    # checks text from scratch
+    def load(self, text):
+        self.source = text.split('\n')
+        self.lines = _lex(self.source)
+        self._parse()
+        self._check()
+
+    # replaces lines start to end (0 based, end excluded) of the source with
+    # lines, and checks the program again
+    def edit(self, start, end, lines):
+        moved = len(lines) - (end - start)
+        self.source[start:end] = lines
+        self.lines[start:end] = _lex(lines)
+        block = None
+        for candidate in self.blocks:
+            if candidate.close and candidate.line < start and end <= candidate.close[0]:
+                block = candidate
+        fresh = block and self._reparse(block, start, end, moved)
+        if fresh is None:
+            self._parse()
+            self._check()
+            return
+        if moved:
+            for unit in self.units[self.units.index(block) + 1:]:
+                self._move(unit, moved)
+        if block is self.blocks[0]:
+            self._declare()
+        else:
+            for entry in fresh:
+                self._checkEntry(entry)
+
+    # checks text, the new version of the program: only the lines between
+    # the ones it has in common with the last version at both ends count
+    # as edited
+    def update(self, text):
+        lines = text.split('\n')
+        source = self.source
+        common = min(len(source), len(lines))
+        start = 0
+        while start < common and source[start] == lines[start]:
+            start += 1
+        end = 0
+        while end < common - start and source[-1 - end] == lines[-1 - end]:
+            end += 1
+        self.edit(start, len(source) - end, lines[start:len(lines) - end])
+
+    # (line, code, detail) of every message, in line order
+    def messages(self):
+        errors = []
+        messages = []
+        for unit in self.units:
+            if type(unit) is _Block:
+                for entry in unit.entries:
+                    if entry.errors:
+                        errors.extend(_moveMessages(entry.errors, entry.moved))
+                    if entry.messages:
+                        messages.extend(_moveMessages(entry.messages, entry.moved))
+            if unit.errors:
+                errors.extend(_moveMessages(unit.errors, unit.moved))
+            if unit.messages:
+                messages.extend(_moveMessages(unit.messages, unit.moved))
+        # syntax errors first, as TreeChecker.check has them
+        errors.extend(messages)
+        errors.sort(key=lambda message: message[0])
+        return errors
+
+    # prints the messages, giving back the Diagnostics they went through
+    def report(self, limit=0):
+        return report(self.messages(), len(self.lines), limit)
+
+    # the syntax tree of the program, the same parse() gives
+    def program(self):
+        body = []
+        errors = []
+        for unit in self.units:
+            self._settle(unit)
+            if type(unit) is _Block:
+                for entry in unit.entries:
+                    self._settle(entry)
+                    errors.extend(entry.errors)
+                end = unit.close[0] + 1 if unit.close else None
+                body.append(Block(unit.line + 1, [entry.node for entry in unit.entries], end))
+            else:
+                body.append(unit.node)
+            errors.extend(unit.errors)
+        return Program(1, body, errors)
+
+    #   Parsing
+
+    def _parse(self):
+        parser = Parser(self.lines)
+        self.units = []
+        tok = parser.nextStatement()
+        while tok:
+            if tok == '{':
+                self.units.append(self._block(parser))
+            else:
+                self.units.append(self._entry(parser))
+            tok = parser.nextStatement()
+        # the var block and the statement block
+        self.blocks = [unit for unit in self.units if type(unit) is _Block][:2]
+
+    # the same as Parser._block, with an entry for every statement
+    def _block(self, parser):
+        line = parser.i
+        parser.advance()
+        block = _Block(line, parser.position())
+        tok = parser.nextStatement()
+        while tok and tok != '}':
+            block.entries.append(self._entry(parser))
+            tok = parser.nextStatement()
+        if tok == '}':
+            block.close = parser.position()
+            parser.advance()
+        else:
+            block.errors = [(line + 1, MISSING, '}')]
+        return block
+
+    def _entry(self, parser):
+        i, j = parser.position()
+        errors = parser.errors
+        before = len(errors)
+        node = parser.statement()
+        entry = _Entry(node, i, j, errors[before:])
+        del errors[before:]
+        return entry
+
+    # parses block again around lines start to end, which the edit replaced
+    # with lines moved lines more. Gives back the new entries, None when the
+    # edit changed where the block ends.
+    def _reparse(self, block, start, end, moved):
+        entries = block.entries
+        # the last statement starting before the edit may run into it, or
+        # end on the first token of the one after it
+        first = _find(entries, start)
+        if first:
+            first -= 1
+            parser = Parser(self.lines)
+            parser.seek(entries[first].line, entries[first].j)
+        else:
+            parser = Parser(self.lines)
+            parser.seek(*block.start)
+        # old statements after the edit, by their lines before it
+        after = _find(entries, end)
+        newEnd = end + moved
+        fresh = []
+        tok = parser.nextStatement()
+        while True:
+            i, j = parser.position()
+            if i >= newEnd:
+                old = (i - moved, j)
+                while after < len(entries) and (entries[after].line, entries[after].j) < old:
+                    after += 1
+                if after < len(entries) and (entries[after].line, entries[after].j) == old:
+                    break
+                if old == block.close and tok == '}':
+                    break
+                if old > block.close:
+                    return None
+            if not tok or tok == '}':
+                return None
+            fresh.append(self._entry(parser))
+            tok = parser.nextStatement()
+        for entry in entries[first:after]:
+            for name in entry.names:
+                self.uses[name].discard(entry)
+        if moved:
+            for k in range(after, len(entries)):
+                entry = entries[k]
+                entry.line += moved
+                entry.moved += moved
+            block.close = (block.close[0] + moved, block.close[1])
+        entries[first:after] = fresh
+        return fresh
+
+    def _move(self, unit, moved):
+        unit.line += moved
+        unit.moved += moved
+        if type(unit) is _Block:
+            unit.start = (unit.start[0] + moved, unit.start[1])
+            if unit.close:
+                unit.close = (unit.close[0] + moved, unit.close[1])
+            for entry in unit.entries:
+                entry.line += moved
+                entry.moved += moved
+
+    # rewrites the lines of a unit that moved
+    def _settle(self, unit):
+        moved = unit.moved
+        if not moved:
+            return
+        if type(unit) is _Entry:
+            for node in walk(unit.node):
+                node.line += moved
+                if type(node) is Block and node.end is not None:
+                    node.end += moved
+        unit.errors = _moveMessages(unit.errors, moved)
+        unit.messages = _moveMessages(unit.messages, moved)
+        unit.moved = 0
+
+    #   Checking
+
+    def _check(self):
+        self.uses = {}
+        self.checker = None
+        self._declare()
+        for unit in self.units:
+            if type(unit) is _Block:
+                if unit in self.blocks[1:]:
+                    for entry in unit.entries:
+                        self._checkEntry(entry)
+                elif unit not in self.blocks:
+                    unit.messages = [(unit.line + 1, WRONG_BLOCK, None)]
+            elif type(unit.node) is not Bad:
+                unit.messages = [(unit.node.line, WRONG_BLOCK, None)]
+
+    # checks the var block, and the statements using symbols it changed
+    def _declare(self):
+        old = self.checker
+        self.checker = checker = TreeChecker()
+        if self.blocks:
+            for entry in self.blocks[0].entries:
+                entry.messages = checker.checkStatement(entry.node, True)
+        if old is None:
+            return
+        new = checker.symbols
+        changed = set()
+        for name in set(old.symbols) | set(new):
+            if old.symbols.typeOf(name) != new.typeOf(name):
+                changed.update(self.uses.get(name, ()))
+        for entry in changed:
+            entry.messages = checker.checkStatement(entry.node)
+
+    # checks a statement of the statement block
+    def _checkEntry(self, entry):
+        entry.messages = self.checker.checkStatement(entry.node)
+        entry.names = _names(entry.node)
+        for name in entry.names:
+            self.uses.setdefault(name, set()).add(entry)
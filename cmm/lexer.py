@@ -0,0 +1,345 @@
+'''
+Lexer and tables shared by the type checker and the lexical analyzer.
+
+There are two dialects. The type checker lexes every source line into one
+line of tokens, and a ';' stays attached to a symbol right after it. The
+lexical analyzer also ends a line after every ';', '{' and '}'. Both glue
+'end while' and 'end if' into single tokens.
+
+Small sources are lexed in plain Python into plain lists, so a run of the
+checker on a small file imports neither re nor the token store; the master
+patterns are only compiled for larger ones.
+'''
+
+import sys
+
+#   Constants: reserved words table and messages
+reserved = {'int':'type','boolean':'type','float':'type',
+        'if':'if_stmt','while':'while_stmt','do':'while_stmt','else':'if_stmt',
+        'end':'if_stmt', ':':'if_stmt','=':'assign_op',
+        '*':'multiply_op', '/':'multiply_op','%':'multiply_op',
+        '+':'add_op','-':'add_op', ';':'semicolon',
+        'read':'read_stat', 'print':'write_stat','and':'and_stmt',
+        'or':'or_stmt','>':'rel_stmt','<':'rel_stmt','>=':'rel_stmt','!=':'rel_stmt',
+        '==':'rel_stmt','(':'open_paren',')':'close_paren',
+        '{':'open_brace', '}':'close_brace', '//':'comment',';':'semicolon'}
+codes={"undefined":"unrecognized symbol. ",
+       "wrong_block":"statement not permitted in block. ",
+       "begin_var":"beginning of var declaration block. ",
+       "end_var": "end of var declaration block. ",
+       "begin_stmt":"beginning of statement block. ",
+       "end_stmt":"end of statement block. ",
+       "no_symbol":"no valid variable symbol given. ",
+       "no_semi":"missing semicolon. ",
+       "invalid":"invalid symbol. ",
+       "redefined":"symbol already defined. "}
+vblock=["int","float","//","boolean",";","}"]
+
+def isOpen(token):
+    if token == '(' or token == '{':
+        return True
+    return False
+
+def isClose(token):
+    if token == ')' or token == '}':
+        return True;
+    return False;
+
+def matchingTokens(token1, token2):
+    if token1 == '(' and token2 == ')':
+        return True
+    if token1 == '{' and token2 == '}':
+        return True
+    return False
+
+def isType(token):
+    if token in ['int','float','boolean']:
+        return True
+    return False
+
+def isComment(token):
+    if token == "//":
+        return True
+    return False
+
+# only letters, and whatever else sits between 'A' and 'z'
+def checkSymbolName(symbol):
+    for c in symbol:
+        if not 'A' <= c <= 'z':
+            return False
+    return True
+
+def is_float(n):
+    literal = classify(n)
+    # "nan" floats do not count
+    return bool(literal & NUMERIC) and not literal & NAN
+
+#   Literal classes of a token, as bits. These are what the tools used to
+#   find out with str.isdigit() and float() in a try block; the lexers work
+#   them out once for every distinct token instead.
+DIGITS = 1      # str.isdigit()
+NUMERIC = 2     # float() takes it
+NAN = 4         # float() makes it a nan
+QUOTED = 8      # has a quote in it, a string
+BINARY = 16     # 0 or 1, which also pass for booleans
+
+# digits, possibly unicode ones, with single underscores between them
+def _decimal(part):
+    if not part or part[0] == '_' or part[-1] == '_' or '__' in part:
+        return False
+    return part.replace('_', '').isdecimal()
+
+# whether float(text) would go through, without calling it
+def _numeric(text):
+    text = text.strip()
+    if text[:1] == '+' or text[:1] == '-':
+        text = text[1:]
+    if text.isascii() and text.lower() in ('inf', 'infinity', 'nan'):
+        return True
+    mantissa, e, exponent = text.replace('E', 'e').partition('e')
+    if e:
+        if exponent[:1] == '+' or exponent[:1] == '-':
+            exponent = exponent[1:]
+        if not _decimal(exponent):
+            return False
+    whole, dot, fraction = mantissa.partition('.')
+    if not dot:
+        return _decimal(whole)
+    return (whole or fraction) != '' and (not whole or _decimal(whole)) and \
+        (not fraction or _decimal(fraction))
+
+def classify(token):
+    literal = 0
+    if token.isdigit():
+        literal = DIGITS
+        if token == '0' or token == '1':
+            literal |= BINARY
+    if _numeric(token):
+        literal |= NUMERIC
+        if token.strip().lstrip('+-').lower() == 'nan':
+            literal |= NAN
+    if '"' in token or "'" in token:
+        literal |= QUOTED
+    return literal
+
+# an int or a float (but not a nan) going by its literal class
+def isNumber(literal):
+    return bool(literal & DIGITS or literal & NUMERIC and not literal & NAN)
+
+# the literal classes of tokens by their text, each worked out on first use
+class Literals(dict):
+
+    def __missing__(self, token):
+        literal = self[token] = classify(token)
+        return literal
+
+def checkNesting(stack,curr):
+    if isOpen(curr):
+        stack.append(curr)
+    elif isClose(curr):
+        if len(stack) == 0:
+            sys.stdout.write(" ERROR: brace mismatch")
+        else:
+            temp = stack.pop()
+            if not matchingTokens(temp,curr):
+                sys.stdout.write(" ERROR: brace mismatch")
+                stack.append(temp)
+    return stack
+
+#   Master patterns, one per dialect. The alternatives are tried in order,
+#   so the two character operators win over their one character prefixes.
+#   In the checker dialect '!' only starts a token as part of '!=' (and not
+#   when the '=' is the first half of '=='), and a ';' is not separated from
+#   a symbol that directly follows it.
+_patterns = {
+    'checker': r'==|!=(?!=)|//|;%(sym)s*|[{}=()+\-*/%%><:]|%(sym)s+' % {
+        'sym': r'(?:[^\s;{}=()+\-*/%><:!]+|!(?!=(?!=)))'},
+    'analyzer': r'==|//|[;{}=()+\-*/%><:]|[^\s;{}=()+\-*/%><:]+',
+}
+_compiled = {}
+
+# the master pattern of a dialect, compiled on first use. With spaced set it
+# also has the whitespace in front of every token as a group.
+def _regex(dialect, spaced=False):
+    regex = _compiled.get((dialect, spaced))
+    if regex is None:
+        import re
+        pattern = _patterns[dialect]
+        if spaced:
+            pattern = r'(\s*)(%s)' % pattern
+        regex = _compiled[dialect, spaced] = re.compile(pattern)
+    return regex
+
+# below this many characters text is lexed by _scanPairs
+_SMALL = 1 << 13
+
+_operators = '{}=()+-*/%><:'
+_stops = {'checker': ';{}=()+-*/%><:!', 'analyzer': ';{}=()+-*/%><:'}
+
+# The same as the spaced master pattern's findall, in plain Python: a
+# (space, token) pair for every token of text.
+def _scanPairs(text, dialect):
+    checker = dialect == 'checker'
+    stops = _stops[dialect]
+    startswith = text.startswith
+    pairs = []
+    n = len(text)
+    last = i = 0
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            i += 1
+            continue
+        j = i + 1
+        if c in _operators or c == ';' and not checker:
+            if (c == '=' or c == '/') and startswith(c, j):
+                j += 1
+        elif c == '!' and checker and startswith('=', j) and not startswith('=', j + 1):
+            j += 1
+        else:
+            # a symbol, or in the checker dialect a ';' and the symbol after it
+            while j < n:
+                d = text[j]
+                if d.isspace():
+                    break
+                if d in stops:
+                    if d != '!' or startswith('=', j + 1) and not startswith('=', j + 2):
+                        break
+                j += 1
+        pairs.append((text[last:i], text[i:j]))
+        last = i = j
+    return pairs
+
+def _checkerPairs(text):
+    if len(text) < _SMALL:
+        return _scanPairs(text, 'checker')
+    return _regex('checker', True).findall(text)
+
+def _analyzerPairs(text):
+    if len(text) < _SMALL:
+        return _scanPairs(text, 'analyzer')
+    return _regex('analyzer', True).findall(text)
+
+# 'end while' and 'end if' are single tokens
+def glueEnds(string):
+    if 'end ' in string:
+        string = string.replace('end while', 'end_while').replace('end if', 'end_if')
+    return string
+
+#   Checker dialect: one line of tokens for every line of the source
+
+# The source lowercased, but for the tokens starting with a quote: the case
+# of names and keywords does not matter, that of strings is printed.
+def foldCase(string):
+    if '"' not in string and "'" not in string:
+        return string.lower()
+    lines = string.split('\n')
+    for i, line in enumerate(lines):
+        if '"' in line or "'" in line:
+            lines[i] = ''.join(space + (token if token[0] in '"\'' else token.lower())
+                               for space, token in _scanPairs(line, 'checker'))
+        else:
+            lines[i] = line.lower()
+    return '\n'.join(lines)
+
+def scanLine(line):
+    return _regex('checker').findall(glueEnds(line))
+
+# yields (token, line, column) for every token, both zero based
+def scanTokens(string):
+    finditer = _regex('checker').finditer
+    for line, text in enumerate(glueEnds(string).split('\n')):
+        for m in finditer(text):
+            yield m.group(), line, m.start()
+
+def generateTokens(string):
+    lines = glueEnds(string).split('\n')
+    if len(string) < _SMALL:
+        return [[token for _, token in _scanPairs(line, 'checker')] for line in lines]
+    findall = _regex('checker').findall
+    return [findall(line) for line in lines]
+
+# same as generateTokens, but into a TokenStore, which also keeps where in
+# the string every token starts
+def storeTokens(string):
+    from .tokenstore import TokenStore
+    return TokenStore(reserved).scan(glueEnds(string), _checkerPairs)
+
+# the tokens of a program for the checker: the store only pays off for
+# larger sources, small ones stay lists
+def lexProgram(string):
+    if len(string) < _SMALL:
+        return generateTokens(string)
+    return storeTokens(string)
+
+# same as generateTokens, but lowercases and lexes the source one line at a
+# time as it comes out of e.g. a file object
+def iterTokens(lines):
+    line = '\n'
+    for line in lines:
+        yield scanLine(line.lower())
+    # split() also gives a last, empty line after a trailing newline
+    if line.endswith('\n'):
+        yield []
+
+def stripComments(contents):
+    if not isinstance(contents, list):
+        return contents.withoutComments()
+    return list(iterStripComments(contents))
+
+# lines are only copied when there is a comment to cut off
+def iterStripComments(lines):
+    for line in lines:
+        if '//' in line:
+            line = line[:line.index('//')]
+        yield line
+
+#   Analyzer dialect: ';', '{' and '}' also end a line
+
+# yields (token, line, column) for every token, both zero based and relative
+# to the source text rather than to the lines returned by generateStatements
+def scanStatementTokens(string):
+    finditer = _regex('analyzer').finditer
+    for line, text in enumerate(glueEnds(string).split('\n')):
+        for m in finditer(text):
+            yield m.group(), line, m.start()
+
+def generateStatements(string):
+    import re
+    findall = _regex('analyzer').findall
+    splitBreaks = re.compile(r'([;{}])').split
+    retval=[]
+    line=[]
+    # a line break directly following another one (source newline or ';',
+    # '{', '}') does not start a new, empty line
+    atBreak = False
+    text = glueEnds(string).split('\n')
+    last = len(text) - 1
+    for n in range(len(text)):
+        part = text[n]
+        if part:
+            if ';' in part or '{' in part or '}' in part:
+                pieces = splitBreaks(part)
+                for k in range(0, len(pieces) - 1, 2):
+                    line.extend(findall(pieces[k]))
+                    line.append(pieces[k+1])
+                    retval.append(line)
+                    line = []
+                part = pieces[-1]
+                atBreak = not part
+            else:
+                atBreak = False
+            if part:
+                line.extend(findall(part))
+        if n != last:
+            if not atBreak:
+                retval.append(line)
+                line = []
+            atBreak = True
+    retval.append(line)
+    return retval
+
+# the lines of generateStatements as a TokenStore, leaving out the empty ones
+def storeStatements(string):
+    from .tokenstore import TokenStore
+    return TokenStore(reserved).scan(glueEnds(string), _analyzerPairs, breaks={';', '{', '}'})
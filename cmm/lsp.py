@@ -0,0 +1,281 @@
+'''
+Language server for C--, speaking the Language Server Protocol over stdio.
+
+An editor starts it once, as cmm-lsp or python3 -m cmm.lsp, rather than
+running the checker on every keystroke. Every open document keeps its text,
+tokens, symbol table and messages in memory, and its diagnostics are
+published again after every change.
+
+With --engine legacy (the default) a change checks the document again with
+the TypeChecker of cmm.checker, so the diagnostics are the messages the
+checker prints. With --engine tree a document is an IncrementalChecker
+(see cmm.incremental), which only checks the statements a change touches
+again.
+'''
+
+import io
+import sys
+import json
+import contextlib
+
+from .lexer import lexProgram, stripComments
+from .checker import TypeChecker
+from .incremental import IncrementalChecker
+from .diagnostics import MESSAGES, TYPE_ERROR, message
+
+#   Protocol constants
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+SEVERITY_ERROR = 1
+SEVERITY_WARNING = 2
+SYNC_INCREMENTAL = 2
+
+# a document checked by the TypeChecker, with the interface of
+# IncrementalChecker
+class Document:
+
+    def __init__(self, text=''):
+        self.load(text)
+
+    def load(self, text):
+        self.source = text.split('\n')
+        self.tokens = stripComments(lexProgram(text.lower()))
+        self.diagnostics = []
+        checker = TypeChecker(self.tokens, sink=self.diagnostics)
+        # the checker also prints, which would end up in the protocol
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                checker.begin()
+            except IndexError:
+                # an unfinished program: the checker ran off its end, what
+                # it found up to there stands
+                pass
+        self.symbols = checker.symbols
+
+    def edit(self, start, end, lines):
+        self.source[start:end] = lines
+        self.load('\n'.join(self.source))
+
+    def messages(self):
+        return self.diagnostics
+
+_documents = {'legacy': Document, 'tree': IncrementalChecker}
+
+# the lines of a document whose checker failed, which changes are applied
+# to before it is loaded again as a whole
+class _Text:
+
+    def __init__(self, source):
+        self.source = list(source)
+
+    def load(self, text):
+        self.source = text.split('\n')
+
+    def edit(self, start, end, lines):
+        self.source[start:end] = lines
+
+# the index into text of an LSP position's character, which counts UTF-16
+# code units
+def _column(text, character):
+    if text.isascii():
+        return character
+    units = 0
+    for k, c in enumerate(text):
+        if units >= character:
+            return k
+        units += 2 if ord(c) > 0xffff else 1
+    return len(text)
+
+# applies one of the contentChanges of a didChange to document
+def applyChange(document, change):
+    where = change.get('range')
+    if where is None:
+        document.load(change['text'])
+        return
+    source = document.source
+    last = len(source) - 1
+    start, end = where['start'], where['end']
+    first = min(start['line'], last)
+    final = min(end['line'], last)
+    head = source[first][:_column(source[first], start['character'])]
+    tail = source[final][_column(source[final], end['character']):]
+    if end['line'] > last:
+        tail = ''
+    document.edit(first, final + 1, (head + change['text'] + tail).split('\n'))
+
+# the LSP diagnostics of a document's messages, one per line and code
+def diagnostics(document):
+    source = document.source
+    seen = set()
+    result = []
+    for line, code, detail in document.messages():
+        if (line, code) in seen or not 0 < line <= len(source):
+            continue
+        seen.add((line, code))
+        kind = MESSAGES[code][1]
+        result.append({
+            'range': {'start': {'line': line - 1, 'character': 0},
+                      'end': {'line': line - 1, 'character': len(source[line - 1])}},
+            'severity': SEVERITY_ERROR if kind == TYPE_ERROR else SEVERITY_WARNING,
+            'code': code,
+            'source': 'cmm',
+            'message': '%s: %s.' % (kind, message(code, detail)),
+        })
+    return result
+
+class Server:
+
+    def __init__(self, engine='legacy', input=None, output=None):
+        self.document = _documents[engine]
+        self.input = input or sys.stdin.buffer
+        self.output = output or sys.stdout.buffer
+        # uri -> document
+        self.documents = {}
+        # uri -> the exception the checker of the document failed with
+        self.failures = {}
+        self.shuttingDown = False
+        self.handlers = {
+            'initialize': self._initialize,
+            'shutdown': self._shutdown,
+            'textDocument/didOpen': self._didOpen,
+            'textDocument/didChange': self._didChange,
+            'textDocument/didClose': self._didClose,
+        }
+
+    # serves until exit, giving back the exit status
+    def run(self):
+        while True:
+            try:
+                request = self._receive()
+            except ValueError:
+                self._send({'jsonrpc': '2.0', 'id': None,
+                            'error': {'code': PARSE_ERROR, 'message': 'invalid message'}})
+                continue
+            if request is None:
+                return 1
+            method = request.get('method')
+            if method == 'exit':
+                return 0 if self.shuttingDown else 1
+            self._dispatch(method, request.get('params'), request.get('id'))
+
+    def _dispatch(self, method, params, id):
+        handler = self.handlers.get(method)
+        if handler is None:
+            # notifications nobody handles are dropped
+            if id is not None:
+                self._send({'jsonrpc': '2.0', 'id': id,
+                            'error': {'code': METHOD_NOT_FOUND, 'message': method}})
+            return
+        try:
+            result = handler(params)
+        except Exception as e:
+            if id is None:
+                sys.stderr.write('%s: %r\n' % (method, e))
+                return
+            self._send({'jsonrpc': '2.0', 'id': id,
+                        'error': {'code': INTERNAL_ERROR, 'message': repr(e)}})
+            return
+        if id is not None:
+            self._send({'jsonrpc': '2.0', 'id': id, 'result': result})
+
+    def _receive(self):
+        length = None
+        while True:
+            line = self.input.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                if length is not None:
+                    break
+                continue
+            name, _, value = line.decode('ascii').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return json.loads(self.input.read(length).decode('utf-8'))
+
+    def _send(self, message):
+        body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+        self.output.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        self.output.flush()
+
+    def _publish(self, uri):
+        document = self.documents.get(uri)
+        result = diagnostics(document) if document else []
+        failure = self.failures.get(uri)
+        if failure is not None:
+            result.append({
+                'range': {'start': {'line': 0, 'character': 0},
+                          'end': {'line': 0, 'character': 0}},
+                'severity': SEVERITY_ERROR,
+                'source': 'cmm',
+                'message': 'the checker failed on this document: %r' % failure,
+            })
+        self._send({'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                    'params': {'uri': uri, 'diagnostics': result}})
+
+    # runs change, which checks the document of uri, keeping what it fails
+    # with to be published instead of losing the document
+    def _check(self, uri, change):
+        self.failures.pop(uri, None)
+        try:
+            change()
+        except Exception as e:
+            self.failures[uri] = e
+
+    def _initialize(self, params):
+        return {'capabilities': {'textDocumentSync': {'openClose': True,
+                                                      'change': SYNC_INCREMENTAL}},
+                'serverInfo': {'name': 'cmm'}}
+
+    def _shutdown(self, params):
+        self.shuttingDown = True
+        return None
+
+    def _didOpen(self, params):
+        item = params['textDocument']
+        uri = item['uri']
+        # stored empty first, so the document is there for its changes even
+        # when checking its text fails
+        document = self.documents[uri] = self.document()
+        self._check(uri, lambda: document.load(item['text']))
+        self._publish(uri)
+
+    def _didChange(self, params):
+        uri = params['textDocument']['uri']
+        document = self.documents[uri]
+        changes = params['contentChanges']
+        if uri in self.failures:
+            # what the failed checker kept may be half built: only its text
+            # is trusted, and loaded again whole
+            text = _Text(document.source)
+            for change in changes:
+                applyChange(text, change)
+            self._check(uri, lambda: document.load('\n'.join(text.source)))
+        else:
+            def apply():
+                for change in changes:
+                    applyChange(document, change)
+            self._check(uri, apply)
+        self._publish(uri)
+
+    def _didClose(self, params):
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self.failures.pop(uri, None)
+        self._publish(uri)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="C-- language server, over stdio")
+    parser.add_argument("--engine", choices=["legacy", "tree"], default="legacy",
+                        help="check documents with the original checker (default), or "
+                             "re-check only the edited statements of their syntax tree")
+    # editors commonly pass this; stdio is the only transport
+    parser.add_argument("--stdio", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    sys.exit(Server(args.engine).run())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+'''
+Byte level lexer for the type checker's largest inputs, using numpy.
+'''
+
+import array
+
+from .lexer import reserved
+from .tokenstore import TokenStore
+
+#   The file is memory mapped and numpy finds every token boundary at once,
+#   following the same rules as the checker's master pattern. Letters are
+#   folded to lower case while the tokens are keyed, so there is no
+#   lowercased copy of the source, and a Python string is only made once for
+#   every distinct token. Only ASCII whitespace separates tokens.
+def mapTokens(path):
+    import mmap
+    import numpy as np
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+    b = np.frombuffer(data, dtype=np.uint8)
+    n = len(b)
+
+    def prev(mask):
+        shifted = np.zeros_like(mask)
+        shifted[1:] = mask[:-1]
+        return shifted
+
+    def following(mask):
+        shifted = np.zeros_like(mask)
+        shifted[:-1] = mask[1:]
+        return shifted
+
+    # case insensitive test for character ch at the positions idx
+    def at(idx, ch):
+        ok = idx < n
+        match = np.zeros(len(idx), dtype=bool)
+        match[ok] = (b[idx[ok]] | 0x20) == ord(ch)
+        return match
+
+    ws = _byteTable(np, 'whitespace')[b]
+    # a lone '\r' ends a line as it does for a file opened in text mode
+    breaks = np.flatnonzero((b == 10) | ((b == 13) & ~following(b == 10)))
+
+    eq = b == 61
+    bang = b == 33
+    second = np.zeros(n, dtype=bool)
+    second[_pairs(np, eq)] = True
+    second[_pairs(np, b == 47)] = True
+    # '!=' unless the '=' is the first half of '=='
+    bangEq = bang & following(eq) & ~following(following(eq))
+    second[1:] |= bangEq[:-1]
+    del eq
+
+    # 'end while' and 'end if': the space becomes part of the symbol
+    spaces = np.flatnonzero(b[3:] == 32) + 3
+    spaces = spaces[at(spaces - 3, 'e') & at(spaces - 2, 'n') & at(spaces - 1, 'd')]
+    isWhile = at(spaces + 1, 'w') & at(spaces + 2, 'h') & at(spaces + 3, 'i') \
+        & at(spaces + 4, 'l') & at(spaces + 5, 'e')
+    glued = spaces[at(spaces + 1, 'i') & at(spaces + 2, 'f')].tolist()
+    last = -9
+    # 'end whilend while' only glues the first one, as str.replace does
+    for space in spaces[isWhile].tolist():
+        if space - last != 8:
+            glued.append(space)
+            last = space
+    ws[glued] = False
+
+    sym = ~ws & (b != 59) & ~_byteTable(np, 'operators')[b] | (bang & ~bangEq)
+    sym[glued] = True
+    del bang, bangEq
+    # symbols continue a symbol or a ';' directly in front of them
+    cont = (sym & prev(sym | (b == 59))) | second
+    del sym, second
+    index = np.uint32 if n < 2 ** 32 else np.int64
+    starts = np.flatnonzero(~ws & ~cont).astype(index)
+    ends = (np.flatnonzero(~ws & ~following(cont)) + 1).astype(index)
+    del ws, cont
+
+    ids, names = _internTokens(np, data, b, starts, ends)
+    lineStart = np.searchsorted(np.searchsorted(breaks, starts), np.arange(len(breaks) + 2))
+    store = TokenStore(reserved)
+    for name in names:
+        store.intern(name)
+    # names can repeat when bytes that differ only decode to the same text
+    syms = np.array([store.ids[name] for name in names], dtype=np.uint32)
+    store.syms = _toArray(syms[ids])
+    store.kinds = array.array('B', np.frombuffer(store.symKinds, dtype=np.uint8)[syms[ids]].tobytes())
+    # offsets and lengths are in bytes here
+    store.offsets = _toArray(starts) if n < 2 ** 32 else array.array('Q', starts.tobytes())
+    store.lengths = _toArray(ends - starts)
+    store.lineStarts = _toArray(lineStart[:-1])
+    store.lineEnds = _toArray(lineStart[1:])
+    return store
+
+# Gives every token the id of its (lowercased) text, together with the list
+# of those texts. Tokens of up to 7 bytes are keyed by their bytes packed
+# into an integer, longer ones by a dict on the bytes.
+def _internTokens(np, data, b, starts, ends):
+    lengths = ends - starts
+    keys = lengths.astype(np.uint64) << np.uint64(56)
+    lower = _byteTable(np, 'lower')
+    for k in range(7):
+        take = np.flatnonzero(lengths > k)
+        keys[take] |= lower[b[starts[take] + k]].astype(np.uint64) << np.uint64(8 * k)
+    longIds = {}
+    for k in np.flatnonzero(lengths > 7).tolist():
+        raw = data[starts[k]:ends[k]].lower()
+        keys[k] = (8 << 56) + longIds.setdefault(raw, len(longIds))
+    keys, first, ids = np.unique(keys, return_index=True, return_inverse=True)
+    names = [data[starts[k]:ends[k]].decode('utf-8', 'replace').lower().replace(' ', '_')
+             for k in first.tolist()]
+    return ids.astype(np.uint32), names
+
+def _toArray(values):
+    return array.array('I', values.astype('uint32').tobytes())
+
+# positions of the second halves of the leftmost, non-overlapping pairs in
+# every run of set bytes e.g. '==' in '==='
+def _pairs(np, mask):
+    pos = np.flatnonzero(mask)
+    if not len(pos):
+        return pos
+    index = np.arange(len(pos))
+    runStart = np.ones(len(pos), dtype=bool)
+    runStart[1:] = pos[1:] != pos[:-1] + 1
+    offset = index - np.maximum.accumulate(np.where(runStart, index, 0))
+    return pos[offset % 2 == 1]
+
+_byteTables = {}
+
+def _byteTable(np, name):
+    if not _byteTables:
+        whitespace = np.zeros(256, dtype=bool)
+        whitespace[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+        operators = np.zeros(256, dtype=bool)
+        operators[list(b'{}=()+-*/%><:!')] = True
+        lower = np.arange(256, dtype=np.uint8)
+        lower[65:91] += 32
+        _byteTables.update(whitespace=whitespace, operators=operators, lower=lower)
+    return _byteTables[name]
@@ -0,0 +1,256 @@
+'''
+Optimizing pass over the syntax tree of cmm.parser: constant folding and
+dead branch elimination.
+
+prune runs before the tree is checked and drops the code of the statement
+block that can never run: an if whose condition is constant goes away,
+leaving the branch that is taken, and so does a while whose condition is
+constant false. The checker then does no work on dead code and says nothing
+about it. A condition only counts as constant when all of it is, and when
+the checker would take it for a boolean, so 'if 5:' is still reported.
+
+fold runs on the checked tree. An operator whose operands are literals of
+the same type is replaced by a literal of the result: arithmetic the way
+cmm.runtime evaluates it, comparisons as a Num of type 'boolean', and an
+and/or whose left side is constant by what it evaluates to. What no literal
+can be written for, like a negative number or a float in exponent notation,
+is not folded, nor is a division by zero, which is left to fail at run
+time. Conditions that turn out constant then drop their dead code too. The
+result can be written back as C-- with cmm.unparse:
+
+    python3 -m cmm.optimize [--summary] [-o OUT] FILE
+'''
+
+import sys
+
+from .parser import isFloat
+from .runtime import INT_MAX, divide, modulo, fdivide, fmodulo
+from .syntax import (Program, Block, Assign, If, While, Print, Num, BinOp, Compare, BoolOp, Stmt,
+                     walk)
+
+_ARITHMETIC = {
+    'int': {'+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b,
+            '/': divide, '%': modulo},
+    'float': {'+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b,
+              '/': fdivide, '%': fmodulo},
+}
+
+_COMPARE = {'==': lambda a, b: a == b, '!=': lambda a, b: a != b, '<': lambda a, b: a < b,
+            '>': lambda a, b: a > b, '<=': lambda a, b: a <= b, '>=': lambda a, b: a >= b}
+
+def _value(num):
+    return float(num.text) if num.type == 'float' else int(num.text)
+
+# whether a literal is a value, not an int too large for one, which stops
+# the program when it is evaluated and so is left alone
+def _fits(num):
+    return num.type != 'int' or _value(num) <= INT_MAX
+
+# a literal standing for a boolean: a folded condition, 0 or 1
+def _isBoolean(expr):
+    return type(expr) is Num and (expr.type == 'boolean' or
+                                  expr.type == 'int' and _value(expr) in (0, 1))
+
+def _boolean(line, value):
+    return Num(line, '1' if value else '0', 'boolean')
+
+# whether a condition is always true or always false, None when it is not
+# a boolean literal
+def _truth(test):
+    if _isBoolean(test):
+        return _value(test) != 0
+    return None
+
+# the literal of value, None when there is none
+def _literal(line, value, kind):
+    if kind == 'int':
+        if value < 0 or value > INT_MAX:
+            return None
+        return Num(line, str(value), kind)
+    text = repr(value)
+    if not isFloat(text):
+        return None
+    return Num(line, text, kind)
+
+# the statements of a list of them, nested ones included, blocks left out
+def _count(body):
+    return sum(1 for node in body for child in walk(node)
+               if isinstance(child, Stmt) and type(child) is not Block)
+
+class Optimizer:
+
+    def __init__(self):
+        # statements dropped, operators folded
+        self.removed = 0
+        self.folded = 0
+
+    # the program with the dead code of its statement block dropped, for a
+    # program not checked yet
+    def prune(self, program):
+        return self._program(program, False)
+
+    # the checked program with its constant expressions folded, and the code
+    # that turned out dead dropped
+    def fold(self, program):
+        return self._program(program, True)
+
+    def _program(self, program, checked):
+        body = list(program.body)
+        blocks = [k for k, node in enumerate(body) if type(node) is Block]
+        if len(blocks) > 1:
+            block = body[blocks[1]]
+            body[blocks[1]] = Block(block.line, self._statements(block.body, checked), block.end)
+        return Program(program.line, body, program.errors)
+
+    # The statements of body, rewritten. The statement lists being rewritten
+    # are kept on a stack, each with what is left of it and the list its
+    # statements go to, so they nest as deep as memory allows; the live
+    # branch of a constant if goes to the list the if was in.
+    def _statements(self, body, checked):
+        result = []
+        stack = [(iter(body), result)]
+        while stack:
+            statements, out = stack[-1]
+            node = next(statements, None)
+            if node is None:
+                stack.pop()
+                continue
+            kind = type(node)
+            if kind is If:
+                test = self._fold(node.test, checked)
+                taken = _truth(test)
+                if taken is None:
+                    rewritten = If(node.line, test if checked else node.test, [],
+                                   None if node.orelse is None else [])
+                    out.append(rewritten)
+                    if node.orelse is not None:
+                        stack.append((iter(node.orelse), rewritten.orelse))
+                    stack.append((iter(node.body), rewritten.body))
+                    continue
+                live, dead = node.body, node.orelse or []
+                if not taken:
+                    live, dead = dead, live
+                self.removed += 1 + _count(dead)
+                stack.append((iter(live), out))
+            elif kind is While:
+                test = self._fold(node.test, checked)
+                if _truth(test) is False:
+                    self.removed += 1 + _count(node.body)
+                    continue
+                rewritten = While(node.line, test if checked else node.test, [])
+                out.append(rewritten)
+                stack.append((iter(node.body), rewritten.body))
+            elif kind is Block:
+                rewritten = Block(node.line, [], node.end)
+                out.append(rewritten)
+                stack.append((iter(node.body), rewritten.body))
+            elif checked:
+                out.append(self._statement(node))
+            else:
+                out.append(node)
+        return result
+
+    def _statement(self, node):
+        kind = type(node)
+        if kind is Assign:
+            return Assign(node.line, node.name, self._fold(node.value, True))
+        if kind is Print:
+            value = self._fold(node.value, True)
+            if type(value) is Num and value.type == 'boolean':
+                # printed as true or false, which no literal is
+                return node
+            return Print(node.line, value)
+        return node
+
+    # The expression with its constant operators folded. Before the program
+    # is checked, an and/or is only folded when both of its sides are
+    # constant, as the side that is not looked at could still hold an error.
+    # Operators are folded once both their sides are, the ones waiting for
+    # that on a stack rather than recursing.
+    def _fold(self, expr, checked):
+        values = []
+        stack = [(expr, False)]
+        while stack:
+            expr, sided = stack.pop()
+            kind = type(expr)
+            if kind is not BinOp and kind is not Compare and kind is not BoolOp:
+                values.append(expr)
+            elif not sided:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+            else:
+                right = values.pop()
+                values.append(self._operator(expr, values.pop(), right, checked))
+        return values[0]
+
+    # an operator with its sides folded, folded itself when it can be
+    def _operator(self, expr, left, right, checked):
+        kind = type(expr)
+        folded = None
+        if kind is BoolOp:
+            if _isBoolean(left) and (checked or _isBoolean(right)):
+                # the right side is only looked at when the left does not decide
+                if (_value(left) != 0) == (expr.op == 'and'):
+                    folded = _boolean(expr.line, _value(right)) if type(right) is Num else right
+                else:
+                    folded = _boolean(expr.line, _value(left))
+        elif type(left) is Num and type(right) is Num and _fits(left) and _fits(right):
+            if kind is Compare:
+                if left.type == right.type or _isBoolean(left) and _isBoolean(right):
+                    folded = _boolean(expr.line, _COMPARE[expr.op](_value(left), _value(right)))
+            elif left.type == right.type and left.type in _ARITHMETIC:
+                try:
+                    value = _ARITHMETIC[left.type][expr.op](_value(left), _value(right))
+                    folded = _literal(expr.line, value, left.type)
+                except ZeroDivisionError:
+                    pass
+        if folded is None:
+            return kind(expr.line, expr.op, left, right)
+        if checked:
+            self.folded += 1
+        return folded
+
+def _argumentParser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Writes a C-- program back with its constants folded and its dead code "
+                    "dropped")
+    parser.add_argument("FILE", help="the program to optimize")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write the program to FILE rather than to stdout")
+    parser.add_argument("--summary", action="store_true",
+                        help="say on stderr how many statements were dropped and how many "
+                             "operators folded")
+    return parser
+
+# the exit status is 1 when the program does not check, its messages going
+# to stderr
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = _argumentParser().parse_args(argv)
+    from .runtime import CompileError, checkSource
+    from .unparse import unparse
+    with open(args.FILE, 'r') as f:
+        text = f.read()
+    optimizer = Optimizer()
+    try:
+        program, symbols = checkSource(text, optimizer)
+    except CompileError as e:
+        from .diagnostics import MESSAGES, message
+        for line, code, detail in e.messages:
+            sys.stderr.write("%s:%d: %s: %s\n" % (args.FILE, line, MESSAGES[code][1],
+                                                  message(code, detail)))
+        sys.exit(1)
+    if args.output is None:
+        sys.stdout.write(unparse(program))
+    else:
+        with open(args.output, 'w') as f:
+            f.write(unparse(program))
+    if args.summary:
+        sys.stderr.write("%d statements dropped as dead, %d operators folded\n"
+                         % (optimizer.removed, optimizer.folded))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+'''
+Output of both tools: a buffered writer standing in for stdout, and the
+machine-readable formats of their results.
+
+Both tools write a lot of small strings, the lexical analyzer several per
+token. A BufferedWriter only collects them, and hands them to the real
+stream joined into one string whenever a batch of BUFFER characters is
+ready and when it is flushed at the end, which is several times quicker
+than writing them one by one when the output goes to a pipe.
+
+The checker's messages can be written as JSON Lines, one object per message,
+or as a SARIF 2.1.0 log; the lexical analyzer's tokens and messages as JSON
+Lines or as tab separated values. The formats are sinks for Diagnostics (see
+cmm.diagnostics): messages are written as they are emitted rather than
+collected first, so the output of a large program or of many files is
+streamed too. begin(path) starts the output of every file, and close()
+ends the output as a whole.
+'''
+
+import sys
+
+from .diagnostics import MESSAGES, NON_TYPE, message
+
+# characters a BufferedWriter collects before writing them out
+BUFFER = 1 << 20
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+class BufferedWriter:
+
+    def __init__(self, stream, size=BUFFER):
+        self.stream = stream
+        self.size = size
+        self.parts = []
+        self.pending = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.pending >= self.size:
+            self._drain()
+        return len(text)
+
+    def _drain(self):
+        self.stream.write(''.join(self.parts))
+        self.parts = []
+        self.pending = 0
+
+    def flush(self):
+        if self.parts:
+            self._drain()
+        self.stream.flush()
+
+# Sends what is printed to target until the with block ends, flushing it
+# then. Output printed before an exception is flushed too, so it still
+# comes before the traceback.
+class Redirect:
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.saved = sys.stdout
+        sys.stdout = self.target
+        return self.target
+
+    def __exit__(self, *exc):
+        sys.stdout = self.saved
+        self.target.flush()
+        return False
+
+# stands in for stdout where whatever is printed is not wanted
+class Discard:
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+def _level(kind):
+    return 'warning' if kind == NON_TYPE else 'error'
+
+# The checker's messages as JSON Lines, one object per message.
+class JsonLines:
+
+    def __init__(self, out):
+        from json import dumps
+        self.out = out
+        self.dumps = dumps
+        self.path = None
+
+    def begin(self, path):
+        self.path = path
+
+    def extend(self, entries):
+        write = self.out.write
+        dumps = self.dumps
+        for line, code, detail in entries:
+            name, kind = MESSAGES[code][:2]
+            write(dumps({'file': self.path, 'line': line, 'code': code, 'name': name,
+                         'kind': kind, 'message': message(code, detail)}) + '\n')
+
+    # a file that could not be checked
+    def failure(self, path, text):
+        self.out.write(self.dumps({'file': path, 'error': text}) + '\n')
+
+    def close(self):
+        pass
+
+# The checker's messages as a SARIF log with a single run. The rules are
+# all the messages of cmm.diagnostics, a result's ruleIndex being its code.
+# The results are written as they come, between a head and a tail written
+# by the constructor and by close().
+class Sarif:
+
+    def __init__(self, out, tool='cmm-checker'):
+        from json import dumps
+        self.out = out
+        self.dumps = dumps
+        self.uri = None
+        self.results = 0
+        self.failures = []
+        rules = [{'id': name, 'shortDescription': {'text': text.replace('%s', '...')},
+                  'defaultConfiguration': {'level': _level(kind)}}
+                 for name, kind, text, _ in MESSAGES]
+        head = dumps({'$schema': SARIF_SCHEMA, 'version': '2.1.0',
+                      'runs': [{'tool': {'driver': {'name': tool, 'rules': rules}},
+                                'results': []}]})
+        # everything up to the empty results list, which is filled in here
+        out.write(head[:head.rindex('[]')] + '[')
+
+    def begin(self, path):
+        self.uri = path.replace('\\', '/')
+
+    def extend(self, entries):
+        write = self.out.write
+        dumps = self.dumps
+        uri = self.uri
+        for line, code, detail in entries:
+            name, kind = MESSAGES[code][:2]
+            result = {'ruleId': name, 'ruleIndex': code, 'level': _level(kind),
+                      'message': {'text': message(code, detail)},
+                      'locations': [{'physicalLocation': {
+                          'artifactLocation': {'uri': uri},
+                          'region': {'startLine': line}}}]}
+            write((',\n' if self.results else '\n') + dumps(result))
+            self.results += 1
+
+    def failure(self, path, text):
+        self.failures.append({'level': 'error', 'message': {'text': '%s: %s' % (path, text)}})
+
+    def close(self):
+        invocation = {'executionSuccessful': not self.failures}
+        if self.failures:
+            invocation['toolExecutionNotifications'] = self.failures
+        self.out.write('\n], "invocations": [%s]}]}\n' % self.dumps(invocation))
+
+CHECKER_FORMATS = {'jsonl': JsonLines, 'sarif': Sarif}
+
+# a TSV field: tabs, line breaks and backslashes escaped
+def _field(text):
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n') \
+                   .replace('\r', '\\r')
+    return text
+
+# The lexical analyzer's token stream as tab separated values, with a header:
+# a row for every token with its offset in the source and its category, and
+# one for every message. Fields that do not apply are empty.
+class TokenTsv:
+
+    HEADER = 'file\tline\toffset\tkind\ttext\tdetail\n'
+
+    def __init__(self, out):
+        self.out = out
+        self.path = None
+        out.write(self.HEADER)
+
+    def begin(self, path):
+        self.path = _field(path)
+
+    def token(self, line, text, category, offset=None):
+        self.out.write('%s\t%d\t%s\ttoken\t%s\t%s\n' % (
+            self.path, line, '' if offset is None else offset, _field(text), category))
+
+    def extend(self, entries):
+        write = self.out.write
+        path = self.path
+        for line, code, detail in entries:
+            write('%s\t%d\t\tmessage\t%s\t%s\n' % (path, line, MESSAGES[code][0],
+                                                   _field(message(code, detail))))
+
+    def close(self):
+        pass
+
+# The lexical analyzer's token stream as JSON Lines: an object for every
+# token, with its offset in the source, and one for every message. There are
+# far more tokens than distinct token texts, so the JSON of a text is made
+# once and kept.
+class TokenJsonLines:
+
+    def __init__(self, out):
+        from json import dumps
+        self.out = out
+        self.dumps = dumps
+        self.path = None
+        self.encoded = {}
+
+    def begin(self, path):
+        self.path = path
+
+    def _encode(self, text):
+        encoded = self.encoded.get(text)
+        if encoded is None:
+            encoded = self.encoded[text] = self.dumps(text)
+        return encoded
+
+    def token(self, line, text, category, offset=None):
+        self.out.write('{"file": %s, "line": %d, "offset": %s, "token": %s, '
+                       '"category": "%s"}\n' % (self._encode(self.path), line,
+                                                'null' if offset is None else offset,
+                                                self._encode(text), category))
+
+    def extend(self, entries):
+        write = self.out.write
+        for line, code, detail in entries:
+            write(self.dumps({'file': self.path, 'line': line, 'code': code,
+                              'name': MESSAGES[code][0], 'message': message(code, detail)}) + '\n')
+
+    def close(self):
+        pass
+
+ANALYZER_FORMATS = {'tsv': TokenTsv, 'jsonl': TokenJsonLines}
@@ -0,0 +1,376 @@
+'''
+Parser building the cmm.syntax tree of a program in one pass over its
+tokens. It follows the grammar rule by rule as a recursive descent parser
+would, but keeps the statements and parentheses it is in on stacks of its
+own, so programs nest as deep as memory allows.
+
+It takes the token lines the checker works on (comments stripped) and reads
+every token once, left to right, looking only at the current one. A
+statement ends at a ';' or at the end of its line, so an expression never
+looks past the line it started on. A statement that does not parse becomes
+a Bad node and parsing carries on after it.
+'''
+
+from .lexer import reserved
+from .diagnostics import (message, UNRECOGNIZED, NO_SYMBOL, NO_SEMI, UNEXPECTED, MISSING,
+                          NO_EXPRESSION, OPEN_IF, OPEN_WHILE)
+from .syntax import (Program, Block, VarDec, Assign, If, While, Read, Print, Bad,
+                     Num, Str, Name, BinOp, Compare, BoolOp)
+
+_types = ('int', 'float', 'boolean')
+_relational = ('==', '!=', '<', '>', '>=')
+_closers = ('}', 'else', 'end_if', 'end_while')
+
+# carries the diagnostics code of the error, and its detail
+class ParseError(Exception):
+
+    def __init__(self, code, detail=None):
+        Exception.__init__(self, message(code, detail))
+        self.code = code
+        self.detail = detail
+
+def isInt(token):
+    return token.isdigit() and token.isascii()
+
+def isFloat(token):
+    whole, dot, fraction = token.partition('.')
+    return bool(dot) and isInt(whole) and isInt(fraction)
+
+# an if, while or block whose statements are being parsed: kind is its
+# node type, body the list of statements being filled, and stops the tokens
+# that end it
+class _Open:
+    __slots__ = ('kind', 'line', 'stops', 'test', 'statements', 'orelse', 'body')
+
+    def __init__(self, kind, line, stops):
+        self.kind = kind
+        self.line = line
+        self.stops = stops
+        self.test = None
+        self.statements = self.body = []
+        self.orelse = None
+
+class Parser:
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.count = len(lines)
+        self.errors = []
+        # current line, its tokens, and the current token ('' past the end
+        # of the line)
+        self.i = -1
+        self.line = []
+        self.j = 0
+        self.tok = ''
+        self._nextLine()
+
+    # moves on to the next line with tokens
+    def _nextLine(self):
+        self.i += 1
+        while self.i < self.count:
+            line = self.lines[self.i]
+            if line:
+                self.line = line
+                self.j = 0
+                self.tok = line[0]
+                return
+            self.i += 1
+        self.line = []
+        self.j = 0
+        self.tok = ''
+
+    def _advance(self):
+        self.j += 1
+        self.tok = self.line[self.j] if self.j < len(self.line) else ''
+
+    def _error(self, line, code, detail=None):
+        self.errors.append((line, code, detail))
+
+    # drops the rest of the current line, giving back its tokens
+    def _skipLine(self, start=None):
+        if start is None:
+            start = self.j
+        skipped = self.line[start:]
+        self.j = len(self.line)
+        self.tok = ''
+        return skipped
+
+    def parse(self):
+        body = self._statements(())
+        return Program(1, body, self.errors)
+
+    # where the parser is: the line and the index of the current token
+    def position(self):
+        return self.i, self.j
+
+    # moves the parser to token j of line i
+    def seek(self, i, j):
+        self.i = i
+        self.line = self.lines[i]
+        self.j = j
+        self.tok = self.line[j] if j < len(self.line) else ''
+
+    # skips empty lines and ';' up to the start of the next statement, giving
+    # back its first token ('' at the end of the input)
+    def nextStatement(self):
+        while True:
+            tok = self.tok
+            if tok:
+                if tok != ';':
+                    return tok
+                self._advance()
+            elif self.i >= self.count:
+                return ''
+            else:
+                self._nextLine()
+
+    # statements up to one of stops or the end of the input
+    def _statements(self, stops):
+        body = []
+        tok = self.nextStatement()
+        while tok and tok not in stops:
+            body.append(self._statement())
+            tok = self.nextStatement()
+        return body
+
+    # A statement, the ones nested in it included. The blocks, ifs and whiles
+    # open around the current token are kept on a stack of _Open rather than
+    # on Python's, so they nest as deep as memory allows.
+    def _statement(self):
+        stack = []
+        while True:
+            node = self._open(stack)
+            while True:
+                if node is not None:
+                    if not stack:
+                        return node
+                    stack[-1].body.append(node)
+                # the next statement of the innermost one open, or its end
+                tok = self.nextStatement()
+                if tok and tok not in stack[-1].stops:
+                    break
+                node = self._close(stack)
+
+    # the simple statement at the current token, None when it is a block,
+    # if or while, which is pushed on stack to have its statements parsed
+    def _open(self, stack):
+        tok = self.tok
+        line = self.i + 1
+        if tok == '{':
+            self._advance()
+            stack.append(_Open(Block, line, ('}',)))
+            return None
+        if tok == 'if':
+            # if_stmt --> "if" bool_stmt ":" [block] [ "else:" [block] ] "end if" ";"
+            self._advance()
+            frame = _Open(If, line, ('else', 'end_if', '}'))
+            frame.test = self._test()
+            self._endHeader(line, ':')
+            stack.append(frame)
+            return None
+        if tok == 'while':
+            # while_stmt --> "while" bool_stmt "do" [block] "end while" ";"
+            self._advance()
+            frame = _Open(While, line, ('end_while', '}'))
+            frame.test = self._test()
+            self._endHeader(line, 'do')
+            stack.append(frame)
+            return None
+        start = self.j
+        try:
+            if tok == 'print':
+                self._advance()
+                node = Print(line, self._expr())
+            elif tok == 'read':
+                self._advance()
+                node = Read(line, self._expr())
+            elif tok in _types:
+                self._advance()
+                name = self._name()
+                value = None
+                if self.tok == '=':
+                    self._advance()
+                    value = self._expr()
+                node = VarDec(line, tok, name, value)
+            elif tok in _closers:
+                raise ParseError(UNEXPECTED, tok)
+            else:
+                name = self._name()
+                if self.tok != '=':
+                    raise ParseError(MISSING, '=')
+                self._advance()
+                node = Assign(line, name, self._expr())
+        except ParseError as e:
+            self._error(line, e.code, e.detail)
+            return Bad(line, self._skipLine(start), e.args[0])
+        self._endStatement(line)
+        return node
+
+    # ends the innermost statement on stack, at one of its stops or the end
+    # of the input, giving back its node; None when what ended is the body
+    # of an if with an else, whose statements come next
+    def _close(self, stack):
+        frame = stack[-1]
+        kind = frame.kind
+        if kind is If and frame.orelse is None and self.tok == 'else':
+            self._advance()
+            if self.tok == ':':
+                self._advance()
+            frame.orelse = frame.body = []
+            frame.stops = ('end_if', '}')
+            return None
+        stack.pop()
+        if kind is Block:
+            end = None
+            if self.tok == '}':
+                end = self.i + 1
+                self._advance()
+            else:
+                self._error(frame.line, MISSING, '}')
+            return Block(frame.line, frame.body, end)
+        closer = 'end_if' if kind is If else 'end_while'
+        if self.tok == closer:
+            end = self.i + 1
+            self._advance()
+            self._endStatement(end)
+        else:
+            self._error(frame.line, OPEN_IF if kind is If else OPEN_WHILE)
+        if kind is If:
+            return If(frame.line, frame.test, frame.statements, frame.orelse)
+        return While(frame.line, frame.test, frame.statements)
+
+    def _endStatement(self, line):
+        if self.tok == ';':
+            self._advance()
+        elif self.tok:
+            self._error(line, UNEXPECTED, self.tok)
+            self._skipLine()
+        else:
+            self._error(line, NO_SEMI)
+
+    # the condition of an if or while, up to its ':' or 'do'
+    def _test(self):
+        line = self.i + 1
+        start = self.j
+        try:
+            return self._expr()
+        except ParseError as e:
+            self._error(line, e.code, e.detail)
+            while self.tok and self.tok not in (':', 'do'):
+                self._advance()
+            return Bad(line, self.line[start:self.j], e.args[0])
+
+    # the ':' or 'do' after a condition; anything else up to the end of the
+    # line is dropped, the body still follows
+    def _endHeader(self, line, word):
+        if self.tok == word:
+            self._advance()
+        elif self.tok:
+            self._error(line, UNEXPECTED, self.tok)
+            self._skipLine()
+        else:
+            self._error(line, MISSING, word)
+
+    def _name(self):
+        tok = self.tok
+        if not tok or tok in reserved or tok in _closers or tok[0] in ';"\'' \
+                or isInt(tok) or isFloat(tok):
+            raise ParseError(NO_SYMBOL)
+        self._advance()
+        return tok
+
+    # bool_stmt --> rel_stmt {("and"|"or") rel_stmt}
+    # rel_stmt --> add_expr [(">"|"<"|">="|"<="|"=="|"!=") add_expr]
+    # add_expr --> mul_expr {("+"|"-") mul_expr}
+    # mul_expr --> simple_expr {("*"|"/"|"%") simple_expr}
+    # simple_expr --> id | var | "(" bool_stmt ")"
+    # The rules are followed without recursing: the operators still waiting
+    # for their right side are kept in partial, by rule, as (left side,
+    # operator, line), and those of the enclosing expressions of an open '('
+    # on a stack, so parentheses nest as deep as memory allows.
+    def _expr(self):
+        stack = []
+        partial = [None, None, None, None]
+        while True:
+            while self.tok == '(':
+                self._advance()
+                stack.append(partial)
+                partial = [None, None, None, None]
+            value = self._simple()
+            while True:
+                tok = self.tok
+                # mul_expr
+                if partial[3] is not None:
+                    left, op, line = partial[3]
+                    partial[3] = None
+                    value = BinOp(line, op, left, value)
+                if tok == '*' or tok == '/' or tok == '%':
+                    partial[3] = (value, tok, self.i + 1)
+                    self._advance()
+                    break
+                # add_expr
+                if partial[2] is not None:
+                    left, op, line = partial[2]
+                    partial[2] = None
+                    value = BinOp(line, op, left, value)
+                if tok == '+' or tok == '-':
+                    partial[2] = (value, tok, self.i + 1)
+                    self._advance()
+                    break
+                # rel_stmt, which takes a single operator
+                if partial[1] is not None:
+                    left, op, line = partial[1]
+                    partial[1] = None
+                    value = Compare(line, op, left, value)
+                elif tok in _relational:
+                    line = self.i + 1
+                    self._advance()
+                    # '>=' and '<=' come out of the lexer as two tokens
+                    if (tok == '>' or tok == '<') and self.tok == '=':
+                        tok += '='
+                        self._advance()
+                    partial[1] = (value, tok, line)
+                    break
+                # bool_stmt
+                if partial[0] is not None:
+                    left, op, line = partial[0]
+                    partial[0] = None
+                    value = BoolOp(line, op, left, value)
+                if tok == 'and' or tok == 'or':
+                    partial[0] = (value, tok, self.i + 1)
+                    self._advance()
+                    break
+                if not stack:
+                    return value
+                # the end of a parenthesized bool_stmt, a simple_expr of the
+                # one around it
+                if tok != ')':
+                    raise ParseError(MISSING, ')')
+                self._advance()
+                partial = stack.pop()
+
+    # a simple_expr other than a parenthesized one
+    def _simple(self):
+        tok = self.tok
+        line = self.i + 1
+        if not tok:
+            raise ParseError(NO_EXPRESSION)
+        if tok in reserved or tok in _closers:
+            raise ParseError(UNEXPECTED, tok)
+        if tok[0] == ';':
+            raise ParseError(UNRECOGNIZED)
+        self._advance()
+        if tok[0] == '"' or tok[0] == "'":
+            return Str(line, tok)
+        if isInt(tok):
+            return Num(line, tok, 'int')
+        if isFloat(tok):
+            return Num(line, tok, 'float')
+        return Name(line, tok)
+
+    # for parsing a statement at a time from outside, see cmm.incremental
+    advance = _advance
+    statement = _statement
+
+def parse(lines):
+    return Parser(lines).parse()
@@ -0,0 +1,147 @@
+'''
+What running a C-- program takes besides the program itself, shared by the
+ways of running one.
+
+Only programs the tree checker (cmm.typecheck) finds nothing wrong with are
+run, so the types of all expressions are known before they are evaluated.
+Integers are 64 bit, and an operation on them whose result does not fit, or
+an int literal too large for one, stops the program with an integer
+overflow. Integer division and remainder truncate toward zero as in C, not
+toward minus infinity as in Python. Names and keywords are case blind, the
+text of strings is printed as written. read takes the next word of the
+input, and print writes its value on a line of its own, booleans as true
+and false. Input is read a line at a time and output goes through a
+BufferedWriter (see cmm.output), which is flushed whenever more input is
+needed from a terminal, so prompts show up in time.
+'''
+
+import sys
+from math import fmod
+
+from .diagnostics import message
+
+INT_MIN = -1 << 63
+INT_MAX = (1 << 63) - 1
+
+# a program that can not be run, because the checker has messages for it;
+# messages are (line, code, detail) in line order
+class CompileError(Exception):
+
+    def __init__(self, messages):
+        line, code, detail = messages[0]
+        Exception.__init__(self, "line %d: %s (%d message%s)" % (
+            line, message(code, detail), len(messages), '' if len(messages) == 1 else 's'))
+        self.messages = messages
+
+# an error while the program runs, with the line it happened on
+class ExecutionError(Exception):
+
+    def __init__(self, line, text):
+        Exception.__init__(self, "line %d: %s" % (line, text))
+        self.line = line
+
+# The syntax tree and the symbol table of a program's source, raising
+# CompileError when the checker has any messages for it. The tree goes
+# through a cmm.optimize.Optimizer: its dead code is dropped before it is
+# checked, and its constants are folded after.
+def checkSource(text, optimizer=None):
+    from .lexer import lexProgram, stripComments, foldCase
+    from .parser import parse
+    from .typecheck import TreeChecker
+    from .optimize import Optimizer
+    if optimizer is None:
+        optimizer = Optimizer()
+    program = optimizer.prune(parse(stripComments(lexProgram(foldCase(text)))))
+    checker = TreeChecker().check(program)
+    if checker.messages:
+        raise CompileError(sorted(checker.messages, key=lambda entry: entry[0]))
+    return optimizer.fold(program), checker.symbols
+
+# integer division truncating toward zero
+def divide(a, b):
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+# the remainder of divide, with the sign of a
+def modulo(a, b):
+    return a - b * divide(a, b)
+
+def fdivide(a, b):
+    return a / b
+
+def fmodulo(a, b):
+    if b == 0:
+        raise ZeroDivisionError("float modulo")
+    return fmod(a, b)
+
+def checkInt(value, line):
+    if value < INT_MIN or value > INT_MAX:
+        raise ExecutionError(line, "integer overflow")
+    return value
+
+# stops the program: the int just computed does not fit, see checkInt
+def overflow():
+    raise OverflowError("integer overflow")
+
+# the text print writes for a value of type kind
+def show(value, kind):
+    if kind == 'boolean':
+        return 'true' if value else 'false'
+    if kind == 'float':
+        return repr(float(value))
+    return str(value)
+
+_booleans = {'true': 1, 'false': 0, '1': 1, '0': 0}
+
+# The words of the input, read a line at a time. before is called before a
+# line is read from a terminal.
+class Input:
+
+    def __init__(self, stream, before=None):
+        self.stream = stream
+        self.before = before if before is not None and stream.isatty() else None
+        self.words = []
+        self.k = 0
+
+    def word(self, line):
+        while self.k >= len(self.words):
+            if self.before is not None:
+                self.before()
+            text = self.stream.readline()
+            if not text:
+                raise ExecutionError(line, "read past the end of the input")
+            self.words = text.split()
+            self.k = 0
+        word = self.words[self.k]
+        self.k += 1
+        return word
+
+    def readInt(self, line):
+        word = self.word(line)
+        try:
+            value = int(word)
+        except ValueError:
+            raise ExecutionError(line, "read expected an int, got %r" % word)
+        return checkInt(value, line)
+
+    def readFloat(self, line):
+        word = self.word(line)
+        try:
+            return float(word)
+        except ValueError:
+            raise ExecutionError(line, "read expected a float, got %r" % word)
+
+    def readBoolean(self, line):
+        word = self.word(line)
+        value = _booleans.get(word.lower())
+        if value is None:
+            raise ExecutionError(line, "read expected a boolean, got %r" % word)
+        return value
+
+# the input and output a program runs with, stdin and stdout by default
+def streams(stdin=None, stdout=None):
+    from .output import BufferedWriter
+    out = BufferedWriter(sys.stdout if stdout is None else stdout)
+    return Input(sys.stdin if stdin is None else stdin, out.flush), out
@@ -0,0 +1,102 @@
+'''
+Programs to run a tool on: files, directories, stdin and archives.
+
+iterSources gives the name and text of every program its paths name, one
+at a time, so only one program is held in memory however many there are.
+A directory stands for the .cmm files under it, compressed ones and
+archives included, and '-' for stdin. Archives are read where they are,
+without unpacking them to disk: the .cmm members of zip files, and of tar
+files (plain or compressed with gzip, bzip2 or xz) read as a stream from
+start to end; a single program compressed with gzip, bzip2 or xz is
+decompressed as it is read. What a file is comes from its first bytes, not
+its name. A member is named archive:member.
+'''
+
+import os
+import sys
+
+SUFFIX = '.cmm'
+
+# files looked at in directories besides .cmm ones: compressed programs and
+# archives
+_PACKED = ('.cmm.gz', '.cmm.bz2', '.cmm.xz', '.zip', '.tar', '.tgz', '.tbz2', '.txz',
+           '.tar.gz', '.tar.bz2', '.tar.xz')
+
+# compression formats by their magic bytes, with the modules reading them
+_COMPRESSED = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'lzma'))
+
+def _isTar(head):
+    return head[257:262] == b'ustar'
+
+# 'zip', 'tar', the module of a compressed file, or None for a plain one
+def _kind(path):
+    with open(path, 'rb') as f:
+        head = f.read(262)
+    if head.startswith(b'PK\x03\x04') or head.startswith(b'PK\x05\x06'):
+        return 'zip'
+    if _isTar(head):
+        return 'tar'
+    for magic, module in _COMPRESSED:
+        if head.startswith(magic):
+            with __import__(module).open(path, 'rb') as f:
+                if _isTar(f.read(262)):
+                    return 'tar'
+            return module
+    return None
+
+def _decode(data):
+    return data.decode('utf-8', 'replace')
+
+# the .cmm files and archives under directory, in order
+def _walk(directory):
+    found = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        found.extend(os.path.join(root, name) for name in sorted(names)
+                     if name.endswith(SUFFIX) or name.lower().endswith(_PACKED))
+    return found
+
+def _fileSources(path):
+    kind = _kind(path)
+    if kind == 'zip':
+        import zipfile
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith(SUFFIX):
+                    yield path + ':' + info.filename, _decode(archive.read(info))
+    elif kind == 'tar':
+        import tarfile
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.isfile() and member.name.endswith(SUFFIX):
+                    yield path + ':' + member.name, _decode(archive.extractfile(member).read())
+    elif kind is not None:
+        with __import__(kind).open(path, 'rb') as f:
+            yield path, _decode(f.read())
+    else:
+        with open(path, 'r') as f:
+            yield path, f.read()
+
+# (name, text) of every program named by paths. A file that can not be
+# read, or an archive that turns out broken, is handed to onError with the
+# exception, and the files after it are still read; without onError the
+# exception is raised.
+def iterSources(paths, onError=None):
+    for path in paths:
+        if path == '-':
+            files = [None]
+        elif os.path.isdir(path):
+            files = _walk(path)
+        else:
+            files = [path]
+        for name in files:
+            try:
+                if name is None:
+                    yield '<stdin>', sys.stdin.read()
+                    continue
+                for source in _fileSources(name):
+                    yield source
+            except Exception as e:
+                if onError is None:
+                    raise
+                onError(name or '<stdin>', e)
@@ -0,0 +1,455 @@
+'''
+Instrumentation behind the --stats and --profile options of the checker and
+the lexical analyzer, for finding out where the time goes on a slow input.
+
+A run is split into phases: read, lex, comment strip, var block, statement
+block and output (the tree engine also has a parse phase before the
+blocks). Every phase gets its wall time and the number of memory blocks it
+allocated and did not free. With --stats-memory, allocations are also traced
+by tracemalloc, for the bytes still held at the end of each phase and the
+peak above what was held at its start; that slows the tools down several
+times over. The counters and timers slow them down too, if much less: the
+times are for comparing parts of a run, not for benchmarking (see
+benchmarks/suite.py for that).
+
+--stats also counts tokens, lines, check() calls (for the analyzer, its
+checkCurr() and checkLine() calls) and symbol table lookups, times every
+grammar rule, both with and without the rules it calls, and lists the
+source lines whose statements took longest. Rules are the TypeChecker's
+_assign, _if_stmt, _while_stmt, _read_stat, _write_stat and _var_dec, the
+statement kinds of the tree engine, and the check methods of the analyzer.
+The report goes to stderr, as text or as JSON, so the tool's own output is
+left as it is.
+
+--profile FILE samples the call stack every millisecond of CPU time and
+writes the samples in the collapsed stack format of flamegraph.pl and
+speedscope, one "phase;frame;frame... count" line per distinct stack.
+'''
+
+import io
+import sys
+import time
+import contextlib
+
+from .symbols import SymbolTable
+
+PROFILE_INTERVAL = 0.001
+
+# lines shown in the text report
+HOT_LINES = 10
+
+_checkerRules = ('_assign', '_if_stmt', '_while_stmt', '_read_stat', '_write_stat', '_var_dec')
+_analyzerRules = ('_checkBlock', '_varErrors', '_stmtErrors', '_checkPrintRead', '_checkAssign',
+                  '_printLine', '_checkAddSymbol', '_stmtBlockLineCheck')
+
+# a SymbolTable counting how often names are looked up; tables are switched
+# to it by setting their __class__
+class CountingSymbolTable(SymbolTable):
+
+    lookups = 0
+
+    def __contains__(self, name):
+        self.lookups += 1
+        return dict.__contains__(self, name)
+
+    def get(self, name, default=None):
+        self.lookups += 1
+        return dict.get(self, name, default)
+
+class Stats:
+
+    # with detailed unset only the phase times are taken, which is all
+    # --profile needs; traceMemory adds the bytes allocated, as traced by
+    # tracemalloc
+    def __init__(self, tool, path, detailed=True, traceMemory=False):
+        self.tool = tool
+        self.path = path
+        self.detailed = detailed
+        self.traceMemory = traceMemory
+        # name -> [seconds, blocks allocated, bytes held at the end, peak
+        # bytes], in run order
+        self.phases = {}
+        self.counts = {}
+        # name -> [calls, seconds, seconds less the rules called]
+        self.rules = {}
+        # line -> [statements, seconds], the time of the statements starting
+        # on the line, less the statements nested in them
+        self.lines = {}
+        # token lines, to show the hottest ones
+        self.source = None
+        self.phase = None
+        self._start = None
+        self._tracemalloc = None
+        # time spent in the rules called by each rule being timed
+        self._stack = []
+
+    def __enter__(self):
+        if self.traceMemory:
+            # only loaded when needed, as it takes a while to import
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+        if self._tracemalloc is not None:
+            self._tracemalloc.stop()
+
+    # ends the current phase and starts the one called name; going back to
+    # a phase adds to it
+    def begin(self, name):
+        self.end()
+        self.phase = name
+        self.phases.setdefault(name, [0.0, 0, 0, 0])
+        held = 0
+        tracemalloc = self._tracemalloc
+        if tracemalloc is not None:
+            held = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        self._start = (time.perf_counter(), sys.getallocatedblocks(), held)
+
+    def end(self):
+        if self.phase is None:
+            return
+        elapsed = time.perf_counter() - self._start[0]
+        phase = self.phases[self.phase]
+        phase[0] += elapsed
+        phase[1] += sys.getallocatedblocks() - self._start[1]
+        if self._tracemalloc is not None:
+            held, peak = self._tracemalloc.get_traced_memory()
+            phase[2] += held - self._start[2]
+            phase[3] = max(phase[3], peak - self._start[2])
+        self.phase = None
+
+    # function counted under name on every call
+    def counted(self, name, function):
+        counts = self.counts
+        counts.setdefault(name, 0)
+        def wrapper(*args):
+            counts[name] += 1
+            return function(*args)
+        return wrapper
+
+    # method timed as a grammar rule; where(args) gives the rule's name and
+    # the line the call starts on
+    def timed(self, method, where):
+        stack = self._stack
+        rules = self.rules
+        lines = self.lines
+        clock = time.perf_counter
+        def wrapper(*args):
+            name, line = where(args)
+            stack.append(0.0)
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                rule = rules.get(name)
+                if rule is None:
+                    rule = rules[name] = [0, 0.0, 0.0]
+                rule[0] += 1
+                rule[1] += elapsed
+                rule[2] += own
+                at = lines.get(line)
+                if at is None:
+                    at = lines[line] = [0, 0.0]
+                at[0] += 1
+                at[1] += own
+        return wrapper
+
+    # the lines that took longest, as (line, calls, seconds, text)
+    def hotLines(self, n=HOT_LINES):
+        hot = sorted(self.lines.items(), key=lambda item: -item[1][1])[:n]
+        result = []
+        for line, (calls, seconds) in hot:
+            text = ''
+            if self.source is not None and 0 < line <= len(self.source):
+                text = ' '.join(self.source[line - 1])
+            result.append((line, calls, seconds, text))
+        return result
+
+    def data(self):
+        phases = {}
+        for name, (seconds, blocks, held, peak) in self.phases.items():
+            phase = phases[name] = {'seconds': seconds, 'allocatedBlocks': blocks}
+            if self.traceMemory:
+                phase['heldBytes'] = held
+                phase['peakBytes'] = peak
+        return {
+            'tool': self.tool,
+            'file': self.path,
+            'phases': phases,
+            'counts': self.counts,
+            'rules': dict((name, {'calls': calls, 'seconds': seconds, 'selfSeconds': own})
+                          for name, (calls, seconds, own) in self.rules.items()),
+            'hotLines': [{'line': line, 'calls': calls, 'seconds': seconds, 'text': text}
+                         for line, calls, seconds, text in self.hotLines()],
+        }
+
+    def write(self, form='text', out=None):
+        if out is None:
+            out = sys.stderr
+        if form == 'json':
+            import json
+            json.dump(self.data(), out, indent=2)
+            out.write('\n')
+            return
+        total = sum(phase[0] for phase in self.phases.values())
+        out.write("%s stats for %s\n\n" % (self.tool, self.path))
+        out.write("%-18s %10s %6s %12s" % ('phase', 'ms', '%', 'blocks'))
+        if self.traceMemory:
+            out.write(" %12s %12s" % ('held KiB', 'peak KiB'))
+        out.write('\n')
+        for name, (seconds, blocks, held, peak) in self.phases.items():
+            out.write("%-18s %10.2f %6.1f %12d" % (
+                name, seconds * 1e3, seconds / total * 100 if total else 0, blocks))
+            if self.traceMemory:
+                out.write(" %12.1f %12.1f" % (held / 1024, peak / 1024))
+            out.write('\n')
+        out.write("%-18s %10.2f\n\n" % ('total', total * 1e3))
+        for name, value in self.counts.items():
+            out.write("%-18s %10d\n" % (name, value))
+        if self.rules:
+            out.write("\n%-20s %10s %10s %10s %10s\n" % ('rule', 'calls', 'ms', 'self ms',
+                                                         'us/call'))
+            for name, (calls, seconds, own) in sorted(self.rules.items(),
+                                                       key=lambda item: -item[1][2]):
+                out.write("%-20s %10d %10.2f %10.2f %10.2f\n" % (
+                    name, calls, seconds * 1e3, own * 1e3, seconds / calls * 1e6))
+        hot = self.hotLines()
+        if hot:
+            out.write("\n%-8s %10s %10s  %s\n" % ('line', 'calls', 'ms', 'source'))
+            for line, calls, seconds, text in hot:
+                if len(text) > 50:
+                    text = text[:47] + '...'
+                out.write("%-8d %10d %10.3f  %s\n" % (line, calls, seconds * 1e3, text))
+
+# adds --stats, --stats-format, --stats-memory and --profile to the
+# argparse parser of a tool
+def addArguments(parser):
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--stats", action="store_true",
+                       help="report time and allocations per phase, counts, time per grammar "
+                            "rule and the hottest lines on stderr")
+    group.add_argument("--stats-format", choices=["text", "json"],
+                       help="the form of the --stats report (default: text), implies --stats")
+    group.add_argument("--stats-memory", action="store_true",
+                       help="also trace the bytes allocated per phase, which makes the run "
+                            "several times slower; implies --stats")
+    group.add_argument("--profile", metavar="FILE",
+                       help="sample the call stack and write it to FILE as collapsed stacks, "
+                            "for flame graphs")
+
+# the form of the report the parsed arguments ask for, None for none
+def reportForm(args):
+    if args.stats_format:
+        return args.stats_format
+    if args.stats or args.stats_memory:
+        return 'text'
+    return None
+
+# Samples the Python call stack on a CPU time interval timer. Only works on
+# Unix, where signal.setitimer exists; the samples are taken in the main
+# thread, which is where the tools run.
+class Sampler:
+
+    def __init__(self, stats=None, interval=PROFILE_INTERVAL):
+        self.stats = stats
+        self.interval = interval
+        # collapsed stack -> samples
+        self.stacks = {}
+
+    def __enter__(self):
+        import signal
+        if not hasattr(signal, 'setitimer'):
+            raise OSError("--profile needs signal.setitimer, which this platform lacks")
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc):
+        import signal
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+
+    def _sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '?')
+            # the wrappers timing the rules are left out
+            if module != __name__:
+                code = frame.f_code
+                names.append('%s:%s' % (module, getattr(code, 'co_qualname', code.co_name)))
+            frame = frame.f_back
+        # the phase at the root, so the flame graph splits by phase first
+        if self.stats is not None and self.stats.phase is not None:
+            names.append(self.stats.phase)
+        names.reverse()
+        stack = ';'.join(name.replace(';', ':').replace(' ', '_') for name in names)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, samples in sorted(self.stacks.items()):
+                f.write('%s %d\n' % (stack, samples))
+
+# number of tokens in the lexer's output
+def _numTokens(tokens):
+    if hasattr(tokens, 'numTokens'):
+        return tokens.numTokens()
+    return sum(len(line) for line in tokens)
+
+def _instrumentChecker(stats, checker):
+    from . import checker as module
+    if stats.detailed:
+        where = lambda name: lambda args: (name, checker.i + 1)
+        for name in _checkerRules:
+            setattr(checker, name, stats.timed(getattr(checker, name), where(name)))
+        checker.symbols.__class__ = CountingSymbolTable
+        module.check = stats.counted('check() calls', module.check)
+    # begin() runs _program once for each block; the calls nested in
+    # statements are the if and while bodies
+    blocks = iter(('var block', 'statement block'))
+    program = checker._program
+    depth = [0]
+    def _program():
+        if not depth[0]:
+            stats.begin(next(blocks, 'statement block'))
+        depth[0] += 1
+        try:
+            program()
+        finally:
+            depth[0] -= 1
+    checker._program = _program
+
+def _instrumentTree(stats, checker):
+    statement = checker._statement
+    if stats.detailed:
+        statement = stats.timed(statement, lambda args: (type(args[0]).__name__, args[0].line))
+        checker.symbols.__class__ = CountingSymbolTable
+    # the statements of the first block are checked as declarations
+    def _statement(node, declarations):
+        phase = 'var block' if declarations else 'statement block'
+        if stats.phase != phase:
+            stats.begin(phase)
+        return statement(node, declarations)
+    checker._statement = _statement
+
+# checks the token lines with the legacy or the tree engine, as _check in
+# cmm.checker does, giving back the Diagnostics
+def checkLines(stats, lines, engine, limit):
+    from . import checker as module
+    from .diagnostics import ErrorLimit
+    if engine == 'tree':
+        from .parser import parse
+        from .typecheck import TreeChecker
+        stats.begin('parse')
+        program = parse(lines)
+        checker = TreeChecker()
+        _instrumentTree(stats, checker)
+        checker.check(program)
+        if stats.detailed:
+            stats.counts['symbol lookups'] = checker.symbols.lookups
+        stats.begin('output')
+        return checker.report(len(lines), limit)
+    # building the flat cursor and its tables is a phase of its own
+    stats.begin('cursor')
+    checker = module.TypeChecker(lines, limit)
+    check = module.check
+    _instrumentChecker(stats, checker)
+    try:
+        checker.begin()
+    except ErrorLimit:
+        return checker.diag
+    finally:
+        module.check = check
+        if stats.detailed:
+            stats.counts['symbol lookups'] = checker.symbols.lookups
+    checker.end()
+    return checker.diag
+
+# checks the file at path as the checker does without --stream, giving back
+# the Diagnostics
+def checkFile(stats, path, engine='legacy', limit=0, mmap=False):
+    # imported up front, so that no phase is charged for it
+    from .lexer import lexProgram, stripComments
+    from . import checker, typecheck
+    if mmap:
+        from .mmaplexer import mapTokens
+        stats.begin('lex')
+        tokens = mapTokens(path)
+    else:
+        stats.begin('read')
+        with open(path, 'r') as f:
+            source = f.read().lower()
+        stats.begin('lex')
+        tokens = lexProgram(source)
+    stats.counts['tokens'] = _numTokens(tokens)
+    stats.counts['lines'] = len(tokens)
+    stats.begin('comment strip')
+    lines = stats.source = stripComments(tokens)
+    diag = checkLines(stats, lines, engine, limit)
+    print()
+    return diag
+
+# runs the lexical analyzer on the file at path, as its main() does
+def analyzeFile(stats, path):
+    from .lexer import storeStatements
+    from .analyzer import TokenClass
+    stats.begin('read')
+    with open(path, 'r') as f:
+        string = f.read().strip().lower()
+    stats.begin('lex')
+    statements = storeStatements(string)
+    stats.counts['tokens'] = _numTokens(statements)
+    stats.begin('comment strip')
+    tokens = TokenClass(statements)
+    stats.source = tokens.tokens
+    stats.counts['lines'] = len(tokens.tokens)
+    if stats.detailed:
+        # the token a check method looks at may already be the last one of
+        # the line before
+        where = lambda name: lambda args: (name, tokens.i + (0 if tokens.flags.newline else 1))
+        for name in _analyzerRules:
+            setattr(tokens, name, stats.timed(getattr(tokens, name), where(name)))
+        tokens.checkCurr = stats.counted('checkCurr() calls', tokens.checkCurr)
+        tokens.checkLine = stats.counted('checkLine() calls', tokens.checkLine)
+        tokens.symbols.__class__ = CountingSymbolTable
+    stats.begin('var block')
+    flags = tokens.flags
+    while tokens.Next():
+        if flags.doneStmtBlk and stats.phase != 'statement block':
+            stats.begin('statement block')
+        tokens.checkCurr()
+        tokens.checkLine()
+    if stats.detailed:
+        stats.counts['symbol lookups'] = tokens.symbols.lookups
+
+# runs work(stats) holding back what it prints until the output phase, then
+# writes the report in form ('text' or 'json', None for none) and the
+# samples to the file profile, if given
+def run(stats, work, form=None, profile=None):
+    out = io.StringIO()
+    sampler = Sampler(stats) if profile else None
+    try:
+        with stats, sampler or contextlib.nullcontext():
+            try:
+                with contextlib.redirect_stdout(out):
+                    result = work(stats)
+            finally:
+                stats.begin('output')
+                sys.stdout.write(out.getvalue())
+                sys.stdout.flush()
+                stats.end()
+    finally:
+        if form:
+            stats.write(form)
+        if sampler is not None:
+            sampler.write(profile)
+    return result
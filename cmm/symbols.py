@@ -0,0 +1,54 @@
+'''
+Symbol table shared by the type checkers and the lexical analyzer.
+
+Every declared name is interned: it gets a small integer id, the index of
+its entries in the names, types and lines columns. The table itself maps
+names to ids, so looking a name up is a dict hit no matter how many
+symbols there are. Types are small integer codes rather than strings.
+'''
+
+#   Type codes, in the order of returnType in the checker
+INT = 0
+FLOAT = 1
+BOOLEAN = 2
+UNTYPED = 3     # declared without a type the analyzer could see
+
+TYPE_NAMES = ('int', 'float', 'boolean', None)
+TYPE_CODES = {'int': INT, 'float': FLOAT, 'boolean': BOOLEAN}
+
+class SymbolTable(dict):
+
+    def __init__(self):
+        dict.__init__(self)
+        self.names = []
+        self.types = []
+        # line of the declaration
+        self.lines = []
+        # bumped whenever a symbol is added, so results that depend on the
+        # table can be cached against it
+        self.version = 0
+
+    # adds name and gives back its id; a name already in the table keeps its
+    # first declaration
+    def declare(self, name, type=UNTYPED, line=0):
+        sym = self.get(name)
+        if sym is None:
+            sym = self[name] = len(self.names)
+            self.names.append(name)
+            self.types.append(type)
+            self.lines.append(line)
+            self.version += 1
+        return sym
+
+    # type code of name, None when it was not declared
+    def typeOf(self, name):
+        sym = self.get(name)
+        if sym is None:
+            return None
+        return self.types[sym]
+
+    def lineOf(self, name):
+        sym = self.get(name)
+        if sym is None:
+            return None
+        return self.lines[sym]
@@ -0,0 +1,95 @@
+'''
+Syntax tree of a C-- program, as built by cmm.parser.
+
+Every node keeps the (1 based) source line it starts on as line, and its
+parts under the names listed in its fields. Statements:
+
+    Program(body, errors)     the top level statements, normally two blocks
+                              with the var declarations first; errors lists
+                              the syntax errors found as (line, code,
+                              detail), see cmm.diagnostics
+    Block(body, end)          '{' statements '}', end is the line of the '}'
+    VarDec(type, name, value) type name [= value]
+    Assign(name, value)
+    If(test, body, orelse)    body and orelse are lists of statements,
+                              orelse is None without an else
+    While(test, body)
+    Read(target)
+    Print(value)
+    Bad(tokens, message)      a statement that could not be parsed, or
+                              the condition of an if or while
+
+Expressions:
+
+    Num(text, type)           type is 'int' or 'float', or 'boolean' for a
+                              condition folded by cmm.optimize
+    Str(text)
+    Name(id)
+    BinOp(op, left, right)    '+' '-' '*' '/' '%'
+    Compare(op, left, right)  '==' '!=' '<' '>' '<=' '>='
+    BoolOp(op, left, right)   'and' 'or'
+'''
+
+class Node:
+    __slots__ = ('line',)
+    fields = ()
+
+    def __init__(self, line, *values):
+        self.line = line
+        for name, value in zip(self.fields, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.line == other.line and \
+            all(getattr(self, name) == getattr(other, name) for name in self.fields)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__,
+                           ', '.join([repr(self.line)] + [repr(getattr(self, name))
+                                                          for name in self.fields]))
+
+def _node(name, fields, base=Node):
+    return type(name, (base,), {'__slots__': fields, 'fields': fields})
+
+class Stmt(Node):
+    __slots__ = ()
+
+class Expr(Node):
+    __slots__ = ()
+
+Program = _node('Program', ('body', 'errors'), Stmt)
+Block = _node('Block', ('body', 'end'), Stmt)
+VarDec = _node('VarDec', ('type', 'name', 'value'), Stmt)
+Assign = _node('Assign', ('name', 'value'), Stmt)
+If = _node('If', ('test', 'body', 'orelse'), Stmt)
+While = _node('While', ('test', 'body'), Stmt)
+Read = _node('Read', ('target',), Stmt)
+Print = _node('Print', ('value',), Stmt)
+Bad = _node('Bad', ('tokens', 'message'))
+
+Num = _node('Num', ('text', 'type'), Expr)
+Str = _node('Str', ('text',), Expr)
+Name = _node('Name', ('id',), Expr)
+BinOp = _node('BinOp', ('op', 'left', 'right'), Expr)
+Compare = _node('Compare', ('op', 'left', 'right'), Expr)
+BoolOp = _node('BoolOp', ('op', 'left', 'right'), Expr)
+
+# yields node and every node below it, parents before their children
+def walk(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = []
+        for name in node.fields:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend([item for item in value if isinstance(item, Node)])
+        stack.extend(reversed(children))
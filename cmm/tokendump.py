@@ -0,0 +1,233 @@
+'''
+Binary dump of the lexical analyzer's token stream, written by its
+--format bin, and a reader that maps a dump and looks at it in place.
+
+A dump is columnar, so other tools can load millions of tokens without
+lexing the program again or parsing text. All numbers are little endian
+and every section starts at a multiple of 8 bytes:
+
+    header      MAGIC, then uint32 counts: tokens, strings, string bytes,
+                categories, category bytes, messages, files and file name
+                bytes
+    syms        uint32 per token, its text as an index into the strings
+    lines       uint32 per token, its line as the analyzer numbers them
+    offsets     uint32 per token, where it starts in the source in
+                characters, NO_OFFSET when that is not known
+    kinds       uint8 per token, its category as an index into the
+                categories
+    ends        uint32 per string, where it ends in the string bytes
+    strings     the distinct token texts, UTF-8, one after the other
+    categories  the category names, UTF-8, separated by newlines
+    messages    uint32 lines of the messages, then their uint32 codes (see
+                cmm.diagnostics)
+    files       uint32 per file, its first token, then uint32 per file, its
+                first message
+    names       the names of the files, UTF-8, separated by newlines
+
+TokenDumpReader gives the columns as memoryviews of the mapped file, so
+opening a dump reads nothing but its header; only the strings asked for
+are decoded.
+'''
+
+import sys
+import struct
+from array import array
+from bisect import bisect_right
+
+from .tokenstore import CATEGORIES
+
+MAGIC = b'CMMTOKS\x02'
+HEADER = struct.Struct('<8s8I')
+NO_OFFSET = 0xFFFFFFFF
+
+# the categories of the analyzer's output, by code: the kinds of the token
+# store and what the analyzer makes of names
+KNOWN_CATEGORIES = CATEGORIES + ('var_code', 'digit_code', 'undefined')
+
+def _padding(size):
+    return -size % 8
+
+# little endian bytes of an array
+def _bytes(column):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+# Writes the token stream of the analyzer to a binary file object, as an
+# output format of cmm.output: the tokens and messages of all files are
+# collected, and written when it is closed.
+class TokenDump:
+
+    def __init__(self, out):
+        self.out = out
+        self.files = []
+        self.fileTokens = array('I')
+        self.fileMessages = array('I')
+        self.ids = {}
+        self.texts = []
+        self.categories = dict((name, code) for code, name in enumerate(KNOWN_CATEGORIES))
+        self.syms = array('I')
+        self.lines = array('I')
+        self.offsets = array('I')
+        self.kinds = bytearray()
+        self.messageLines = array('I')
+        self.codes = array('I')
+
+    def begin(self, path):
+        self.files.append(path)
+        self.fileTokens.append(len(self.syms))
+        self.fileMessages.append(len(self.codes))
+
+    def token(self, line, text, category, offset=None):
+        sym = self.ids.get(text)
+        if sym is None:
+            sym = self.ids[text] = len(self.texts)
+            self.texts.append(text)
+        kind = self.categories.get(category)
+        if kind is None:
+            kind = self.categories[category] = len(self.categories)
+        self.syms.append(sym)
+        self.lines.append(line)
+        self.offsets.append(NO_OFFSET if offset is None else offset)
+        self.kinds.append(kind)
+
+    def extend(self, entries):
+        for line, code, detail in entries:
+            self.messageLines.append(line)
+            self.codes.append(code)
+
+    def close(self):
+        encoded = [text.encode('utf-8') for text in self.texts]
+        ends = array('I')
+        end = 0
+        for data in encoded:
+            end += len(data)
+            ends.append(end)
+        strings = b''.join(encoded)
+        names = '\n'.join(sorted(self.categories, key=self.categories.get)).encode('utf-8')
+        files = '\n'.join(self.files).encode('utf-8')
+        sections = [
+            HEADER.pack(MAGIC, len(self.syms), len(encoded), len(strings), len(self.categories),
+                        len(names), len(self.codes), len(self.files), len(files)),
+            _bytes(self.syms), _bytes(self.lines), _bytes(self.offsets), bytes(self.kinds),
+            _bytes(ends), strings, names, _bytes(self.messageLines), _bytes(self.codes),
+            _bytes(self.fileTokens), _bytes(self.fileMessages), files]
+        write = self.out.write
+        for data in sections:
+            write(data)
+            write(bytes(_padding(len(data))))
+        self.out.flush()
+
+# A dump mapped read-only. syms, lines, offsets and kinds are memoryviews
+# with one entry per token, messageLines and codes one per message, and
+# fileTokens and fileMessages one per file, the first of its tokens and
+# messages; files are the names of the files.
+class TokenDumpReader:
+
+    def __init__(self, path):
+        import mmap
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        try:
+            (magic, count, numStrings, stringBytes, numCategories, categoryBytes, numMessages,
+             numFiles, fileBytes) = HEADER.unpack_from(self.view)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("%s is not a token dump" % path)
+        self.count = count
+        layout = [('I', count), ('I', count), ('I', count), ('B', count), ('I', numStrings),
+                  ('B', stringBytes), ('B', categoryBytes), ('I', numMessages),
+                  ('I', numMessages), ('I', numFiles), ('I', numFiles), ('B', fileBytes)]
+        end = HEADER.size + _padding(HEADER.size)
+        for format, items in layout:
+            size = items * struct.calcsize(format)
+            end += size + _padding(size)
+        if end > len(self.view):
+            self.close()
+            raise ValueError("%s is cut short" % path)
+        self.pos = HEADER.size + _padding(HEADER.size)
+        self.syms = self._column('I', count)
+        self.lines = self._column('I', count)
+        self.offsets = self._column('I', count)
+        self.kinds = self._column('B', count)
+        self.ends = self._column('I', numStrings)
+        self.strings = self._column('B', stringBytes)
+        names = bytes(self._column('B', categoryBytes))
+        self.categories = names.decode('utf-8').split('\n') if names else []
+        self.messageLines = self._column('I', numMessages)
+        self.codes = self._column('I', numMessages)
+        self.fileTokens = self._column('I', numFiles)
+        self.fileMessages = self._column('I', numFiles)
+        names = bytes(self._column('B', fileBytes))
+        self.files = names.decode('utf-8').split('\n') if numFiles else []
+        # decoded strings by index, filled as they are asked for
+        self.texts = {}
+
+    # the next section, count items of format; big endian machines get a copy
+    def _column(self, format, count):
+        size = count * struct.calcsize(format)
+        section = self.view[self.pos:self.pos + size]
+        self.pos += size + _padding(size)
+        if format == 'B':
+            return section
+        if sys.byteorder == 'big':
+            column = array(format, section)
+            column.byteswap()
+            return memoryview(column)
+        return section.cast(format)
+
+    def __len__(self):
+        return self.count
+
+    def string(self, sym):
+        text = self.texts.get(sym)
+        if text is None:
+            start = self.ends[sym - 1] if sym else 0
+            text = self.texts[sym] = str(self.strings[start:self.ends[sym]], 'utf-8')
+        return text
+
+    def text(self, k):
+        return self.string(self.syms[k])
+
+    def category(self, k):
+        return self.categories[self.kinds[k]]
+
+    def offset(self, k):
+        offset = self.offsets[k]
+        return None if offset == NO_OFFSET else offset
+
+    # (line, offset, text, category) of token k
+    def token(self, k):
+        return self.lines[k], self.offset(k), self.text(k), self.category(k)
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield self.token(k)
+
+    # (line, code) of every message
+    def messages(self):
+        return zip(self.messageLines, self.codes)
+
+    # the name of the file token k came from
+    def fileOf(self, k):
+        return self.files[bisect_right(self.fileTokens, k) - 1]
+
+    def close(self):
+        for name in ('syms', 'lines', 'offsets', 'kinds', 'ends', 'strings', 'messageLines',
+                     'codes', 'fileTokens', 'fileMessages'):
+            column = getattr(self, name, None)
+            if column is not None:
+                column.release()
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
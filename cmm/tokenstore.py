@@ -0,0 +1,196 @@
+'''
+Compact token storage shared by the lexical analyzer and the type checker.
+
+Instead of a list of lists of str, a program is kept as parallel arrays with
+one entry per token: its kind code, the id of its interned text and its
+offset and length in the source. A line index gives the first and last
+token of every line, so line N and the text of any token are found in
+constant time. The offsets, and the columns counting tokens, are 32 bit
+unless the source is WIDE characters or longer, as in cmm.mmaplexer.
+'''
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, compress, count, repeat
+from operator import add, sub
+
+from .lexer import Literals, classify
+
+#   Kind codes: one per category of the reserved words table, NAME for
+#   everything else (symbols, numbers, strings)
+NAME = 0
+CATEGORIES = ('name', 'type', 'if_stmt', 'while_stmt', 'assign_op', 'multiply_op',
+              'add_op', 'semicolon', 'read_stat', 'write_stat', 'and_stmt', 'or_stmt',
+              'rel_stmt', 'open_paren', 'close_paren', 'open_brace', 'close_brace',
+              'comment')
+KINDS = dict((category, code) for code, category in enumerate(CATEGORIES))
+
+# sources this long have offsets, and may have token counts, past 32 bits
+WIDE = 1 << 32
+
+# The store also acts as the list of token lines the tools index with
+# prog[i][j]: the list for a line is made on first use, and only the most
+# recent lines are kept around.
+class TokenStore(dict):
+
+    def __init__(self, reserved):
+        dict.__init__(self)
+        self.reserved = reserved
+        # type code of the columns below, 'Q' once the source is WIDE
+        self.index = 'I'
+        # token columns
+        self.kinds = array('B')
+        self.syms = array('I')
+        self.offsets = array('I')
+        self.lengths = array('I')
+        # line index, the tokens of line i are lineStarts[i]:lineEnds[i]
+        self.lineStarts = array('I')
+        self.lineEnds = array('I')
+        # interned symbols
+        self.names = []
+        self.ids = {}
+        self.symKinds = array('B')
+        # literal classes of the interned symbols by text, see cmm.lexer
+        self.literals = Literals()
+
+    def intern(self, text):
+        sym = self.ids.get(text)
+        if sym is None:
+            sym = self.ids[text] = len(self.names)
+            self.names.append(text)
+            self.symKinds.append(KINDS.get(self.reserved.get(text), NAME))
+            self.literals[text] = classify(text)
+        return sym
+
+    # Fills the store with the tokens of text. findall must give a (space,
+    # token) pair for every token, the space being whatever comes between it
+    # and the previous one. There is one line for every line of the text; if
+    # breaks is given, lines also end after every token in it, and then only
+    # lines with tokens are kept. The columns are built by iterating in C
+    # rather than with a Python loop over the tokens, a chunk of whole lines
+    # at a time so the lists this needs stay small.
+    def scan(self, text, findall, breaks=None, chunk=1 << 20):
+        if len(text) >= WIDE and self.index != 'Q':
+            self.index = 'Q'
+            for name in ('syms', 'offsets', 'lengths', 'lineStarts', 'lineEnds'):
+                setattr(self, name, array('Q', getattr(self, name)))
+        pos = 0
+        while True:
+            end = text.find('\n', pos + chunk)
+            if end < 0:
+                self._scanLines(text[pos:], pos, findall, breaks)
+                return self
+            self._scanLines(text[pos:end], pos, findall, breaks)
+            pos = end + 1
+
+    def _scanLines(self, text, base, findall, breaks):
+        pairs = findall(text)
+        spaces = [space for space, _ in pairs]
+        texts = [token for _, token in pairs]
+        del pairs
+        ids = self.ids
+        for name in dict.fromkeys(texts):
+            if name not in ids:
+                self.intern(name)
+        first = len(self.syms)
+        index = self.index
+        syms = array(index, map(ids.__getitem__, texts))
+        self.syms.extend(syms)
+        self.kinds.extend(array('B', map(self.symKinds.__getitem__, syms)))
+        lengths = array(index, map(len, texts))
+        self.lengths.extend(lengths)
+        ends = accumulate(map(add, map(len, spaces), lengths), initial=base)
+        next(ends)
+        # bisecting a list is quicker than bisecting an array
+        offsets = list(map(sub, ends, lengths))
+        self.offsets.extend(array(index, offsets))
+        del spaces
+        # a line ends before the first token past the next line's start
+        nextLine = accumulate(map(add, map(len, text.split('\n')), repeat(1)), initial=base)
+        next(nextLine)
+        lineEnds = list(map(bisect_left, repeat(offsets), nextLine))
+        lineEnds[-1] = len(texts)
+        del offsets
+        if breaks is not None:
+            isBreak = map(breaks.__contains__, texts)
+            lineEnds = sorted(set(lineEnds).union(compress(count(1), isBreak)))
+        lineEnds = array(index, map(add, lineEnds, repeat(first)))
+        if breaks is None:
+            self.lineStarts.append(first)
+            self.lineStarts.extend(lineEnds[:-1])
+            self.lineEnds.extend(lineEnds)
+        else:
+            for start, end in zip([first] + lineEnds.tolist(), lineEnds):
+                if end > start:
+                    self.lineStarts.append(start)
+                    self.lineEnds.append(end)
+
+    # number of lines, like len() of a list of token lines
+    def __len__(self):
+        return len(self.lineStarts)
+
+    def __missing__(self, i):
+        if not 0 <= i < len(self.lineStarts):
+            raise IndexError("line index out of range")
+        names = self.names
+        line = [names[sym] for sym in self.syms[self.lineStarts[i]:self.lineEnds[i]]]
+        # the tools only look at a line and its neighbours at a time, so the
+        # lists are simply dropped every so often
+        if dict.__len__(self) >= 64:
+            self.clear()
+        self[i] = line
+        return line
+
+    def line(self, i):
+        return self[i]
+
+    # index of the first token of line i and one past its last token
+    def span(self, i):
+        return self.lineStarts[i], self.lineEnds[i]
+
+    def numTokens(self):
+        return len(self.syms)
+
+    def text(self, k):
+        return self.names[self.syms[k]]
+
+    def kind(self, k):
+        return self.kinds[k]
+
+    def category(self, k):
+        return CATEGORIES[self.kinds[k]]
+
+    # A view of the same tokens with each line cut off at its first '//',
+    # leaving out lines that end up empty if dropEmpty is set. The token
+    # columns and symbols are shared, not copied.
+    def withoutComments(self, dropEmpty=False):
+        view = TokenStore(self.reserved)
+        for name in ('index', 'kinds', 'syms', 'offsets', 'lengths', 'names', 'ids', 'symKinds',
+                     'literals'):
+            setattr(view, name, getattr(self, name))
+        lineStarts = self.lineStarts
+        lineEnds = array(self.lineEnds.typecode, self.lineEnds)
+        comment = self.ids.get('//')
+        if comment is not None:
+            # jump from one comment to the next rather than looking at every token
+            index = self.syms.index
+            k = -1
+            try:
+                while True:
+                    k = index(comment, k + 1)
+                    i = bisect_right(lineStarts, k) - 1
+                    if k < lineEnds[i]:
+                        lineEnds[i] = k
+            except ValueError:
+                pass
+        if dropEmpty:
+            view.lineStarts = array(lineStarts.typecode)
+            view.lineEnds = array(lineEnds.typecode)
+            for start, end in zip(lineStarts, lineEnds):
+                if end > start:
+                    view.lineStarts.append(start)
+                    view.lineEnds.append(end)
+        else:
+            view.lineStarts = lineStarts
+            view.lineEnds = lineEnds
+        return view
@@ -0,0 +1,402 @@
+'''
+Runs C-- programs as Python: the checked syntax tree is translated into a
+Python syntax tree (an ast.Module), which compile() turns into a code object
+CPython runs like any other, with no interpreter loop of our own.
+
+The statements become the body of a single function, so every variable
+declared in the first block is a local of it, annotated with its type and
+starting out as 0, 0.0 or false. if, while, the comparisons, and and or
+map onto their Python counterparts, as do + - and * and the / of floats.
+The / and % of ints and the % of floats call cmm.runtime, the types of the
+operands being known from the checker's symbol table. The result of every
+int operation but % is checked to fit in 64 bits right where it is made, as
+is an int literal, so no other int needs checking. read calls a
+cmm.runtime.Input and print writes through a BufferedWriter. Every node of
+the Python tree carries the line of the C-- node it stands for, so the line
+of an error while the program runs is that of the frame it was raised in.
+
+compile() takes no more than 20 loops nested in one another, and both it and
+the translation recurse over the tree, so a program nesting deeper than
+that is compiled to bytecode and run by cmm.vm instead.
+
+Code objects can be kept in the result cache (see cmm.cache), keyed by a
+hash of the program's source and the Python version they were compiled by:
+
+    python3 -m cmm.transpile [--cache] [--source] FILE
+'''
+
+import ast
+import sys
+
+from .runtime import (CompileError, ExecutionError, INT_MIN, INT_MAX, checkSource, divide, modulo,
+                      fmodulo, overflow, streams)
+from .syntax import Node, Block, Assign, If, While, Read, Print, Num, Str, Name, Compare, BoolOp
+from .symbols import BOOLEAN
+
+# the file name of the code objects, for telling their frames apart
+FILENAME = '<cmm>'
+
+# the arguments of the function a program is translated into, in order
+ARGUMENTS = ('input', 'write', 'divide', 'modulo', 'fmodulo', 'overflow')
+
+# the local holding an int result while it is checked
+_RESULT = 'result'
+
+# how many loops compile() takes nested in one another (CPython's
+# CO_MAXBLOCKS), and how deep statements and expressions nest in all before
+# the recursion of translating and compiling them could run out of stack
+MAX_LOOPS = 20
+MAX_DEPTH = 100
+
+_TYPE_NAMES = ('int', 'float', 'boolean')
+_ANNOTATIONS = ('int', 'float', 'bool')
+_INITIAL = (0, 0.0, 0)
+_READ = ('readInt', 'readFloat', 'readBoolean')
+
+_OPERATORS = {'+': ast.Add, '-': ast.Sub, '*': ast.Mult, '/': ast.Div}
+_CALLS = {('int', '/'): 'divide', ('int', '%'): 'modulo', ('float', '%'): 'fmodulo'}
+_COMPARE = {'==': ast.Eq, '!=': ast.NotEq, '<': ast.Lt, '>': ast.Gt, '<=': ast.LtE,
+            '>=': ast.GtE}
+
+# node, placed on a line of the program
+def _at(node, line):
+    node.lineno = node.end_lineno = line
+    node.col_offset = node.end_col_offset = 0
+    return node
+
+def _load(name, line):
+    return _at(ast.Name(id=name, ctx=ast.Load()), line)
+
+def _store(name, line):
+    return _at(ast.Name(id=name, ctx=ast.Store()), line)
+
+def _constant(value, line):
+    return _at(ast.Constant(value=value), line)
+
+def _call(function, args, line):
+    return _at(ast.Call(func=_load(function, line), args=args, keywords=[]), line)
+
+# the local of a variable, kept apart from the names the function itself uses
+def _local(name):
+    return 'v_' + name
+
+# Whether a program nests shallowly enough to be compiled to Python, see
+# MAX_LOOPS and MAX_DEPTH. The tree is walked with a stack, being possibly
+# too deep to recurse over.
+def translatable(program):
+    stack = [(program, 0, 0)]
+    while stack:
+        node, depth, loops = stack.pop()
+        if type(node) is While:
+            loops += 1
+        if depth > MAX_DEPTH or loops > MAX_LOOPS:
+            return False
+        for name in node.fields:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                stack.append((value, depth + 1, loops))
+            elif isinstance(value, list):
+                stack.extend([(item, depth + 1, loops) for item in value
+                              if isinstance(item, Node)])
+    return True
+
+# Translates the statements of a checked program into a Python module
+# defining the function program(input, write, divide, modulo, fmodulo,
+# overflow), which runs them and gives back the final values of the variables in the
+# order of the symbol table.
+class Transpiler:
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def translate(self, program):
+        symbols = self.symbols
+        line = program.line
+        body = []
+        for name in _READ:
+            # read's methods are looked up once
+            body.append(_at(ast.Assign(targets=[_store(name, line)], value=_at(ast.Attribute(
+                value=_load('input', line), attr=name, ctx=ast.Load()), line)), line))
+        for name, code, declared in zip(symbols.names, symbols.types, symbols.lines):
+            body.append(_at(ast.AnnAssign(target=_store(_local(name), declared),
+                                          annotation=_load(_ANNOTATIONS[code], declared),
+                                          value=_constant(_INITIAL[code], declared), simple=1),
+                            declared))
+        blocks = [node for node in program.body if type(node) is Block]
+        if len(blocks) > 1:
+            body.extend(self._statements(blocks[1].body))
+        end = (blocks[-1].end or line) if blocks else line
+        body.append(_at(ast.Return(value=_at(ast.Tuple(
+            elts=[_load(_local(name), end) for name in symbols.names], ctx=ast.Load()), end)),
+            end))
+        args = [ast.arg(arg=name, annotation=None) for name in ARGUMENTS]
+        arguments = ast.arguments(posonlyargs=[], args=args, vararg=None, kwonlyargs=[],
+                                  kw_defaults=[], kwarg=None, defaults=[])
+        function = ast.FunctionDef(name='program', args=arguments, body=body, decorator_list=[],
+                                   returns=None)
+        if 'type_params' in ast.FunctionDef._fields:
+            function.type_params = []
+        module = ast.Module(body=[_at(function, line)], type_ignores=[])
+        return ast.fix_missing_locations(module)
+
+    # the Python statements of a list of C-- ones, never empty
+    def _statements(self, body):
+        result = []
+        for node in body:
+            self._statement(node, result)
+        return result or [_at(ast.Pass(), body[0].line if body else 1)]
+
+    def _statement(self, node, result):
+        kind = type(node)
+        line = node.line
+        if kind is Assign:
+            name = _local(node.name)
+            result.append(_at(ast.Assign(targets=[_store(name, line)],
+                                         value=self._expr(node.value)[0]), line))
+        elif kind is Print:
+            result.append(_at(ast.Expr(value=_call('write', [self._text(node.value)], line)),
+                              line))
+        elif kind is Read:
+            name = node.target.id
+            code = self.symbols.types[self.symbols[name]]
+            result.append(_at(ast.Assign(targets=[_store(_local(name), line)],
+                                         value=_call(_READ[code], [_constant(line, line)], line)),
+                              line))
+        elif kind is If:
+            orelse = self._statements(node.orelse) if node.orelse else []
+            result.append(_at(ast.If(test=self._expr(node.test)[0],
+                                     body=self._statements(node.body), orelse=orelse), line))
+        elif kind is While:
+            result.append(_at(ast.While(test=self._expr(node.test)[0],
+                                        body=self._statements(node.body), orelse=[]), line))
+        elif kind is Block:
+            for statement in node.body:
+                self._statement(statement, result)
+
+    def _typeOf(self, name):
+        return _TYPE_NAMES[self.symbols.types[self.symbols[name]]]
+
+    # value, an int, when it fits in 64 bits, else a call of overflow:
+    # (result if INT_MIN <= (result := value) <= INT_MAX else overflow())
+    def _checkInt(self, value, line):
+        held = _at(ast.NamedExpr(target=_store(_RESULT, line), value=value), line)
+        test = _at(ast.Compare(left=_constant(INT_MIN, line), ops=[ast.LtE(), ast.LtE()],
+                               comparators=[held, _constant(INT_MAX, line)]), line)
+        return _at(ast.IfExp(test=test, body=_load(_RESULT, line),
+                             orelse=_call('overflow', [], line)), line)
+
+    # the line print writes for an expression, see cmm.runtime.show
+    def _text(self, expr):
+        line = expr.line
+        if type(expr) is Str:
+            return _constant(expr.text[1:-1] + '\n', line)
+        value, kind = self._expr(expr)
+        if kind == 'boolean':
+            return _at(ast.IfExp(test=value, body=_constant('true\n', line),
+                                 orelse=_constant('false\n', line)), line)
+        # a float is never anything but a float, so repr is all show does to it
+        text = _call('repr' if kind == 'float' else 'str', [value], line)
+        return _at(ast.BinOp(left=text, op=ast.Add(), right=_constant('\n', line)), line)
+
+    # the Python expression of a C-- one, and its type
+    def _expr(self, expr):
+        kind = type(expr)
+        line = expr.line
+        if kind is Num:
+            if expr.type == 'float':
+                return _constant(float(expr.text), line), 'float'
+            value = int(expr.text)
+            if expr.type == 'int' and value > INT_MAX:
+                return _call('overflow', [], line), 'int'
+            return _constant(value, line), expr.type
+        if kind is Str:
+            return _constant(expr.text[1:-1], line), 'string'
+        if kind is Name:
+            return _load(_local(expr.id), line), self._typeOf(expr.id)
+        left, leftType = self._expr(expr.left)
+        right = self._expr(expr.right)[0]
+        if kind is BoolOp:
+            op = ast.And() if expr.op == 'and' else ast.Or()
+            return _at(ast.BoolOp(op=op, values=[left, right]), line), 'boolean'
+        if kind is Compare:
+            return _at(ast.Compare(left=left, ops=[_COMPARE[expr.op]()], comparators=[right]),
+                       line), 'boolean'
+        function = _CALLS.get((leftType, expr.op))
+        if function is not None:
+            value = _call(function, [left, right], line)
+        else:
+            value = _at(ast.BinOp(left=left, op=_OPERATORS[expr.op](), right=right), line)
+        if leftType == 'int' and expr.op != '%':
+            value = self._checkInt(value, line)
+        return value, leftType
+
+def translate(program, symbols):
+    return Transpiler(symbols).translate(program)
+
+# A program compiled to Python: code defines the function program, names
+# and types are those of its variables in the order it gives back their
+# values.
+class Compiled:
+
+    def __init__(self, code, names, types):
+        self.code = code
+        self.names = names
+        self.types = types
+        self.function = None
+
+    # the function running the program
+    def program(self):
+        if self.function is None:
+            namespace = {}
+            exec(self.code, namespace)
+            self.function = namespace['program']
+        return self.function
+
+# the Compiled of a checked program; one that is not translatable is
+# compiled for cmm.vm instead, giving a cmm.vm.Code
+def compileProgram(program, symbols):
+    if not translatable(program):
+        from . import vm
+        return vm.compileProgram(program, symbols)
+    module = translate(program, symbols)
+    return Compiled(compile(module, FILENAME, 'exec'), tuple(symbols.names),
+                    tuple(symbols.types))
+
+# the bytes of a Compiled, or of a cmm.vm.Code, for the cache
+def dumps(compiled):
+    import marshal
+    if type(compiled) is not Compiled:
+        from . import vm
+        return marshal.dumps(('bytecode', vm.dumps(compiled)))
+    return marshal.dumps((compiled.code, compiled.names, compiled.types))
+
+def loads(data):
+    import marshal
+    value = marshal.loads(data)
+    if value[0] == 'bytecode':
+        from . import vm
+        return vm.loads(value[1])
+    code, names, types = value
+    return Compiled(code, names, types)
+
+# the Compiled of a program's source, from the cache when it is there;
+# raises CompileError when the program does not check
+def load(text, cache=None):
+    if cache is not None:
+        # code objects only load into the Python that made them
+        key = cache.sourceKey(text, 'python', sys.implementation.cache_tag)
+        data = cache.getData(key)
+        if data is not None:
+            try:
+                return loads(data)
+            except (ValueError, EOFError, TypeError):
+                pass
+    program, symbols = checkSource(text)
+    compiled = compileProgram(program, symbols)
+    if cache is not None:
+        cache.putData(key, dumps(compiled))
+    return compiled
+
+# the line of the program an exception was raised on, from the deepest of
+# its frames running the program
+def _line(traceback):
+    line = 0
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == FILENAME:
+            line = traceback.tb_lineno
+        traceback = traceback.tb_next
+    return line
+
+# A run of a compiled program, whose variables can be looked at by name once
+# it ran.
+class Frame:
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.values = [_INITIAL[code] for code in compiled.types]
+
+    # the value of the variable called name
+    def value(self, name):
+        index = self.compiled.names.index(name)
+        if self.compiled.types[index] == BOOLEAN:
+            return bool(self.values[index])
+        return self.values[index]
+
+    # runs the program, reading with input (a cmm.runtime.Input) and
+    # printing through out
+    def run(self, input, out):
+        program = self.compiled.program()
+        try:
+            self.values = program(input, out.write, divide, modulo, fmodulo, overflow)
+        except ZeroDivisionError as e:
+            raise ExecutionError(_line(e.__traceback__), "division by zero")
+        except OverflowError as e:
+            raise ExecutionError(_line(e.__traceback__), "integer overflow")
+
+# runs compiled with stdin and stdout, or the streams given, giving back the
+# Frame it ran in, or the cmm.vm.Machine for a cmm.vm.Code
+def execute(compiled, stdin=None, stdout=None):
+    if type(compiled) is not Compiled:
+        from . import vm
+        return vm.execute(compiled, stdin, stdout)
+    input, out = streams(stdin, stdout)
+    frame = Frame(compiled)
+    try:
+        frame.run(input, out)
+    finally:
+        out.flush()
+    return frame
+
+# compiles and runs a program's source, see load and execute
+def run(text, stdin=None, stdout=None, cache=None):
+    return execute(load(text, cache), stdin, stdout)
+
+def _argumentParser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs a C-- program compiled to Python")
+    parser.add_argument("FILE", help="the program to run")
+    parser.add_argument("--source", action="store_true",
+                        help="print the program as Python instead of running it (Python 3.9 "
+                             "or later)")
+    from . import cache
+    cache.addArguments(parser, "reuse programs compiled before")
+    return parser
+
+# the exit status is 1 when the program does not check, its messages going
+# to stderr, and 2 when it stops with an error
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = _argumentParser()
+    args = parser.parse_args(argv)
+    if args.source and not hasattr(ast, 'unparse'):
+        parser.error("--source needs Python 3.9 or later")
+    from .checker import _resultCache
+    with open(args.FILE, 'r') as f:
+        text = f.read()
+    try:
+        if args.source:
+            program, symbols = checkSource(text)
+        else:
+            compiled = load(text, _resultCache(args))
+    except CompileError as e:
+        from .diagnostics import MESSAGES, message
+        for line, number, detail in e.messages:
+            sys.stderr.write("%s:%d: %s: %s\n" % (args.FILE, line, MESSAGES[number][1],
+                                                  message(number, detail)))
+        sys.exit(1)
+    if args.source:
+        if not translatable(program):
+            sys.stderr.write("%s: nested too deep to be compiled to Python, it runs as bytecode\n"
+                             % args.FILE)
+            sys.exit(1)
+        print(ast.unparse(translate(program, symbols)))
+        return
+    try:
+        execute(compiled)
+    except ExecutionError as e:
+        sys.stderr.write("%s: %s\n" % (args.FILE, e))
+        sys.exit(2)
+
+if __name__ == '__main__':
+    main()
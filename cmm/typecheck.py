@@ -0,0 +1,207 @@
+'''
+Type checker working on the syntax tree of cmm.parser.
+
+The tree is walked once. The first block of the program declares the
+variables, the second one holds the statements. Messages are noted with
+their line as they come up and go through a Diagnostics in line order at
+the end, so they come out in the same form as the TypeChecker's.
+'''
+
+import sys
+
+from .lexer import checkSymbolName
+from .parser import parse
+from .syntax import (Block, VarDec, Assign, If, While, Read, Print, Bad,
+                     Num, Str, Name, BinOp, Compare, walk)
+from .symbols import SymbolTable, TYPE_NAMES, TYPE_CODES
+from .diagnostics import (Diagnostics, ErrorLimit, WRONG_BLOCK, INVALID, NOT_IN_TABLE,
+                          ASSIGN_NOT_IN_TABLE, INCOMPATIBLE_TYPES, READ_LOGIC, NOT_BOOLEAN,
+                          BOOL_ARITHMETIC, REDEFINITION, DECL_ASSIGN)
+
+_numbers = ('int', 'float')
+
+class TreeChecker:
+
+    def __init__(self):
+        self.symbols = SymbolTable()
+        # (line, code, detail) of every message
+        self.messages = []
+
+    def _report(self, line, code, detail=None):
+        self.messages.append((line, code, detail))
+
+    def check(self, program):
+        self.messages.extend(program.errors)
+        blocks = 0
+        for node in program.body:
+            if type(node) is Block and blocks < 2:
+                blocks += 1
+                for statement in node.body:
+                    self._statement(statement, blocks == 1)
+            elif type(node) is not Bad:
+                self._report(node.line, WRONG_BLOCK)
+        return self
+
+    # the messages of one statement of a block, checked against the symbols
+    # declared so far
+    def checkStatement(self, node, declarations=False):
+        messages = self.messages
+        self.messages = []
+        self._statement(node, declarations)
+        result, self.messages = self.messages, messages
+        return result
+
+    # prints the messages, giving back the Diagnostics they went through
+    def report(self, numLines, limit=0, sink=None):
+        return report(self.messages, numLines, limit, sink)
+
+    # boolean, or a 0 or 1 standing in for one
+    def _isBoolean(self, expr, kind):
+        return kind == 'boolean' or type(expr) is Num and expr.text in ('0', '1')
+
+    # checks node and the statements nested in it, in source order; a stack
+    # of the statements still to check stands in for recursion, so they nest
+    # as deep as memory allows
+    def _statement(self, node, declarations):
+        stack = [(node, declarations)]
+        while stack:
+            node, declarations = stack.pop()
+            kind = type(node)
+            if kind is VarDec:
+                if declarations:
+                    self._declare(node)
+                else:
+                    self._report(node.line, WRONG_BLOCK)
+                continue
+            if kind is Bad:
+                continue
+            if declarations:
+                self._report(node.line, WRONG_BLOCK)
+            if kind is Assign:
+                self._assign(node)
+            elif kind is Print:
+                self._type(node.value)
+            elif kind is Read:
+                if type(node.target) is not Name:
+                    self._report(node.line, READ_LOGIC)
+                self._type(node.target)
+            elif kind is If:
+                self._test(node.test)
+                stack.extend([(statement, False) for statement in reversed(node.orelse or ())])
+                stack.extend([(statement, False) for statement in reversed(node.body)])
+            elif kind is While:
+                self._test(node.test)
+                stack.extend([(statement, False) for statement in reversed(node.body)])
+            elif kind is Block:
+                stack.extend([(statement, False) for statement in reversed(node.body)])
+
+    def _declare(self, node):
+        if node.value is not None:
+            self._report(node.line, DECL_ASSIGN)
+        if not checkSymbolName(node.name):
+            self._report(node.line, INVALID)
+        elif node.name in self.symbols:
+            self._report(node.line, REDEFINITION)
+        else:
+            self.symbols.declare(node.name, TYPE_CODES[node.type], node.line)
+
+    def _assign(self, node):
+        code = self.symbols.typeOf(node.name)
+        target = None if code is None else TYPE_NAMES[code]
+        if target is None:
+            self._report(node.line, ASSIGN_NOT_IN_TABLE)
+        value = self._type(node.value)
+        if target == 'boolean':
+            if any(type(n) is BinOp for n in walk(node.value)):
+                self._report(node.line, BOOL_ARITHMETIC)
+            elif value is not None and not self._isBoolean(node.value, value):
+                self._report(node.line, INCOMPATIBLE_TYPES)
+        elif target is not None and value is not None and value != target:
+            self._report(node.line, INCOMPATIBLE_TYPES)
+
+    def _test(self, test):
+        if type(test) is Bad:
+            return
+        kind = self._type(test)
+        if kind is not None and not self._isBoolean(test, kind):
+            self._report(test.line, NOT_BOOLEAN)
+
+    # The type of an expression, None when it has none because of an error
+    # already reported. Operators are typed once both their sides are, the
+    # ones waiting for that on a stack rather than recursing.
+    def _type(self, expr):
+        types = []
+        stack = [(expr, False)]
+        while stack:
+            expr, sided = stack.pop()
+            kind = type(expr)
+            if kind is Num:
+                types.append(expr.type)
+            elif kind is Str:
+                types.append('string')
+            elif kind is Name:
+                code = self.symbols.typeOf(expr.id)
+                if code is None:
+                    self._report(expr.line, NOT_IN_TABLE)
+                    types.append(None)
+                else:
+                    types.append(TYPE_NAMES[code])
+            elif not sided:
+                stack.append((expr, True))
+                stack.append((expr.right, False))
+                stack.append((expr.left, False))
+            else:
+                right = types.pop()
+                types.append(self._operator(expr, types.pop(), right))
+        return types[0]
+
+    # the type of an operator, given the types of its sides
+    def _operator(self, expr, left, right):
+        kind = type(expr)
+        if kind is BinOp:
+            if left is None or right is None:
+                return None
+            if left != right or left not in _numbers:
+                self._report(expr.line, INCOMPATIBLE_TYPES)
+                return None
+            return left
+        if kind is Compare:
+            if left is not None and right is not None:
+                if expr.op == '==' or expr.op == '!=':
+                    ok = left == right and left != 'string' or \
+                        left == 'boolean' and self._isBoolean(expr.right, right) or \
+                        right == 'boolean' and self._isBoolean(expr.left, left)
+                else:
+                    ok = left == right and left in _numbers
+                if not ok:
+                    self._report(expr.line, INCOMPATIBLE_TYPES)
+            return 'boolean'
+        # BoolOp
+        for side, sideType in ((expr.left, left), (expr.right, right)):
+            if sideType is not None and not self._isBoolean(side, sideType):
+                self._report(side.line, NOT_BOOLEAN)
+        return 'boolean'
+
+# prints messages, (line, code, detail) in the order they came up, by line;
+# with a sink they go to it instead, see Diagnostics
+def report(messages, numLines, limit=0, sink=None):
+    diag = Diagnostics(len(str(numLines)), limit=limit, sink=sink)
+    messages.sort(key=lambda message: message[0])
+    try:
+        last = None
+        for line, code, detail in messages:
+            if line != last:
+                diag.emit(last)
+                last = line
+            diag.report(code, detail)
+        diag.emit(last)
+    except ErrorLimit:
+        return diag
+    if diag.typeErrors == 0:
+        sys.stdout.write("Your program is type error free")
+    return diag
+
+# parses and checks the token lines of a program, printing the messages
+def checkTree(lines, limit=0, sink=None):
+    numLines = len(lines)
+    return TreeChecker().check(parse(lines)).report(numLines, limit, sink)
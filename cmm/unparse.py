@@ -0,0 +1,108 @@
+'''
+Writes a syntax tree of cmm.parser back as C-- source, one statement to a
+line and blocks indented, for looking at what cmm.optimize made of a
+program. Parentheses are only written where the precedence of the operators
+needs them, and a Num is written as its text, so a folded condition comes
+out as 1 or 0.
+'''
+
+from .syntax import Block, VarDec, Assign, If, While, Read, Print, Bad, Num, Str, Name, Compare
+
+# how tightly an operator binds; atoms bind tightest
+_LEVELS = {'and': 1, 'or': 1, '==': 2, '!=': 2, '<': 2, '>': 2, '<=': 2, '>=': 2,
+           '+': 3, '-': 3, '*': 4, '/': 4, '%': 4}
+_ATOM = 5
+
+INDENT = '    '
+
+def _level(expr):
+    kind = type(expr)
+    if kind is Num or kind is Str or kind is Name:
+        return _ATOM
+    return _LEVELS[expr.op]
+
+# the text of expr, in parentheses when it binds less tightly than level
+def _operand(text, expr, level):
+    if _level(expr) < level:
+        return '(' + text + ')'
+    return text
+
+# The source of an expression. Operators are written once both their sides
+# are, the ones waiting for that on a stack rather than recursing, so
+# expressions nest as deep as memory allows.
+def expression(expr):
+    texts = []
+    stack = [(expr, False)]
+    while stack:
+        expr, sided = stack.pop()
+        kind = type(expr)
+        if kind is Num or kind is Str:
+            texts.append(expr.text)
+        elif kind is Name:
+            texts.append(expr.id)
+        elif kind is Bad:
+            texts.append(' '.join(expr.tokens))
+        elif not sided:
+            stack.append((expr, True))
+            stack.append((expr.right, False))
+            stack.append((expr.left, False))
+        else:
+            right = texts.pop()
+            left = texts.pop()
+            level = _LEVELS[expr.op]
+            # comparisons do not chain
+            leftLevel = level + 1 if kind is Compare else level
+            texts.append('%s %s %s' % (_operand(left, expr.left, leftLevel), expr.op,
+                                       _operand(right, expr.right, level + 1)))
+    return texts[0]
+
+# Appends the lines of the statements of body, nested depth deep, to lines.
+# What is left to write is kept on a stack, statements with their depth and
+# the lines that close them as text, so statements nest as deep as memory
+# allows.
+def _statements(body, depth, lines):
+    stack = [(node, depth) for node in reversed(body)]
+    while stack:
+        node, depth = stack.pop()
+        indent = INDENT * depth
+        kind = type(node)
+        if kind is str:
+            lines.append(indent + node)
+        elif kind is Block:
+            lines.append(indent + '{')
+            stack.append(('}', depth))
+            stack.extend([(child, depth + 1) for child in reversed(node.body)])
+        elif kind is VarDec:
+            if node.value is None:
+                lines.append('%s%s %s;' % (indent, node.type, node.name))
+            else:
+                lines.append('%s%s %s = %s;' % (indent, node.type, node.name,
+                                                expression(node.value)))
+        elif kind is Assign:
+            lines.append('%s%s = %s;' % (indent, node.name, expression(node.value)))
+        elif kind is Print:
+            lines.append('%sprint(%s);' % (indent, expression(node.value)))
+        elif kind is Read:
+            lines.append('%sread(%s);' % (indent, expression(node.target)))
+        elif kind is If:
+            lines.append('%sif %s:' % (indent, expression(node.test)))
+            stack.append(('end if;', depth))
+            if node.orelse is not None:
+                stack.extend([(child, depth + 1) for child in reversed(node.orelse)])
+                stack.append(('else:', depth))
+            stack.extend([(child, depth + 1) for child in reversed(node.body)])
+        elif kind is While:
+            lines.append('%swhile %s do' % (indent, expression(node.test)))
+            stack.append(('end while;', depth))
+            stack.extend([(child, depth + 1) for child in reversed(node.body)])
+        elif kind is Bad:
+            lines.append(indent + ' '.join(node.tokens))
+
+# the source of a Program, blocks separated by an empty line
+def unparse(program):
+    parts = []
+    for node in program.body:
+        lines = []
+        _statements([node], 0, lines)
+        parts.append('\n'.join(lines) + '\n')
+    return '\n'.join(parts)
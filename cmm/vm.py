@@ -0,0 +1,552 @@
+'''
+Runs C-- programs: a compiler from the checked syntax tree to bytecode, and
+the virtual machine executing it.
+
+The bytecode is a flat array of 32 bit ints, an opcode and its argument in
+turn, with the source line of every instruction in a second array for the
+errors of a running program. Expressions are evaluated on a stack. Every
+variable declared in the first block gets a slot of its own in the storage
+of its type, an array of 64 bit ints, of doubles or of bytes for booleans,
+and the instructions loading and storing it are picked by its type, as are
+those for / and % since the checker leaves no mixed arithmetic. Jumps go to
+the index of their target in the array. See cmm.runtime for the semantics.
+
+Compiled programs can be kept in the result cache (see cmm.cache), keyed by
+a hash of their source, so running an unchanged program again skips lexing,
+parsing, checking and compiling it:
+
+    python3 -m cmm.vm [--cache] [--dis] FILE
+'''
+
+import sys
+from array import array
+
+from .runtime import (INT_MIN, INT_MAX, CompileError, ExecutionError, checkSource, divide,
+                      modulo, fdivide, fmodulo, show, streams)
+from .syntax import Block, Assign, If, While, Read, Print, Num, Str, Name, Compare, BoolOp
+from .symbols import INT, FLOAT, BOOLEAN
+
+#   Opcodes
+LOAD_CONST = 0          # constants[arg]
+LOAD_INT = 1            # the variable in slot arg of its type
+LOAD_FLOAT = 2
+LOAD_BOOLEAN = 3
+STORE_INT = 4
+STORE_FLOAT = 5
+STORE_BOOLEAN = 6
+ADD_INT = 7             # the operators take their right side from the
+                        # stack when arg is STACK, from constants[arg] else;
+                        # those on ints stop the program when the result
+                        # does not fit in 64 bits
+ADD_FLOAT = 8
+SUB_INT = 9
+SUB_FLOAT = 10
+MUL_INT = 11
+MUL_FLOAT = 12
+DIV_INT = 13
+DIV_FLOAT = 14
+MOD_INT = 15
+MOD_FLOAT = 16
+EQ = 17
+NE = 18
+LT = 19
+GT = 20
+LE = 21
+GE = 22
+JUMP = 23               # to arg
+JUMP_IF_FALSE = 24      # pops the condition
+JUMP_IF_TRUE = 25
+JUMP_IF_FALSE_OR_POP = 26   # and: keeps a false left side as the result
+JUMP_IF_TRUE_OR_POP = 27    # or: keeps a true left side as the result
+PRINT = 28              # arg indexes PRINT_KINDS
+READ_INT = 29           # into slot arg
+READ_FLOAT = 30
+READ_BOOLEAN = 31
+CHECK_INT = 32          # stops the program unless the int on top of the
+                        # stack, an int literal, fits in 64 bits
+HALT = 33
+
+OPNAMES = ('LOAD_CONST', 'LOAD_INT', 'LOAD_FLOAT', 'LOAD_BOOLEAN', 'STORE_INT', 'STORE_FLOAT',
+           'STORE_BOOLEAN', 'ADD_INT', 'ADD_FLOAT', 'SUB_INT', 'SUB_FLOAT', 'MUL_INT',
+           'MUL_FLOAT', 'DIV_INT', 'DIV_FLOAT', 'MOD_INT', 'MOD_FLOAT', 'EQ', 'NE', 'LT', 'GT',
+           'LE', 'GE', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'JUMP_IF_FALSE_OR_POP',
+           'JUMP_IF_TRUE_OR_POP', 'PRINT', 'READ_INT', 'READ_FLOAT', 'READ_BOOLEAN', 'CHECK_INT',
+           'HALT')
+
+STACK = -1
+
+# the steps the compiler keeps on its stacks besides nodes, see Compiler
+_END_IF = 0
+_ELSE = 1
+_END_WHILE = 2
+_BOOL_RIGHT = 3
+_BOOL_END = 4
+_OPERATOR = 5
+
+PRINT_KINDS = ('int', 'float', 'boolean', 'string')
+
+# by type code
+_LOAD = (LOAD_INT, LOAD_FLOAT, LOAD_BOOLEAN)
+_STORE = (STORE_INT, STORE_FLOAT, STORE_BOOLEAN)
+_READ = (READ_INT, READ_FLOAT, READ_BOOLEAN)
+_TYPE_NAMES = ('int', 'float', 'boolean')
+
+_ARITHMETIC = {'+': (ADD_INT, ADD_FLOAT), '-': (SUB_INT, SUB_FLOAT), '*': (MUL_INT, MUL_FLOAT),
+               '/': (DIV_INT, DIV_FLOAT), '%': (MOD_INT, MOD_FLOAT)}
+_COMPARE = {'==': EQ, '!=': NE, '<': LT, '>': GT, '<=': LE, '>=': GE}
+
+# A compiled program: ops holds an opcode and its argument in turn, lines
+# the source line of every instruction; types are the type codes of the
+# variables, in slot order within each type, and names their names.
+class Code:
+
+    def __init__(self, ops, lines, constants, types, names):
+        self.ops = ops
+        self.lines = lines
+        self.constants = constants
+        self.types = types
+        self.names = names
+
+    # how many slots every type needs
+    def slots(self):
+        return [self.types.count(code) for code in (INT, FLOAT, BOOLEAN)]
+
+# Compiles the statements of a checked program. Every node is compiled in
+# one go, the only thing looked back at being the jumps to patch.
+class Compiler:
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.ops = array('i')
+        self.lines = array('i')
+        self.constants = []
+        self.constantIds = {}
+        # slot of every symbol within the storage of its type
+        self.slots = []
+        counts = [0, 0, 0]
+        for code in symbols.types:
+            self.slots.append(counts[code])
+            counts[code] += 1
+
+    # appends an instruction, giving back where it is
+    def _emit(self, op, arg, line):
+        at = len(self.ops)
+        self.ops.append(op)
+        self.ops.append(arg)
+        self.lines.append(line)
+        return at
+
+    # points the jump at to the next instruction
+    def _patch(self, at):
+        self.ops[at + 1] = len(self.ops)
+
+    def _constant(self, value):
+        # 1 and 1.0 are equal keys, the type tells them apart
+        key = (type(value), value)
+        index = self.constantIds.get(key)
+        if index is None:
+            index = self.constantIds[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def compile(self, program):
+        blocks = [node for node in program.body if type(node) is Block]
+        if len(blocks) > 1:
+            self._statements(blocks[1].body)
+        self._emit(HALT, 0, (blocks[-1].end or 0) if blocks else 0)
+        symbols = self.symbols
+        order = sorted(range(len(symbols.names)), key=lambda sym: (symbols.types[sym],
+                                                                    self.slots[sym]))
+        return Code(self.ops, self.lines, tuple(self.constants),
+                    tuple(symbols.types[sym] for sym in order),
+                    tuple(symbols.names[sym] for sym in order))
+
+    # Compiles statements in order. What is left to compile is kept on a
+    # stack rather than recursed into, statements and the steps that finish
+    # an if or while once its body is compiled, so statements nest as deep
+    # as memory allows.
+    def _statements(self, body):
+        stack = list(reversed(body))
+        while stack:
+            node = stack.pop()
+            kind = type(node)
+            if kind is tuple:
+                self._finish(node, stack)
+                continue
+            line = node.line
+            if kind is Assign:
+                sym = self.symbols[node.name]
+                self._expr(node.value)
+                self._emit(_STORE[self.symbols.types[sym]], self.slots[sym], line)
+            elif kind is Print:
+                kind = self._expr(node.value)
+                self._emit(PRINT, PRINT_KINDS.index(kind), line)
+            elif kind is Read:
+                sym = self.symbols[node.target.id]
+                self._emit(_READ[self.symbols.types[sym]], self.slots[sym], line)
+            elif kind is If:
+                self._expr(node.test)
+                test = self._emit(JUMP_IF_FALSE, 0, line)
+                stack.append((_ELSE, node, test) if node.orelse else (_END_IF, test))
+                stack.extend(reversed(node.body))
+            elif kind is While:
+                # the test comes after the body, so a round takes a single jump
+                start = self._emit(JUMP, 0, line)
+                stack.append((_END_WHILE, node, start, len(self.ops)))
+                stack.extend(reversed(node.body))
+            elif kind is Block:
+                stack.extend(reversed(node.body))
+
+    # the step of an if or while its body was compiled for
+    def _finish(self, step, stack):
+        if step[0] == _END_IF:
+            self._patch(step[1])
+        elif step[0] == _ELSE:
+            node, test = step[1], step[2]
+            end = self._emit(JUMP, 0, node.line)
+            self._patch(test)
+            stack.append((_END_IF, end))
+            stack.extend(reversed(node.orelse))
+        else:
+            node, start, top = step[1], step[2], step[3]
+            self._patch(start)
+            self._expr(node.test)
+            self._emit(JUMP_IF_TRUE, top, node.line)
+
+    # Compiles an expression, giving back its type. Operators wait on a
+    # stack for their sides to be compiled, the types of the sides being
+    # kept on another, rather than recursing.
+    def _expr(self, expr):
+        types = []
+        stack = [expr]
+        while stack:
+            expr = stack.pop()
+            kind = type(expr)
+            if kind is tuple:
+                step, expr = expr
+                if step == _BOOL_RIGHT:
+                    # the left side decides, or is dropped for the right one
+                    types.pop()
+                    op = JUMP_IF_FALSE_OR_POP if expr.op == 'and' else JUMP_IF_TRUE_OR_POP
+                    stack.append((_BOOL_END, self._emit(op, 0, expr.line)))
+                    stack.append(expr.right)
+                elif step == _BOOL_END:
+                    types.pop()
+                    self._patch(expr)
+                    types.append('boolean')
+                else:
+                    types.append(self._operator(expr, types))
+            elif kind is Num:
+                value = self._number(expr)
+                self._emit(LOAD_CONST, self._constant(value), expr.line)
+                if expr.type == 'int' and value > INT_MAX:
+                    self._emit(CHECK_INT, 0, expr.line)
+                types.append(expr.type)
+            elif kind is Str:
+                self._emit(LOAD_CONST, self._constant(expr.text[1:-1]), expr.line)
+                types.append('string')
+            elif kind is Name:
+                sym = self.symbols[expr.id]
+                code = self.symbols.types[sym]
+                self._emit(_LOAD[code], self.slots[sym], expr.line)
+                types.append(_TYPE_NAMES[code])
+            elif kind is BoolOp:
+                stack.append((_BOOL_RIGHT, expr))
+                stack.append(expr.left)
+            else:
+                stack.append((_OPERATOR, expr))
+                # a number on the right is taken from the constants by the
+                # operator itself rather than pushed first
+                if not self._inline(expr.right):
+                    stack.append(expr.right)
+                stack.append(expr.left)
+        return types[0]
+
+    # the code of an operator whose sides are compiled, giving back its type
+    def _operator(self, expr, types):
+        if self._inline(expr.right):
+            left = types.pop()
+            operand = self._constant(self._number(expr.right))
+        else:
+            types.pop()
+            left = types.pop()
+            operand = STACK
+        if type(expr) is Compare:
+            self._emit(_COMPARE[expr.op], operand, expr.line)
+            return 'boolean'
+        self._emit(_ARITHMETIC[expr.op][left == 'float'], operand, expr.line)
+        return left
+
+    # whether expr is a number an operator can take from the constants, not
+    # an int too large to be one, which is pushed to be checked
+    def _inline(self, expr):
+        return type(expr) is Num and (expr.type == 'float' or int(expr.text) <= INT_MAX)
+
+    def _number(self, num):
+        return float(num.text) if num.type == 'float' else int(num.text)
+
+def compileProgram(program, symbols):
+    return Compiler(symbols).compile(program)
+
+# the bytes of a Code, for the cache
+def dumps(code):
+    import marshal
+    return marshal.dumps((code.ops.tobytes(), code.lines.tobytes(), code.constants,
+                          code.types, code.names))
+
+def loads(data):
+    import marshal
+    ops, lines, constants, types, names = marshal.loads(data)
+    return Code(array('i', ops), array('i', lines), constants, types, names)
+
+# the Code of a program's source, from the cache when it is there; raises
+# CompileError when the program does not check
+def load(text, cache=None):
+    if cache is not None:
+        key = cache.sourceKey(text, 'bytecode')
+        data = cache.getData(key)
+        if data is not None:
+            try:
+                return loads(data)
+            except (ValueError, EOFError, TypeError):
+                pass
+    program, symbols = checkSource(text)
+    code = compileProgram(program, symbols)
+    if cache is not None:
+        cache.putData(key, dumps(code))
+    return code
+
+# The state of a running program: its variables, in typed storage, which
+# can be looked at by name once it ran.
+class Machine:
+
+    def __init__(self, code):
+        self.code = code
+        numInts, numFloats, numBooleans = code.slots()
+        self.ints = array('q', bytes(8 * numInts))
+        self.floats = array('d', bytes(8 * numFloats))
+        self.booleans = array('b', bytes(numBooleans))
+
+    # the value of the variable called name
+    def value(self, name):
+        index = self.code.names.index(name)
+        code = self.code.types[index]
+        slot = self.code.types[:index].count(code)
+        if code == BOOLEAN:
+            return bool(self.booleans[slot])
+        return (self.ints, self.floats)[code][slot]
+
+    # runs the program, reading with input (a cmm.runtime.Input) and
+    # printing through out
+    def run(self, input, out):
+        code = self.code
+        ops = code.ops.tolist()
+        constants = code.constants
+        ints = self.ints
+        floats = self.floats
+        booleans = self.booleans
+        write = out.write
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        low = INT_MIN
+        high = INT_MAX
+        pc = 0
+        try:
+            while True:
+                op = ops[pc]
+                arg = ops[pc + 1]
+                pc += 2
+                if op == LOAD_INT:
+                    push(ints[arg])
+                elif op == STORE_INT:
+                    ints[arg] = pop()
+                elif op == ADD_INT:
+                    right = pop() if arg < 0 else constants[arg]
+                    value = stack[-1] + right
+                    if not low <= value <= high:
+                        raise OverflowError
+                    stack[-1] = value
+                elif op == LT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] < right
+                elif op == JUMP_IF_TRUE:
+                    if pop():
+                        pc = arg
+                elif op == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == SUB_INT:
+                    right = pop() if arg < 0 else constants[arg]
+                    value = stack[-1] - right
+                    if not low <= value <= high:
+                        raise OverflowError
+                    stack[-1] = value
+                elif op == MUL_INT:
+                    right = pop() if arg < 0 else constants[arg]
+                    value = stack[-1] * right
+                    if not low <= value <= high:
+                        raise OverflowError
+                    stack[-1] = value
+                elif op == LOAD_CONST:
+                    push(constants[arg])
+                elif op == LOAD_FLOAT:
+                    push(floats[arg])
+                elif op == STORE_FLOAT:
+                    floats[arg] = pop()
+                elif op == GT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] > right
+                elif op == LE:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] <= right
+                elif op == GE:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] >= right
+                elif op == EQ:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] == right
+                elif op == NE:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = stack[-1] != right
+                elif op == MOD_INT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = modulo(stack[-1], right)
+                elif op == DIV_INT:
+                    right = pop() if arg < 0 else constants[arg]
+                    value = divide(stack[-1], right)
+                    # only INT_MIN / -1 leaves the range
+                    if value > high:
+                        raise OverflowError
+                    stack[-1] = value
+                elif op == LOAD_BOOLEAN:
+                    push(booleans[arg])
+                elif op == STORE_BOOLEAN:
+                    booleans[arg] = 1 if pop() else 0
+                elif op == ADD_FLOAT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] += right
+                elif op == SUB_FLOAT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] -= right
+                elif op == MUL_FLOAT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] *= right
+                elif op == DIV_FLOAT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = fdivide(stack[-1], right)
+                elif op == MOD_FLOAT:
+                    right = pop() if arg < 0 else constants[arg]
+                    stack[-1] = fmodulo(stack[-1], right)
+                elif op == JUMP:
+                    pc = arg
+                elif op == JUMP_IF_FALSE_OR_POP:
+                    if stack[-1]:
+                        pop()
+                    else:
+                        pc = arg
+                elif op == JUMP_IF_TRUE_OR_POP:
+                    if stack[-1]:
+                        pc = arg
+                    else:
+                        pop()
+                elif op == PRINT:
+                    write(show(pop(), PRINT_KINDS[arg]) + '\n')
+                elif op == READ_INT:
+                    ints[arg] = input.readInt(code.lines[(pc >> 1) - 1])
+                elif op == READ_FLOAT:
+                    floats[arg] = input.readFloat(code.lines[(pc >> 1) - 1])
+                elif op == READ_BOOLEAN:
+                    booleans[arg] = input.readBoolean(code.lines[(pc >> 1) - 1])
+                elif op == CHECK_INT:
+                    if stack[-1] > high:
+                        raise OverflowError
+                else:
+                    return
+        except ZeroDivisionError:
+            raise ExecutionError(code.lines[(pc >> 1) - 1], "division by zero")
+        except OverflowError:
+            raise ExecutionError(code.lines[(pc >> 1) - 1], "integer overflow")
+
+# runs code with stdin and stdout, or the streams given, giving back the
+# Machine it ran on
+def execute(code, stdin=None, stdout=None):
+    input, out = streams(stdin, stdout)
+    machine = Machine(code)
+    try:
+        machine.run(input, out)
+    finally:
+        out.flush()
+    return machine
+
+# compiles and runs a program's source, see load and execute
+def run(text, stdin=None, stdout=None, cache=None):
+    return execute(load(text, cache), stdin, stdout)
+
+# the instructions of code, one per line
+def disassemble(code):
+    out = []
+    for at in range(0, len(code.ops), 2):
+        op, arg = code.ops[at], code.ops[at + 1]
+        text = '%5d %5d  %-21s' % (code.lines[at >> 1], at, OPNAMES[op])
+        if op == LOAD_CONST:
+            text += '%d (%r)' % (arg, code.constants[arg])
+        elif LOAD_INT <= op <= STORE_BOOLEAN or READ_INT <= op <= READ_BOOLEAN:
+            text += '%d (%s)' % (arg, _slotName(code, op, arg))
+        elif ADD_INT <= op <= GE:
+            if arg != STACK:
+                text += '%d (%r)' % (arg, code.constants[arg])
+        elif JUMP <= op <= JUMP_IF_TRUE_OR_POP:
+            text += '%d' % arg
+        elif op == PRINT:
+            text += '%d (%s)' % (arg, PRINT_KINDS[arg])
+        out.append(text.rstrip())
+    return '\n'.join(out)
+
+def _slotName(code, op, arg):
+    if op >= READ_INT:
+        kind = op - READ_INT
+    elif op >= STORE_INT:
+        kind = op - STORE_INT
+    else:
+        kind = op - LOAD_INT
+    return [name for name, type in zip(code.names, code.types) if type == kind][arg]
+
+def _argumentParser():
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs a C-- program")
+    parser.add_argument("FILE", help="the program to run")
+    parser.add_argument("--dis", action="store_true",
+                        help="print the program's bytecode instead of running it")
+    from . import cache
+    cache.addArguments(parser, "reuse programs compiled before")
+    return parser
+
+# the exit status is 1 when the program does not check, its messages going
+# to stderr, and 2 when it stops with an error
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = _argumentParser().parse_args(argv)
+    from .checker import _resultCache
+    with open(args.FILE, 'r') as f:
+        text = f.read()
+    try:
+        code = load(text, _resultCache(args))
+    except CompileError as e:
+        from .diagnostics import MESSAGES, message
+        for line, number, detail in e.messages:
+            sys.stderr.write("%s:%d: %s: %s\n" % (args.FILE, line, MESSAGES[number][1],
+                                                  message(number, detail)))
+        sys.exit(1)
+    if args.dis:
+        print(disassemble(code))
+        return
+    try:
+        execute(code)
+    except ExecutionError as e:
+        sys.stderr.write("%s: %s\n" % (args.FILE, e))
+        sys.exit(2)
+
+if __name__ == '__main__':
+    main()